@@ -0,0 +1,119 @@
+"""
+Fast AcroForm presence probe.
+
+Deciding between the AcroForm and the text path used to build a full pypdf reader
+and call get_fields(), which parses the document and walks the whole field tree.
+The probe asks the MuPDF document the fill already has open for the catalog's
+/AcroForm/Fields entry. A flat PDF is settled after reading the trailer and the
+catalog. For a form, only the field dictionaries are read (/Kids, /T and /V), to
+count the fields and the ones that already hold a value. Results are cached per
+document hash, so a packet seen before is routed without touching the PDF at all.
+"""
+
+import re
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+from loguru import logger
+
+# Documents whose probe result is remembered
+PROBE_MEMO_SIZE = 4096
+
+_REF_RE = re.compile(r'(\d+)\s+\d+\s+R')
+
+# /V values that mean "no value" (an unset checkbox or radio button)
+_EMPTY_VALUES = ('', 'null', '/Off', '()', '<>')
+
+
+class AcroFormInfo:
+    """Field count of a document's AcroForm and how many fields already have a value."""
+
+    __slots__ = ('field_count', 'filled_count')
+
+    def __init__(self, field_count: int = 0, filled_count: int = 0):
+        self.field_count = field_count
+        self.filled_count = filled_count
+
+    @property
+    def has_values(self) -> bool:
+        return self.filled_count > 0
+
+    def __bool__(self):
+        return self.field_count > 0
+
+    def __eq__(self, other):
+        return (isinstance(other, AcroFormInfo)
+                and (self.field_count, self.filled_count) == (other.field_count, other.filled_count))
+
+    def __repr__(self):
+        return f"AcroFormInfo(field_count={self.field_count}, filled_count={self.filled_count})"
+
+
+def _refs(doc, xref: int, key: str) -> List[int]:
+    """Object numbers in the array stored under key (inline or indirect), or []."""
+    kind, value = doc.xref_get_key(xref, key)
+    if kind == 'xref':
+        value = doc.xref_object(int(value.split()[0]), compressed=True)
+    elif kind != 'array':
+        return []
+    return [int(n) for n in _REF_RE.findall(value)]
+
+
+def probe_acroform(doc) -> AcroFormInfo:
+    """Count the terminal fields of an open MuPDF document's AcroForm and those with a value."""
+    if not doc.is_pdf:
+        return AcroFormInfo()
+    catalog = doc.pdf_catalog()
+    if catalog <= 0:
+        return AcroFormInfo()
+    stack = _refs(doc, catalog, 'AcroForm/Fields')
+    info = AcroFormInfo()
+    seen = set()
+    while stack:
+        xref = stack.pop()
+        if xref in seen or xref <= 0 or xref >= doc.xref_length():
+            continue
+        seen.add(xref)
+        # Kids with a /T are child fields; kids without one are the field's widgets
+        children = [kid for kid in _refs(doc, xref, 'Kids') if doc.xref_get_key(kid, 'T')[0] != 'null']
+        if children:
+            stack.extend(children)
+            continue
+        info.field_count += 1
+        if doc.xref_get_key(xref, 'V')[1] not in _EMPTY_VALUES:
+            info.filled_count += 1
+    return info
+
+
+class AcroFormProbeCache:
+    """probe_acroform results per document hash, least recently used dropped first."""
+
+    def __init__(self, max_entries: int = PROBE_MEMO_SIZE):
+        self.max_entries = max_entries
+        self._memo: "OrderedDict[str, AcroFormInfo]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def probe(self, doc, digest: Optional[str] = None) -> AcroFormInfo:
+        """Probe doc, or return the stored answer for the document with this content digest."""
+        if digest is not None:
+            with self._lock:
+                info = self._memo.get(digest)
+                if info is not None:
+                    self.hits += 1
+                    self._memo.move_to_end(digest)
+                    return info
+                self.misses += 1
+        try:
+            info = probe_acroform(doc)
+        except Exception as e:
+            logger.debug(f'AcroForm probe error: {e}')
+            info = AcroFormInfo()
+        if digest is not None:
+            with self._lock:
+                self._memo[digest] = info
+                if len(self._memo) > self.max_entries:
+                    self._memo.popitem(last=False)
+        return info
@@ -0,0 +1,70 @@
+"""
+Coalesced highlight annotations.
+
+Highlight hits on a page are collected first and merged before any annotation is
+created: rects on the same text line that overlap or nearly touch are unioned, and
+the resulting pieces become the quads of one highlight annotation per page. Overlapping
+phrases ("Notary", "Notary Public", "Notary Public Signature") then cost a single
+annotation object and a single update() instead of one each.
+"""
+
+from typing import Iterable, List, Optional, Sequence
+
+import fitz  # PyMuPDF
+
+# Rects on one line closer than this (in points) are merged, e.g. words of a phrase
+ADJACENT_GAP = 1.5
+
+# Two rects are on the same line when they overlap vertically by this share of the smaller height
+LINE_OVERLAP = 0.5
+
+
+def _same_line(a: fitz.Rect, b: fitz.Rect) -> bool:
+    overlap = min(a.y1, b.y1) - max(a.y0, b.y0)
+    return overlap >= LINE_OVERLAP * min(a.height, b.height)
+
+
+def coalesce_rects(rects: Iterable, gap: float = ADJACENT_GAP) -> List[fitz.Rect]:
+    """
+    Union overlapping or adjacent rects on each text line.
+    Returns the merged rects line by line, top to bottom and left to right.
+    """
+    lines: List[List[fitz.Rect]] = []
+    for rect in sorted((fitz.Rect(r) for r in rects), key=lambda r: (r.y0, r.x0)):
+        if rect.is_empty:
+            continue
+        for line in reversed(lines):
+            if _same_line(line[0], rect):
+                line.append(rect)
+                break
+        else:
+            lines.append([rect])
+
+    merged: List[fitz.Rect] = []
+    for line in lines:
+        line.sort(key=lambda r: r.x0)
+        current = line[0]
+        for rect in line[1:]:
+            if rect.x0 <= current.x1 + gap:
+                current = current | rect
+            else:
+                merged.append(current)
+                current = rect
+        merged.append(current)
+    return merged
+
+
+def add_highlight(page, rects: Iterable, stroke: Sequence[float] = (1, 1, 0),
+                  opacity: float = 0.4) -> Optional["fitz.Annot"]:
+    """
+    Add one multi-quad highlight covering all rects (after coalescing) to the page.
+    Returns the annotation, or None when there is nothing to highlight.
+    """
+    quads = [rect.quad for rect in coalesce_rects(rects)]
+    if not quads:
+        return None
+    highlight = page.add_highlight_annot(quads=quads)
+    highlight.set_colors(stroke=list(stroke))
+    highlight.set_opacity(opacity)
+    highlight.update()
+    return highlight
@@ -1,8 +1,16 @@
 import io
 import zipfile
 import re
-from flask import Flask, render_template, request, send_file, flash, redirect, url_for
-from processor import process_zip
+import tempfile
+from pathlib import Path
+from flask import Flask, render_template, request, send_file, flash, redirect, url_for, jsonify
+from processor import write_filled_zip
+from highlight_pool import highlight_zip_members
+from pdf_output import open_pdf, save_pdf
+from text_search import build_matcher
+from annotations import add_highlight
+from jobs import JobManager, JobQueueFull, zip_pdf_names, DONE
+from uploads import UploadTooLarge, spool_upload, open_zip
 
 app = Flask(__name__)
 app.secret_key = "dev-secret"
@@ -15,49 +23,52 @@ COMMON_HIGHLIGHTS = [
     "Notary Signature"
 ]
 
-def highlight_pdf(pdf_bytes, highlight_words):
+# Worker processes used to highlight the PDFs of a ZIP
+# (None = one per CPU core, 1 = highlight on the request thread)
+HIGHLIGHT_WORKERS = None
+
+# How highlighted PDFs are saved: "incremental", "fast" or "compact" (see pdf_output.py)
+HIGHLIGHT_SAVE_MODE = "compact"
+
+# Result archives larger than this are spooled to a temp file instead of memory
+SPOOL_MAX_BYTES = 32 * 1024 * 1024
+
+# Background jobs for async=1 requests: worker threads, queued+running limit, result retention
+JOBS_DIR = Path(tempfile.gettempdir()) / 'uprs_pdf_filler_jobs'
+JOB_WORKERS = 2
+JOB_MAX_ACTIVE = 16
+JOB_RETENTION_SECONDS = 60 * 60
+jobs = JobManager(JOBS_DIR, JOB_WORKERS, JOB_MAX_ACTIVE, JOB_RETENTION_SECONDS)
+
+def highlight_pdf(pdf_bytes, highlight_words, save_mode=HIGHLIGHT_SAVE_MODE):
     """Highlight specified words in a PDF by finding their positions and drawing yellow rectangles"""
     try:
         # Try to import PyMuPDF (fitz) for better text highlighting
         try:
-            import fitz  # PyMuPDF
+            import fitz  # noqa: F401
             use_fitz = True
         except ImportError:
             use_fitz = False
             print("PyMuPDF not available, using fallback method")
         
         if use_fitz:
-            # Use PyMuPDF for better text highlighting
-            doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-            
-            for page_num in range(len(doc)):
-                page = doc[page_num]
+            # One matcher for all words (exact-case hits win over case-insensitive ones per word),
+            # shared with unified_app
+            matcher = build_matcher(highlight_words)
+            with open_pdf(pdf_bytes, save_mode) as doc:
                 
-                # Search for each word on the page with exact matching
-                for word in highlight_words:
-                    # First try exact case-sensitive search
-                    text_instances = page.search_for(word, flags=0)  # No flags = case sensitive
+                for page_num in range(len(doc)):
+                    page = doc[page_num]
                     
-                    # If no exact matches found, try case-insensitive
-                    if not text_instances:
-                        text_instances = page.search_for(word, flags=fitz.TEXTFLAGS_IGNORECASE)
-                    
-                    # Highlight each instance found
-                    for inst in text_instances:
-                        # Create a highlight annotation
-                        highlight = page.add_highlight_annot(inst)
-                        highlight.set_colors(stroke=[1, 1, 0])  # Yellow
-                        highlight.set_opacity(0.4)  # More visible
-                        highlight.update()
-                        
+                    page_rects = []
+                    for word, rects in matcher.search_page(page):
+                        page_rects.extend(rects)
                         print(f"Highlighted '{word}' on page {page_num + 1}")
-            
-            # Save the highlighted PDF
-            output_stream = io.BytesIO()
-            doc.save(output_stream, garbage=4, deflate=True)
-            doc.close()
-            output_stream.seek(0)
-            return output_stream.getvalue()
+                    
+                    add_highlight(page, page_rects, stroke=(1, 1, 0), opacity=0.4)  # Yellow, more visible
+                
+                # Save the highlighted PDF with the selected strategy
+                return save_pdf(doc, save_mode)
         
         else:
             # Fallback method using PyPDF2
@@ -122,29 +133,75 @@ def highlight_pdf(pdf_bytes, highlight_words):
         # Return original PDF if highlighting fails
         return pdf_bytes
 
-def process_highlight_zip(zip_bytes, highlight_words):
-    """Process a ZIP file and highlight specified words in all PDFs"""
-    output_zip = io.BytesIO()
-    
-    with zipfile.ZipFile(io.BytesIO(zip_bytes), 'r') as input_zip:
-        with zipfile.ZipFile(output_zip, 'w') as output_zip_file:
-            for file_info in input_zip.filelist:
-                if file_info.filename.lower().endswith('.pdf'):
-                    # Read the PDF
-                    pdf_bytes = input_zip.read(file_info.filename)
-                    
-                    # Highlight the PDF
-                    highlighted_pdf = highlight_pdf(pdf_bytes, highlight_words)
-                    
-                    # Add to output ZIP
-                    output_zip_file.writestr(f"highlighted_{file_info.filename}", highlighted_pdf)
-                else:
-                    # Copy non-PDF files as-is
-                    file_bytes = input_zip.read(file_info.filename)
-                    output_zip_file.writestr(file_info.filename, file_bytes)
+def process_highlight_zip(zip_bytes, highlight_words, workers=None):
+    """Process a ZIP file and highlight specified words in all PDFs
     
+    PDFs are highlighted in a pool of worker processes (workers <= 1 highlights
+    them one by one on the calling thread); output keeps the original member order.
+    """
+    output_zip = io.BytesIO()
+    write_highlight_zip(zip_bytes, highlight_words, output_zip, workers)
     return output_zip.getvalue()
 
+def write_highlight_zip(zip_source, highlight_words, out, workers=None, progress=None):
+    """Highlight all PDFs in a ZIP (bytes, path or seekable file) and write the result archive to `out`"""
+    if workers is None:
+        workers = HIGHLIGHT_WORKERS
+    with open_zip(zip_source) as input_zip:
+        with zipfile.ZipFile(out, 'w') as output_zip_file:
+            highlight_zip_members(input_zip, output_zip_file, highlight_pdf, highlight_words, workers,
+                                  progress=progress)
+
+def send_spooled_zip(spool, download_name):
+    """Send a finished ZIP from a spooled temp file without copying it back into memory"""
+    size = spool.tell()
+    spool.seek(0)
+    response = send_file(
+        spool,
+        mimetype="application/zip",
+        as_attachment=True,
+        download_name=download_name
+    )
+    response.content_length = size
+    return response
+
+def wants_async():
+    """True when the client asked for a job id instead of waiting for the ZIP"""
+    return request.values.get("async", "").lower() in ("1", "true", "yes")
+
+def form_error(message, status=400):
+    """Report a request problem as JSON to async clients, as a flash message to the form otherwise"""
+    if wants_async():
+        return jsonify({"success": False, "message": message}), status
+    flash(message)
+    return redirect(url_for("index"))
+
+def submit_job(kind, fn, upload, download_name):
+    """Queue fn(upload, out, progress) as a background job and return the 202 response with its URLs
+
+    The job owns the spooled upload from here on and closes it when it finishes.
+    """
+    def run(out, progress):
+        try:
+            fn(upload, out, progress)
+        finally:
+            upload.close()
+
+    try:
+        job = jobs.submit(kind, run, zip_pdf_names(upload), download_name)
+    except zipfile.BadZipFile:
+        upload.close()
+        return form_error("The uploaded file is not a valid ZIP archive.")
+    except JobQueueFull:
+        upload.close()
+        return form_error("Too many jobs are running, please try again later.", 503)
+    return jsonify({
+        "success": True,
+        "job_id": job.id,
+        "status_url": url_for("job_status", job_id=job.id),
+        "result_url": url_for("job_result", job_id=job.id)
+    }), 202
+
 @app.route("/", methods=["GET"])
 def index():
     return render_template("index.html", common_highlights=COMMON_HIGHLIGHTS)
@@ -161,10 +218,10 @@ def process():
 
     f = request.files.get("zipfile")
     if not f or not f.filename.lower().endswith(".zip"):
-        flash("Please upload a .zip file containing PDFs.")
-        return redirect(url_for("index"))
+        return form_error("Please upload a .zip file containing PDFs.")
 
-    zip_bytes = f.read()
+    # The upload is streamed into a spooled temp file and read by zipfile from there
+    upload = spool_upload(f)
     values = {
         # Claimant Information
         "name_different": name_different,
@@ -182,14 +239,20 @@ def process():
         "ssn": ssn_fein
     }
 
-    out_zip = process_zip(zip_bytes, values)
+    if wants_async():
+        # Fill in the background; the client polls the job and downloads the result
+        return submit_job("fill", lambda src, out, progress: write_filled_zip(src, values, out, progress=progress),
+                          upload, "processed_pdfs.zip")
 
-    return send_file(
-        io.BytesIO(out_zip),
-        mimetype="application/zip",
-        as_attachment=True,
-        download_name="processed_pdfs.zip"
-    )
+    out_zip = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    try:
+        with upload:
+            write_filled_zip(upload, values, out_zip)
+    except UploadTooLarge as e:
+        out_zip.close()
+        return form_error(str(e), 413)
+
+    return send_spooled_zip(out_zip, "processed_pdfs.zip")
 
 @app.route("/highlight", methods=["POST"])
 def highlight():
@@ -205,29 +268,55 @@ def highlight():
         all_highlight_words.extend([word.strip() for word in custom_list if word.strip()])
     
     if not all_highlight_words:
-        flash("Please select at least one word to highlight.")
-        return redirect(url_for("index"))
+        return form_error("Please select at least one word to highlight.")
     
     f = request.files.get("highlight_zipfile")
     if not f or not f.filename.lower().endswith(".zip"):
-        flash("Please upload a .zip file containing PDFs.")
-        return redirect(url_for("index"))
+        return form_error("Please upload a .zip file containing PDFs.")
+    
+    # The upload is streamed into a spooled temp file and read by zipfile from there
+    upload = spool_upload(f)
     
-    zip_bytes = f.read()
+    if wants_async():
+        # Highlight in the background; the client polls the job and downloads the result
+        return submit_job("highlight", lambda src, out, progress: write_highlight_zip(
+            src, all_highlight_words, out, progress=progress), upload, "highlighted_documents.zip")
     
+    highlighted_zip = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
     try:
-        highlighted_zip = process_highlight_zip(zip_bytes, all_highlight_words)
+        with upload:
+            write_highlight_zip(upload, all_highlight_words, highlighted_zip)
         
-        return send_file(
-            io.BytesIO(highlighted_zip),
-            mimetype="application/zip",
-            as_attachment=True,
-            download_name="highlighted_documents.zip"
-        )
+        return send_spooled_zip(highlighted_zip, "highlighted_documents.zip")
+    except UploadTooLarge as e:
+        highlighted_zip.close()
+        return form_error(str(e), 413)
     except Exception as e:
+        highlighted_zip.close()
         flash(f"Error processing documents: {str(e)}")
         return redirect(url_for("index"))
 
+@app.route("/jobs/<job_id>")
+def job_status(job_id):
+    status = jobs.status(job_id)
+    if status is None:
+        return jsonify({"success": False, "message": "Unknown or expired job"}), 404
+    return jsonify(status)
+
+@app.route("/jobs/<job_id>/result")
+def job_result(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"success": False, "message": "Unknown or expired job"}), 404
+    if job.status != DONE:
+        return jsonify({"success": False, "message": f"Job is {job.status}", "error": job.error}), 409
+    return send_file(
+        job.result_path,
+        mimetype="application/zip",
+        as_attachment=True,
+        download_name=job.download_name
+    )
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5000, debug=True)
 
@@ -0,0 +1,127 @@
+"""
+One parsed PDF shared by every stage of a fill.
+
+fill_pdf used to open the same file four times: pypdf for AcroForm detection and
+again for filling, MuPDF for label search and again for the overlay. A
+DocumentContext reads the bytes once, keeps one MuPDF document open, and builds the
+pypdf reader, the AcroForm field table, the page text layout and the per-page
+spatial indexes only when a stage first asks for them. Every later stage then reuses
+the same objects.
+"""
+
+import hashlib
+import io
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Union
+
+import fitz  # PyMuPDF
+from loguru import logger
+from pypdf import PdfReader
+
+from match_report import StageTimer
+from spatial_index import PageIndex
+from text_layer import DocumentLayout, TextLayerCache
+
+
+class DocumentContext:
+    def __init__(self, pdf_bytes: bytes, name: str = 'document.pdf', text_layers: Optional[TextLayerCache] = None):
+        self.name = name
+        self.pdf_bytes = pdf_bytes
+        self.doc = fitz.open(stream=pdf_bytes, filetype='pdf')
+        self.text_layers = text_layers
+        self._layout: Optional[DocumentLayout] = None
+        self._reader: Optional[PdfReader] = None
+        self._fields: Optional[Dict] = None
+        self._digest: Optional[str] = None
+        self._indexes: Dict[int, PageIndex] = {}
+        self._changed: Set[int] = set()
+        # Seconds per fill stage (see fill_profile.FILL_STAGES)
+        self.timer = StageTimer()
+
+    @classmethod
+    def from_path(cls, path: Union[str, Path], text_layers: Optional[TextLayerCache] = None) -> "DocumentContext":
+        path = Path(path)
+        return cls(path.read_bytes(), path.name, text_layers)
+
+    def __len__(self):
+        return len(self.doc)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.doc.close()
+
+    @property
+    def digest(self) -> str:
+        """SHA-256 of the PDF bytes (hex)."""
+        if self._digest is None:
+            self._digest = hashlib.sha256(self.pdf_bytes).hexdigest()
+        return self._digest
+
+    @property
+    def layout(self) -> DocumentLayout:
+        """Page text of the document, from the text-layer cache when one is set."""
+        if self._layout is None:
+            if self.text_layers is not None:
+                self._layout = self.text_layers.load(self.doc, self.pdf_bytes)
+            else:
+                self._layout = DocumentLayout.extract(self.doc)
+        return self._layout
+
+    def words(self, page_no: int) -> List[tuple]:
+        """page.get_text("words") of one page."""
+        return self.layout[page_no].words()
+
+    def page_index(self, page_no: int) -> PageIndex:
+        """Spatial index of one page's text, for "text inside rect" queries."""
+        index = self._indexes.get(page_no)
+        if index is None:
+            if page_no in self._changed:
+                index = PageIndex.from_page(self.doc[page_no])
+            else:
+                index = PageIndex(self.layout[page_no])
+            self._indexes[page_no] = index
+        return index
+
+    def page_changed(self, page_no: int):
+        """Drop a page's index after text was written to it; the next query re-extracts the page."""
+        self._indexes.pop(page_no, None)
+        self._changed.add(page_no)
+
+    @property
+    def reader(self) -> PdfReader:
+        if self._reader is None:
+            self._reader = PdfReader(io.BytesIO(self.pdf_bytes))
+        return self._reader
+
+    @property
+    def acroform_fields(self) -> Dict:
+        """pypdf's get_fields() table ({} for flat or unreadable documents)."""
+        if self._fields is None:
+            try:
+                self._fields = self.reader.get_fields() or {}
+            except Exception as e:
+                logger.debug(f'AcroForm detection error: {e}')
+                self._fields = {}
+        return self._fields
+
+
+@contextmanager
+def open_document(pdf: Union[DocumentContext, str, Path], text_layers: Optional[TextLayerCache] = None):
+    """
+    Yield a DocumentContext for a path (closed on exit) or pass an existing one
+    through unchanged (left open for its owner).
+    """
+    if isinstance(pdf, DocumentContext):
+        yield pdf
+        return
+    ctx = DocumentContext.from_path(pdf, text_layers)
+    try:
+        yield ctx
+    finally:
+        ctx.close()
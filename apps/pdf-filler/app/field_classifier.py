@@ -0,0 +1,193 @@
+"""
+Compiled field-label classifier.
+
+classify_field_type used to walk every FIELD_MAP keyword for every word on every page,
+doing two substring checks and a fuzz.ratio call per keyword. FieldClassifier compiles
+the keyword table once into the structures those checks need and memoizes results
+per normalized label:
+
+    exact match        dict keyword -> first keyword index
+    keyword in label   Aho-Corasick automaton over all keywords (text_search.PhraseAutomaton)
+    label in keyword   dict of every substring of every keyword -> keyword indices
+    fuzzy fallback     one rapidfuzz extractOne call over all keywords
+
+classify_many() scores a whole page of labels at once: the exact and substring rules
+still run per label, and every label they leave undecided is scored against every
+keyword in a single ``rapidfuzz.process.cdist`` call (NumPy score matrix). cdist uses
+CDIST_WORKERS threads, except inside the shared pool's worker processes, which already
+run one PDF per core and score on a single thread.
+
+Results are identical to the keyword-by-keyword scan: the first keyword (in FIELD_MAP
+order) that is an exact match or a substring match with a type-specific rule decides,
+and otherwise the first keyword with the highest fuzz.ratio does.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from loguru import logger
+from rapidfuzz import fuzz, process
+
+from highlight_pool import in_pool_worker
+from text_search import PhraseAutomaton
+
+# Distinct normalized labels remembered per classifier
+CLASSIFIER_MEMO_SIZE = 8192
+
+# Batches with fewer undecided labels than this are scored one by one with extractOne
+CDIST_MIN_LABELS = 4
+
+# rapidfuzz worker threads for cdist (-1: all cores); pool worker processes always use 1
+CDIST_WORKERS = -1
+
+# Words that make a substring match count for each field type (see _substring_rule)
+PHONE_WORDS = ("phone", "telephone", "mobile", "cell")
+SSN_WORDS = ("ssn", "social security")
+EIN_WORDS = ("ein", "employer identification", "tax id")
+DOB_WORDS = ("dob", "date of birth", "birth")
+
+
+def cdist_workers() -> int:
+    """Threads for one cdist call: CDIST_WORKERS, or 1 in a pool worker so N workers don't start N threads each."""
+    return 1 if in_pool_worker() else CDIST_WORKERS
+
+
+def normalize_label(label_text: str) -> str:
+    """Lower-case, drop ':' and '.', and strip, as the classifier compares labels."""
+    return label_text.lower().strip().replace(':', '').replace('.', '').strip()
+
+
+def _substring_rule(field_type: str, label: str) -> Optional[Tuple[str, float]]:
+    """Result for a substring hit between label and a keyword of field_type, or None to keep looking."""
+    if "email" in label and "address" in label:
+        return "email", 95.0
+    if field_type == "email" and "email" in label:
+        return field_type, 95.0
+    elif field_type == "address" and "address" in label and "email" not in label:
+        return field_type, 90.0
+    elif field_type == "phone" and any(word in label for word in PHONE_WORDS):
+        return field_type, 90.0
+    elif field_type == "ssn" and any(word in label for word in SSN_WORDS):
+        return field_type, 90.0
+    elif field_type == "ein" and any(word in label for word in EIN_WORDS):
+        return field_type, 90.0
+    elif field_type == "dob" and any(word in label for word in DOB_WORDS):
+        return field_type, 90.0
+    elif field_type == "name" and "name" in label:
+        return field_type, 85.0
+    return None
+
+
+class FieldClassifier:
+    def __init__(self, field_map: Dict[str, Sequence[str]], memo_size: int = CLASSIFIER_MEMO_SIZE):
+        self.keywords: List[str] = []
+        self.field_types: List[str] = []
+        for field_type, keywords in field_map.items():
+            for keyword in keywords:
+                self.keywords.append(keyword)
+                self.field_types.append(field_type)
+
+        self._exact: Dict[str, int] = {}
+        self._contained: Dict[str, List[int]] = {}
+        for idx, keyword in enumerate(self.keywords):
+            self._exact.setdefault(keyword, idx)
+            substrings = {keyword[i:j] for i in range(len(keyword) + 1) for j in range(i, len(keyword) + 1)}
+            for sub in substrings:
+                self._contained.setdefault(sub, []).append(idx)
+        self._automaton = PhraseAutomaton(self.keywords)
+        self.memo_size = memo_size
+        self._memo: "OrderedDict[str, Tuple[Optional[str], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def classify(self, label_text: str) -> Tuple[Optional[str], float]:
+        """(field_type, confidence) for a label, or (None, 0) when nothing scores above zero."""
+        label = normalize_label(label_text)
+        result = self._remember(label)
+        if result is None:
+            result = self._rule_match(label)
+            if result is None:
+                result = self._fuzzy_one(label)
+            self._store(label, result)
+        return result
+
+    def classify_many(self, label_texts: Sequence[str]) -> List[Tuple[Optional[str], float]]:
+        """classify() for every label, scoring the undecided ones in one cdist batch."""
+        labels = [normalize_label(text) for text in label_texts]
+        results: Dict[str, Tuple[Optional[str], float]] = {}
+        undecided: List[str] = []
+        for label in dict.fromkeys(labels):
+            result = self._remember(label)
+            if result is None:
+                result = self._rule_match(label)
+                if result is None:
+                    undecided.append(label)
+                    continue
+                self._store(label, result)
+            results[label] = result
+
+        if len(undecided) >= CDIST_MIN_LABELS:
+            scores = process.cdist(undecided, self.keywords, scorer=fuzz.ratio, dtype=np.float64,
+                                   workers=cdist_workers())
+            # argmax returns the first keyword with the best score, like the scalar scan
+            best = scores.argmax(axis=1)
+            for row, label in enumerate(undecided):
+                score = float(scores[row, best[row]])
+                results[label] = (self.field_types[best[row]], score) if score > 0 else (None, 0)
+                self._store(label, results[label])
+        else:
+            for label in undecided:
+                results[label] = self._fuzzy_one(label)
+                self._store(label, results[label])
+        return [results[label] for label in labels]
+
+    def _remember(self, label: str) -> Optional[Tuple[Optional[str], float]]:
+        with self._lock:
+            result = self._memo.get(label)
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._memo.move_to_end(label)
+            return result
+
+    def _store(self, label: str, result: Tuple[Optional[str], float]):
+        with self._lock:
+            self._memo[label] = result
+            if len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+
+    def _substring_hits(self, label: str) -> List[int]:
+        """Indices of keywords that contain label or are contained in it, in keyword order."""
+        found = {idx for _, _, idx in self._automaton.iter_matches(label)}
+        found.update(self._contained.get(label, ()))
+        return sorted(found)
+
+    def _rule_match(self, label: str) -> Optional[Tuple[str, float]]:
+        """Result of the exact and substring rules, or None when only fuzzy scoring can decide."""
+        exact = self._exact.get(label)
+        rules: Dict[str, Optional[Tuple[str, float]]] = {}
+        for idx in self._substring_hits(label):
+            if exact is not None and idx >= exact:
+                break
+            field_type = self.field_types[idx]
+            if field_type not in rules:
+                rules[field_type] = _substring_rule(field_type, label)
+            if rules[field_type] is not None:
+                if "email" in label and "address" in label:
+                    logger.info("Field classification: '{}' contains both 'email' and 'address', prioritizing email",
+                                label)
+                return rules[field_type]
+        if exact is not None:
+            return self.field_types[exact], 100.0
+        return None
+
+    def _fuzzy_one(self, label: str) -> Tuple[Optional[str], float]:
+        # extractOne keeps the first keyword with the best score
+        best = process.extractOne(label, self.keywords, scorer=fuzz.ratio)
+        if best is None or best[1] <= 0:
+            return None, 0
+        return self.field_types[best[2]], best[1]
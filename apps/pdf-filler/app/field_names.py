@@ -0,0 +1,126 @@
+"""
+Compiled AcroForm field-name index.
+
+mapping.yaml lists, per logical key (name, email, ...), the AcroForm field names it
+fills. fill_pdf used to rebuild that alias table on every call, and fill_acroform
+then checked every form field against every alias list, and only exact names matched.
+FieldNameIndex compiles the mapping once into a dict from normalized field name to
+logical key, so resolving a form's fields costs one lookup each:
+
+    exact        normalized name in the alias dict
+    numbered     the same without a trailing _<digits> (Claimant_Name_1)
+    fuzzy        best fuzz.ratio (>= MIN_NAME_SCORE) over the aliases with at least as
+                 many words, never an alias with a qualifier in front of it, memoized
+
+The fuzzy step only absorbs typos: co_claimant_name, CoClaimantName and cosigner_name
+are other people's fields and do not resolve to claimant_name or signer_name.
+
+MappingFile keeps mapping.yaml and its index loaded and re-reads both when the
+file's mtime changes.
+"""
+
+import re
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import yaml
+from loguru import logger
+from rapidfuzz import fuzz, process
+
+# Distinct field names whose fuzzy resolution is remembered per index
+FIELD_NAME_MEMO_SIZE = 4096
+
+# Lowest fuzz.ratio for a near-miss field name to resolve to an alias
+MIN_NAME_SCORE = 88
+
+_CAMEL_RE = re.compile(r'(?<=[a-z0-9])(?=[A-Z])')
+_INDEX_RE = re.compile(r'\[\d+\]')
+_SEPARATOR_RE = re.compile(r'[^a-z0-9]+')
+_NUMBER_SUFFIX_RE = re.compile(r'_\d+$')
+
+
+def normalize_field_name(name: str) -> str:
+    """
+    Lower-case snake_case form of an AcroForm field name: the last part of a
+    qualified name, without XFA indexes, camelCase split, separators collapsed.
+    "form1[0].Page1[0].ClaimantName[0]" -> "claimant_name"
+    """
+    name = _INDEX_RE.sub('', name).rsplit('.', 1)[-1]
+    name = _CAMEL_RE.sub('_', name).lower()
+    return _SEPARATOR_RE.sub('_', name).strip('_')
+
+
+class FieldNameIndex:
+    def __init__(self, aliases: Dict[str, List[str]], memo_size: int = FIELD_NAME_MEMO_SIZE):
+        """aliases maps each logical key to its AcroForm field names; earlier keys win shared names."""
+        self.keys: Dict[str, str] = {}
+        for key, names in aliases.items():
+            for name in names or ():
+                self.keys.setdefault(normalize_field_name(name), key)
+        self._fuzzy = lru_cache(maxsize=memo_size)(self._fuzzy_match)
+
+    @classmethod
+    def from_mapping(cls, mapping: Dict, memo_size: int = FIELD_NAME_MEMO_SIZE) -> "FieldNameIndex":
+        aliases = {f['key']: f.get('acroform_names', []) for f in mapping.get('fields', [])}
+        return cls(aliases, memo_size)
+
+    def resolve(self, field_name: str) -> Optional[str]:
+        """Logical key filled by an AcroForm field, or None when no alias is close enough."""
+        name = normalize_field_name(field_name)
+        key = self.keys.get(name)
+        if key is None:
+            key = self.keys.get(_NUMBER_SUFFIX_RE.sub('', name))
+        if key is None and name:
+            key = self._fuzzy(_NUMBER_SUFFIX_RE.sub('', name))
+        return key
+
+    def _fuzzy_match(self, name: str) -> Optional[str]:
+        words = name.count('_')
+        choices = [alias for alias in self.keys if alias.count('_') >= words]
+        for alias, score, _ in process.extract(name, choices, scorer=fuzz.ratio, score_cutoff=MIN_NAME_SCORE,
+                                               limit=None):
+            if not _adds_qualifier(name, alias):
+                logger.debug(f"AcroForm field '{name}' resolved to '{alias}' (score {score:.1f})")
+                return self.keys[alias]
+        return None
+
+
+def _adds_qualifier(name: str, alias: str) -> bool:
+    """True when name is alias with something in front of it (co_claimant_name, cosigner_name)."""
+    name, alias = name.replace('_', ''), alias.replace('_', '')
+    return len(name) > len(alias) and name.endswith(alias)
+
+
+class MappingFile:
+    """mapping.yaml and its FieldNameIndex, reloaded when the file's mtime changes."""
+
+    def __init__(self, path, memo_size: int = FIELD_NAME_MEMO_SIZE):
+        self.path = Path(path)
+        self.memo_size = memo_size
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._mapping: Dict = {}
+        self._index: Optional[FieldNameIndex] = None
+        self._refresh()
+
+    def _refresh(self):
+        mtime = self.path.stat().st_mtime_ns
+        with self._lock:
+            if mtime != self._mtime:
+                self._mapping = yaml.safe_load(self.path.read_text(encoding='utf-8')) or {}
+                self._index = FieldNameIndex.from_mapping(self._mapping, self.memo_size)
+                if self._mtime is not None:
+                    logger.info(f"Reloaded {self.path.name}")
+                self._mtime = mtime
+
+    @property
+    def mapping(self) -> Dict:
+        self._refresh()
+        return self._mapping
+
+    @property
+    def index(self) -> FieldNameIndex:
+        self._refresh()
+        return self._index
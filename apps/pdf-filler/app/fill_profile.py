@@ -0,0 +1,88 @@
+"""
+Stage timings and opt-in profiling for the filler pipeline.
+
+Every fill records wall-clock seconds per stage on its DocumentContext's StageTimer:
+
+    acroform      AcroForm probe
+    label_search  finding the field anchors (template replay or label classification, then probes)
+    classify      field-label classification (inside label_search)
+    blank_probe   blank-space, already-filled and phone checks (inside label_search)
+    overlay       writing the values (text overlay or AcroForm widgets)
+    save          serializing the filled PDF
+
+FillTimings collects the stages of every document of a run (a ZIP) with per-stage
+totals. With a profile directory set, profiled() also runs each document under
+cProfile and dumps a <document>.prof file to read with pstats or snakeviz.
+"""
+
+import cProfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Stages timed while filling one PDF, in report order
+FILL_STAGES = ('acroform', 'label_search', 'classify', 'blank_probe', 'overlay', 'save')
+
+
+def format_timings(timings: Dict[str, float]) -> str:
+    """'acroform 0.4ms, label_search 12.0ms, ...' for the stages that ran."""
+    return ', '.join(f"{stage} {timings[stage] * 1000:.1f}ms" for stage in FILL_STAGES if stage in timings)
+
+
+class FillTimings:
+    """Stage seconds of every document filled in one run, with totals."""
+
+    def __init__(self):
+        self.files: List[Dict] = []
+        self.created = time.time()
+
+    def add(self, name: str, timings: Dict[str, float], seconds: float, cached: bool = False):
+        self.files.append({
+            'file': name,
+            'timings': {stage: round(timings.get(stage, 0.0), 6) for stage in FILL_STAGES},
+            'seconds': round(seconds, 6),
+            'cached': cached,
+        })
+
+    def totals(self) -> Dict[str, float]:
+        totals = {stage: 0.0 for stage in FILL_STAGES}
+        for entry in self.files:
+            for stage, seconds in entry['timings'].items():
+                totals[stage] += seconds
+        return {stage: round(seconds, 6) for stage, seconds in totals.items()}
+
+    def to_dict(self) -> Dict:
+        slowest = sorted(self.files, key=lambda e: e['seconds'], reverse=True)[:5]
+        return {
+            'created': self.created,
+            'totals': {
+                'files': len(self.files),
+                'cached': sum(1 for e in self.files if e['cached']),
+                'seconds': round(sum(e['seconds'] for e in self.files), 6),
+                'timings': self.totals(),
+                'slowest': [{'file': e['file'], 'seconds': e['seconds']} for e in slowest],
+            },
+            'files': self.files,
+        }
+
+    def summary(self) -> str:
+        seconds = sum(e['seconds'] for e in self.files)
+        return f"{len(self.files)} PDFs in {seconds:.3f}s ({format_timings(self.totals())})"
+
+
+@contextmanager
+def profiled(profile_dir: Optional[Path], name: str):
+    """Run the block under cProfile and dump <profile_dir>/<name>.prof; a no-op without profile_dir."""
+    if not profile_dir:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profile_dir = Path(profile_dir)
+        profile_dir.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(str(profile_dir / f"{Path(name).stem}.prof"))
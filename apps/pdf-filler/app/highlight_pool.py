@@ -0,0 +1,172 @@
+"""
+Process-pool highlighting for ZIP uploads.
+
+PDFs are highlighted in worker processes that load PyMuPDF once at start-up, and
+results are written to the output ZIP in the original member order as soon as each
+one (and every member before it) is finished.
+
+Highlighting and filling share one pool per worker count. A request asking for
+another size gets its own pool instead of replacing one that other requests may
+still be using.
+"""
+
+import json
+import os
+import threading
+import zipfile
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional
+
+from uploads import ZipLimits
+
+_pools: Dict[int, ProcessPoolExecutor] = {}
+_pool_lock = threading.Lock()
+
+# Set in the worker processes of the shared pools
+_in_worker = False
+
+
+def default_workers() -> int:
+    """Number of worker processes to use when none is configured."""
+    return os.cpu_count() or 1
+
+
+def _warm_worker():
+    global _in_worker
+    _in_worker = True
+    # Import MuPDF once per worker so the first PDF doesn't pay for it
+    import fitz  # noqa: F401
+
+
+def in_pool_worker() -> bool:
+    """True inside a worker process of one of the shared pools."""
+    return _in_worker
+
+
+def get_pool(workers: int) -> ProcessPoolExecutor:
+    """Return the shared pool with this many workers, creating it on first use."""
+    with _pool_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            pool = _pools[workers] = ProcessPoolExecutor(max_workers=workers, initializer=_warm_worker)
+        return pool
+
+
+def reset_pool(pool: Optional[ProcessPoolExecutor] = None):
+    """
+    Drop a shared pool (a broken one) so the next request for its size starts fresh
+    worker processes; without one, drop every pool.
+    """
+    with _pool_lock:
+        for workers, shared in list(_pools.items()):
+            if pool is None or shared is pool:
+                del _pools[workers]
+                shared.shutdown(wait=False, cancel_futures=True)
+
+
+def highlight_zip_members(input_zip: zipfile.ZipFile, output_zip_file: zipfile.ZipFile,
+                          highlight_fn: Callable[[bytes, List[str]], Any], highlight_words: List[str],
+                          workers: Optional[int] = None, cache=None, cache_params: Optional[Dict[str, Any]] = None,
+                          progress: Optional[Callable[[str], None]] = None, limits: Optional[ZipLimits] = None,
+                          report=None):
+    """
+    Highlight every PDF in input_zip with highlight_fn and write the results to
+    output_zip_file as "highlighted_<name>"; other members are copied unchanged.
+
+    With workers > 1 the PDFs are highlighted in the shared process pool. At most
+    2 * workers members are held in memory while waiting for earlier ones to finish.
+    highlight_fn must be a module-level function so it can be sent to the workers.
+
+    With a ResultCache, PDFs already highlighted with the same cache_params are
+    served from the cache in this process and never sent to a worker.
+
+    progress, if given, is called with each PDF's member name once its result is written.
+
+    Members are read through limits (default: a fresh ZipLimits), so oversized
+    archives raise UploadTooLarge before or while they are read.
+
+    With a MatchReport, highlight_fn must return (pdf_bytes, stats); the stats of
+    every PDF are added to the report (and cached next to the PDF).
+    """
+    if workers is None:
+        workers = default_workers()
+    if limits is None:
+        limits = ZipLimits()
+    limits.check_declared(input_zip)
+    if cache_params is None:
+        cache_params = {'words': sorted(set(highlight_words))}
+
+    def lookup(data):
+        if cache is None:
+            return None, None
+        key = cache.make_key('highlight', data, cache_params)
+        result = cache.get(key)
+        if result is not None and report is not None:
+            # The PDF lookup above already counted this hit
+            stats = cache.get(f"{key}-stats", count=False)
+            result = (result, dict(json.loads(stats) if stats else {}, cached=True))
+        return key, result
+
+    def finish(name, result, key, fresh):
+        # Cache, record and write one highlighted PDF
+        if report is not None:
+            result, stats = result
+            report.add(name, stats)
+            if fresh and key:
+                cache.put(f"{key}-stats", json.dumps(stats).encode('utf-8'))
+        if fresh and key:
+            cache.put(key, result)
+        output_zip_file.writestr(f"highlighted_{name}", result)
+        if progress:
+            progress(name)
+
+    if workers <= 1:
+        for file_info in input_zip.infolist():
+            data = limits.read(input_zip, file_info)
+            if file_info.filename.lower().endswith('.pdf'):
+                key, result = lookup(data)
+                fresh = result is None
+                if fresh:
+                    result = highlight_fn(data, highlight_words)
+                finish(file_info.filename, result, key, fresh)
+            else:
+                output_zip_file.writestr(file_info.filename, data)
+        return
+
+    pool = get_pool(workers)
+    window = workers * 2
+    pending = deque()
+
+    def flush(limit):
+        # Write finished members in order until at most `limit` remain queued
+        while len(pending) > limit:
+            name, item, key, is_pdf = pending.popleft()
+            if not is_pdf:
+                output_zip_file.writestr(name, item)
+            elif isinstance(item, Future):
+                finish(name, item.result(), key, True)
+            else:
+                finish(name, item, key, False)
+
+    try:
+        for file_info in input_zip.infolist():
+            data = limits.read(input_zip, file_info)
+            if file_info.filename.lower().endswith('.pdf'):
+                key, result = lookup(data)
+                if result is None:
+                    result = pool.submit(highlight_fn, data, highlight_words)
+                pending.append((file_info.filename, result, key, True))
+            else:
+                pending.append((file_info.filename, data, None, False))
+            flush(window)
+        flush(0)
+    except BrokenProcessPool:
+        # A worker died (e.g. MuPDF crashed on a malformed file); don't reuse the pool
+        reset_pool(pool)
+        raise
+    finally:
+        for _, item, _, _ in pending:
+            if isinstance(item, Future):
+                item.cancel()
@@ -0,0 +1,165 @@
+"""
+Background jobs for highlight and fill requests.
+
+A submitted job gets an id right away and runs on a small, bounded thread pool (the
+PDF work itself may fan out further, e.g. into the highlight process pool). The job
+writes its result ZIP to a file under the job directory and reports progress per
+input PDF. Finished jobs and their files are kept for a retention period and then
+removed the next time the manager is used.
+"""
+
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from loguru import logger
+
+from uploads import open_zip
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+ERROR = 'error'
+
+
+class JobQueueFull(RuntimeError):
+    """Raised when too many jobs are already queued or running."""
+
+
+def zip_pdf_names(zip_source) -> List[str]:
+    """Names of the PDF members of a ZIP (bytes, path or seekable file), in archive order."""
+    with open_zip(zip_source) as zf:
+        return [name for name in zf.namelist() if name.lower().endswith('.pdf')]
+
+
+class Job:
+    def __init__(self, kind: str, files: List[str], download_name: str):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = QUEUED
+        self.files: Dict[str, str] = {name: 'pending' for name in files}
+        self.download_name = download_name
+        self.error: Optional[str] = None
+        self.result_path: Optional[Path] = None
+        self.report = None
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+
+    def to_dict(self, retention: float) -> Dict:
+        completed = sum(1 for state in self.files.values() if state != 'pending')
+        return {
+            'job_id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'total': len(self.files),
+            'completed': completed,
+            'files': [{'name': name, 'status': state} for name, state in self.files.items()],
+            'error': self.error,
+            'has_report': self.report is not None,
+            'created': self.created,
+            'started': self.started,
+            'finished': self.finished,
+            'expires': self.finished + retention if self.finished else None,
+        }
+
+
+class JobManager:
+    """
+    Runs jobs on `workers` threads and keeps at most `max_jobs` queued or running.
+    Results of finished jobs are deleted `retention` seconds after they finish.
+    """
+
+    def __init__(self, root, workers: int = 2, max_jobs: int = 16, retention: float = 3600):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_jobs = max_jobs
+        self.retention = retention
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='job')
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        # Results left behind by an earlier process can no longer be looked up
+        cutoff = time.time() - retention
+        for path in self.root.glob('*.zip'):
+            if path.stat().st_mtime < cutoff:
+                path.unlink(missing_ok=True)
+
+    def submit(self, kind: str, fn: Callable, files: List[str], download_name: str) -> Job:
+        """
+        Queue fn(out, progress) as a job. fn writes the result ZIP to the binary file
+        `out` and calls progress(name) as each input file in `files` is finished.
+        Whatever fn returns (e.g. a MatchReport) is kept as the job's report.
+        """
+        self.expire()
+        job = Job(kind, files, download_name)
+        with self._lock:
+            active = sum(1 for j in self._jobs.values() if j.status in (QUEUED, RUNNING))
+            if active >= self.max_jobs:
+                raise JobQueueFull(f"{active} jobs already queued or running")
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, fn)
+        logger.info(f"Queued {kind} job {job.id} with {len(files)} files")
+        return job
+
+    def _run(self, job: Job, fn: Callable):
+        path = self.root / f"{job.id}.zip"
+
+        def progress(name: str, state: str = 'done'):
+            with self._lock:
+                job.files[name] = state
+
+        with self._lock:
+            job.status = RUNNING
+            job.started = time.time()
+        try:
+            with open(path, 'wb') as out:
+                report = fn(out, progress)
+        except Exception as e:
+            logger.error(f"Job {job.id} failed: {e}")
+            path.unlink(missing_ok=True)
+            with self._lock:
+                job.status = ERROR
+                job.error = str(e)
+                job.finished = time.time()
+            return
+        with self._lock:
+            job.result_path = path
+            job.report = report
+            job.status = DONE
+            job.finished = time.time()
+        logger.info(f"Job {job.id} finished in {job.finished - job.started:.1f}s")
+
+    def get(self, job_id: str) -> Optional[Job]:
+        self.expire()
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def status(self, job_id: str) -> Optional[Dict]:
+        job = self.get(job_id)
+        if job is None:
+            return None
+        with self._lock:
+            return job.to_dict(self.retention)
+
+    def counts(self) -> Dict[str, int]:
+        """Number of known jobs per state."""
+        counts = {QUEUED: 0, RUNNING: 0, DONE: 0, ERROR: 0}
+        with self._lock:
+            for job in self._jobs.values():
+                counts[job.status] += 1
+        return counts
+
+    def expire(self):
+        """Forget jobs that finished more than `retention` seconds ago and delete their results."""
+        cutoff = time.time() - self.retention
+        with self._lock:
+            expired = [j for j in self._jobs.values() if j.finished is not None and j.finished < cutoff]
+            for job in expired:
+                del self._jobs[job.id]
+        for job in expired:
+            if job.result_path is not None:
+                job.result_path.unlink(missing_ok=True)
+            logger.debug(f"Expired job {job.id}")
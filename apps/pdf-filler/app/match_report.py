@@ -0,0 +1,103 @@
+"""
+Per-run match reports for highlighting.
+
+Each highlighted PDF contributes a stats dict (pages, pages skipped by the prefilter,
+hits per word, seconds spent per stage). A MatchReport collects them for one run and
+renders JSON (full detail plus totals) and CSV (one row per file, one column per word)
+that are added to the result ZIP and returned by the job API.
+"""
+
+import csv
+import io
+import json
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+# Stages timed while highlighting one PDF, in report column order
+STAGES = ('extract', 'search', 'annotate', 'save')
+
+REPORT_BASENAME = 'highlight_report'
+
+
+class StageTimer:
+    """Accumulates wall-clock seconds per named stage."""
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+
+
+class MatchReport:
+    def __init__(self, words: List[str], params: Optional[Dict] = None):
+        self.words = list(dict.fromkeys(words))
+        self.params = params or {}
+        self.files: List[Dict] = []
+        self.created = time.time()
+
+    def add(self, name: str, stats: Dict):
+        """Record the stats of one highlighted file."""
+        timings = stats.get('timings', {})
+        self.files.append({
+            'file': name,
+            'pages': stats.get('pages', 0),
+            'pages_skipped': stats.get('pages_skipped', 0),
+            'matches': dict(stats.get('matches', {})),
+            'timings': {stage: round(timings.get(stage, 0.0), 6) for stage in STAGES},
+            'seconds': round(sum(timings.values()), 6),
+            'cached': bool(stats.get('cached', False)),
+            'error': stats.get('error'),
+        })
+
+    def to_dict(self) -> Dict:
+        matches = {word: 0 for word in self.words}
+        timings = {stage: 0.0 for stage in STAGES}
+        for entry in self.files:
+            for word, count in entry['matches'].items():
+                matches[word] = matches.get(word, 0) + count
+            for stage, seconds in entry['timings'].items():
+                timings[stage] += seconds
+        slowest = sorted(self.files, key=lambda e: e['seconds'], reverse=True)[:5]
+        return {
+            'created': self.created,
+            'words': self.words,
+            'params': self.params,
+            'totals': {
+                'files': len(self.files),
+                'files_with_matches': sum(1 for e in self.files if any(e['matches'].values())),
+                'cached': sum(1 for e in self.files if e['cached']),
+                'errors': sum(1 for e in self.files if e['error']),
+                'pages': sum(e['pages'] for e in self.files),
+                'pages_skipped': sum(e['pages_skipped'] for e in self.files),
+                'matches': matches,
+                'timings': {stage: round(seconds, 6) for stage, seconds in timings.items()},
+                'slowest': [{'file': e['file'], 'seconds': e['seconds']} for e in slowest],
+            },
+            'files': self.files,
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_csv(self) -> str:
+        out = io.StringIO()
+        writer = csv.writer(out)
+        writer.writerow(['file', 'pages', 'pages_skipped', 'cached', 'error', 'seconds']
+                        + [f'{stage}_seconds' for stage in STAGES] + self.words)
+        for e in self.files:
+            writer.writerow([e['file'], e['pages'], e['pages_skipped'], int(e['cached']), e['error'] or '',
+                             e['seconds']] + [e['timings'][stage] for stage in STAGES]
+                            + [e['matches'].get(word, 0) for word in self.words])
+        return out.getvalue()
+
+    def write_to_zip(self, zf, basename: str = REPORT_BASENAME):
+        """Add <basename>.json and <basename>.csv to an open output ZipFile."""
+        zf.writestr(f'{basename}.json', self.to_json())
+        zf.writestr(f'{basename}.csv', self.to_csv())
@@ -1,14 +1,31 @@
-import os, io, zipfile, shutil, tempfile, yaml, re
+import os, io, zipfile, yaml, re, time
+from collections import deque
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
+from typing import BinaryIO, Dict, List, Tuple, Optional, Union
 from loguru import logger
 import fitz  # PyMuPDF
 from pypdf import PdfReader, PdfWriter
-from rapidfuzz import fuzz, process
+from acroform_probe import AcroFormInfo, AcroFormProbeCache
+from document_context import DocumentContext, open_document
+from field_classifier import CLASSIFIER_MEMO_SIZE, FieldClassifier
+from field_names import FieldNameIndex, MappingFile
+from fill_profile import FillTimings, format_timings, profiled
+from highlight_pool import default_workers, get_pool, reset_pool
+from pdf_output import document_bytes
+from spatial_index import PageIndex
+from template_cache import TemplateCache, template_fingerprint
+from text_layer import TEXT_LAYERS
+from uploads import ZipLimits, open_zip
+from widget_filler import fill_widgets
 
 ROOT = Path(__file__).resolve().parent
 PATTERNS = yaml.safe_load(open(ROOT / 'config' / 'patterns.yaml', 'r', encoding='utf-8'))
-MAPPING = yaml.safe_load(open(ROOT / 'config' / 'mapping.yaml', 'r', encoding='utf-8'))
+# mapping.yaml with its compiled AcroForm field-name index, reloaded when the file changes
+MAPPING_FILE = MappingFile(ROOT / 'config' / 'mapping.yaml')
+MAPPING = MAPPING_FILE.mapping
 
 # Enhanced field type classification with fuzzy matching support
 FIELD_MAP = {
@@ -71,67 +88,196 @@ PHONE_DETECTION_PATTERNS = [
     r'\(\d{3}\)\s\d{3}\s\d{4}',  # (123) 456 7890
 ]
 
+# Built once from FIELD_MAP; classify_field_type results are memoized per normalized label
+FIELD_CLASSIFIER = FieldClassifier(FIELD_MAP, CLASSIFIER_MEMO_SIZE)
+
+# Word endings and keywords that mark a likely field label (see is_likely_field_label)
+FIELD_INDICATORS = (':', '.', '?')
+FIELD_KEYWORDS = ['name', 'email', 'address', 'phone', 'telephone', 'dob', 'birth', 'ssn', 'ein', 'fein', 'daytime']
+# Words worth a debug line while scanning a page for labels
+LABEL_HINT_RE = re.compile('email|phone|address|name|dob|ssn|ein', re.IGNORECASE)
+FIELD_KEYWORDS_RE = re.compile('|'.join(re.escape(k) for k in FIELD_KEYWORDS))
+
+# AcroForm probe results per document hash (routes between the AcroForm and text paths)
+ACROFORM_PROBES = AcroFormProbeCache()
+
+# Worker processes used to fill the PDFs of a ZIP
+# (None = one per CPU core, 1 = fill on the calling thread)
+FILL_WORKERS = None
+
+# Directory for one cProfile dump (<document>.prof) per filled PDF; None turns profiling off
+PROFILE_DIR: Optional[Path] = None
+
+# Field anchors per form template, replayed for later copies of a known form
+TEMPLATES = TemplateCache(config_files=(ROOT / 'config' / 'patterns.yaml', ROOT / 'config' / 'mapping.yaml'))
+
+# Overlay text placement: font, and where the search for free space starts right of the anchor x
+PLACEMENT_FONT = 'helv'
+PHONE_START_OFFSET = 5
+FIELD_START_OFFSET = 50
+
 # Confidence thresholds
 MIN_CONFIDENCE = 80  # Minimum fuzzy match confidence
 MIN_FIELD_CONFIDENCE = 70  # Minimum confidence for field detection
 MIN_BLANK_SPACE_CONFIDENCE = 60  # Minimum confidence for blank space detection
 
-def process_zip(zip_bytes: bytes, values: Dict[str, str]) -> bytes:
+def process_zip(zip_bytes: bytes, values: Dict[str, str], workers: Optional[int] = None) -> bytes:
+    mem = io.BytesIO()
+    write_filled_zip(zip_bytes, values, mem, workers=workers)
+    return mem.getvalue()
+
+def write_filled_zip(zip_source, values: Dict[str, str], out, cache=None, progress=None,
+                     limits: Optional[ZipLimits] = None, workers: Optional[int] = None,
+                     timings: Optional[FillTimings] = None) -> None:
+    """
+    Fill every PDF in the ZIP (bytes, a path or a seekable file such as a spooled upload)
+    and write the result archive to the binary file object `out`.
+    PDFs are filled in memory, in the shared worker pool when workers > 1 (None: FILL_WORKERS,
+    and one per CPU core when that is None too). Output entries are written in member order
+    as soon as each PDF and every one before it is done; at most 2 * workers members are held
+    in memory while waiting.
+    With a ResultCache, PDFs already filled with the same values are served from the cache
+    in this process and never sent to a worker.
+    progress, if given, is called with each PDF member name once it is done (or skipped).
+    Members are read through limits (default: a fresh ZipLimits).
+    The stage timings of every PDF are added to timings (a fresh FillTimings by default)
+    and their totals are logged at the end.
+    """
     logger.info(f"Processing ZIP with values: {list(values.keys())}")
-    with tempfile.TemporaryDirectory() as tmp:
-        tmp_path = Path(tmp)
-        in_dir = tmp_path / 'in'
-        out_dir = tmp_path / 'out'
-        in_dir.mkdir(); out_dir.mkdir()
-
-        zpath = in_dir / 'input.zip'
-        with open(zpath, 'wb') as fz:
-            fz.write(zip_bytes)
-
-        pdfs = []
-        with zipfile.ZipFile(zpath, 'r') as zf:
-            for name in zf.namelist():
-                if name.lower().endswith('.pdf'):
-                    target = in_dir / Path(name).name
-                    with zf.open(name) as src, open(target, 'wb') as dst:
-                        dst.write(src.read())
-                    pdfs.append(target)
-
-        for pdf in pdfs:
-            logger.info(f"Processing PDF: {pdf.name}")
-            out_pdf = out_dir / f"filled_{pdf.name}"
-            ok = fill_pdf(pdf, out_pdf, values)
-            if not ok:
-                logger.warning(f"No fields filled in {pdf.name}, copying original")
-                import shutil
-                shutil.copy2(pdf, out_dir / f"original_{pdf.name}")
-
-        mem = io.BytesIO()
-        with zipfile.ZipFile(mem, 'w', zipfile.ZIP_DEFLATED) as zfo:
-            for p in out_dir.iterdir():
-                zfo.write(p, arcname=p.name)
-        mem.seek(0)
-        return mem.read()
+    if timings is None:
+        timings = FillTimings()
+    # mapping.yaml is reloaded on change, so results are keyed by the config as it is now
+    cache_params = {'values': values, 'config': TEMPLATES.config_digest()}
+    if limits is None:
+        limits = ZipLimits()
+    if workers is None:
+        workers = FILL_WORKERS
+    if workers is None:
+        workers = default_workers()
+    pool = get_pool(workers) if workers > 1 else None
+    window = workers * 2
+    pending = deque()
+
+    def finish(name, pdf_name, pdf_bytes, result, key, fresh):
+        # result is (filled, stage timings, seconds) from _fill_member, or the cached PDF
+        if fresh:
+            filled, stage_timings, seconds = result
+            timings.add(pdf_name, stage_timings, seconds)
+            if key:
+                cache.put(key, filled)
+        else:
+            filled = result
+            timings.add(pdf_name, {}, 0.0, cached=True)
+        if filled:
+            zfo.writestr(f"filled_{pdf_name}", filled)
+        else:
+            logger.warning(f"No fields filled in {pdf_name}, copying original")
+            zfo.writestr(f"original_{pdf_name}", pdf_bytes)
+        if progress:
+            progress(name)
+
+    def flush(limit):
+        # Write finished members in order until at most `limit` remain queued
+        while len(pending) > limit:
+            name, pdf_name, pdf_bytes, item, key = pending.popleft()
+            if isinstance(item, Future):
+                finish(name, pdf_name, pdf_bytes, item.result(), key, True)
+            else:
+                finish(name, pdf_name, pdf_bytes, item, key, False)
+
+    seen = set()
+    with open_zip(zip_source) as zf, zipfile.ZipFile(out, 'w', zipfile.ZIP_DEFLATED) as zfo:
+        limits.check_declared(zf)
+        try:
+            for info in zf.infolist():
+                name = info.filename
+                if not name.lower().endswith('.pdf'):
+                    continue
+                pdf_name = Path(name).name
+                if pdf_name in seen:
+                    if progress:
+                        progress(name, 'skipped')
+                    continue
+                seen.add(pdf_name)
+                pdf_bytes = limits.read(zf, info)
+
+                key = filled = None
+                if cache is not None:
+                    key = cache.make_key('fill', pdf_bytes, cache_params)
+                    filled = cache.get(key)
+                    if filled is not None:
+                        logger.info(f"Cache hit for {pdf_name}")
+                if filled is not None:
+                    pending.append((name, pdf_name, pdf_bytes, filled, key))
+                elif pool is not None:
+                    job = pool.submit(_fill_member, pdf_name, pdf_bytes, values)
+                    pending.append((name, pdf_name, pdf_bytes, job, key))
+                else:
+                    finish(name, pdf_name, pdf_bytes, _fill_member(pdf_name, pdf_bytes, values), key, True)
+                flush(window)
+            flush(0)
+            logger.info(f"Filled {timings.summary()}")
+        except BrokenProcessPool:
+            # A worker died (e.g. MuPDF crashed on a malformed file); don't reuse the pool
+            reset_pool(pool)
+            raise
+        finally:
+            for *_, item, _ in pending:
+                if isinstance(item, Future):
+                    item.cancel()
+
+def fill_pdf_bytes(pdf_name: str, pdf_bytes: bytes, values: Dict[str, str]) -> bytes:
+    """
+    Fill in-memory PDF bytes without touching the disk.
+    Returns the filled PDF, or b'' when no fields were filled.
+    """
+    return _fill_member(pdf_name, pdf_bytes, values)[0]
+
+def _fill_member(pdf_name: str, pdf_bytes: bytes, values: Dict[str, str]) -> Tuple[bytes, Dict[str, float], float]:
+    """fill_pdf_bytes plus the document's stage timings and total seconds (also run in pool workers)."""
+    logger.info(f"Processing PDF: {pdf_name}")
+    start = time.perf_counter()
+    out = io.BytesIO()
+    with profiled(PROFILE_DIR, pdf_name), DocumentContext(pdf_bytes, pdf_name, TEXT_LAYERS) as ctx:
+        ok = fill_document(ctx, out, values)
+    seconds = time.perf_counter() - start
+    logger.info(f"Filled {pdf_name} in {seconds:.3f}s ({format_timings(ctx.timer.timings)})")
+    return (out.getvalue() if ok else b''), ctx.timer.timings, seconds
 
 def fill_pdf(src_path: Path, dst_path: Path, values: Dict[str, str]) -> bool:
     logger.info(f"Filling PDF: {src_path.name}")
-    
+    start = time.perf_counter()
+    with profiled(PROFILE_DIR, src_path.name), DocumentContext.from_path(src_path, TEXT_LAYERS) as ctx:
+        ok = fill_document(ctx, dst_path, values)
+    logger.info(f"Filled {src_path.name} in {time.perf_counter() - start:.3f}s ({format_timings(ctx.timer.timings)})")
+    return ok
+
+def fill_document(ctx: DocumentContext, out: Union[Path, BinaryIO], values: Dict[str, str]) -> bool:
+    """
+    Fill an open document and write the result to out (a path or a binary file object).
+    Returns False, writing nothing, when no fields were filled.
+    """
     # Validate input values
     validated_values = validate_input_values(values)
     
+    # Every stage below shares the context's parsed documents and page words, and times itself on ctx.timer
+    timer = ctx.timer
     # Try AcroForm first
-    if detect_acroform_fields(src_path):
-        logger.info("AcroForm fields detected, attempting to fill")
-        aliases = {f['key']: f.get('acroform_names', []) for f in MAPPING['fields']}
-        ok = fill_acroform(src_path, dst_path, validated_values, aliases)
+    with timer.stage('acroform'):
+        acroform = detect_acroform_fields(ctx)
+    if acroform:
+        logger.info(f"AcroForm with {acroform.field_count} fields detected ({acroform.filled_count} with values), "
+                    f"attempting to fill")
+        ok = fill_acroform_widgets(ctx, out, validated_values, MAPPING_FILE.index)
         if ok:
             logger.info("Successfully filled AcroForm fields")
             return True
     
     # Fall back to text-based field detection
     logger.info("No AcroForm fields found, using text-based detection")
-    anchors = search_labels_positions_enhanced(src_path, validated_values)
-    ok2 = overlay_values_enhanced(src_path, dst_path, anchors, validated_values, MAPPING)
+    with timer.stage('label_search'):
+        anchors = find_field_anchors(ctx, validated_values)
+    ok2 = overlay_values_enhanced(ctx, out, anchors, validated_values, MAPPING_FILE.mapping)
     return ok2
 
 def validate_input_values(values: Dict[str, str]) -> Dict[str, str]:
@@ -158,52 +304,81 @@ def validate_input_values(values: Dict[str, str]) -> Dict[str, str]:
     
     return validated
 
-def detect_acroform_fields(pdf_path: Path):
-    try:
-        reader = PdfReader(str(pdf_path))
-        return reader.get_fields() or {}
-    except Exception as e:
-        logger.debug(f'AcroForm detection error: {e}')
-        return {}
-
-def fill_acroform(pdf_path: Path, out_path: Path, values: Dict[str,str], field_aliases: Dict[str, List[str]]) -> bool:
-    reader = PdfReader(str(pdf_path))
-    writer = PdfWriter()
-    for page in reader.pages:
-        writer.add_page(page)
+def detect_acroform_fields(pdf: Union[Path, DocumentContext]) -> AcroFormInfo:
+    """
+    Field count of the document's AcroForm and how many fields have values (falsy without fields).
+    Reads only the catalog and the field dictionaries; answers are cached per document hash.
+    """
+    with open_document(pdf) as ctx:
+        return ACROFORM_PROBES.probe(ctx.doc, ctx.digest)
+
+def fill_acroform_widgets(pdf: Union[Path, DocumentContext], out_path: Union[Path, BinaryIO], values: Dict[str,str],
+                          field_aliases: Union[FieldNameIndex, Dict[str, List[str]]]) -> bool:
+    """
+    Fill AcroForm text fields on every page in one pass over the MuPDF widgets.
+    field_aliases is a compiled FieldNameIndex or a {logical key: [field names]} dict.
+    The values are set in the context's document, so nothing else may be drawn into it after a fill.
+    """
+    if not isinstance(field_aliases, FieldNameIndex):
+        field_aliases = FieldNameIndex(field_aliases)
+    with open_document(pdf) as ctx:
+        with ctx.timer.stage('overlay'):
+            filled = fill_widgets(ctx.doc, values, field_aliases, is_acroform_field_already_filled)
+        if not filled:
+            logger.warning("No AcroForm fields matched or all fields already filled")
+            return False
+        with ctx.timer.stage('save'):
+            if hasattr(out_path, 'write'):
+                out_path.write(document_bytes(ctx.doc))
+            else:
+                ctx.doc.save(str(out_path))
+        return True
+
+def fill_acroform(pdf: Union[Path, DocumentContext], out_path: Union[Path, BinaryIO], values: Dict[str,str],
+                  field_aliases: Union[FieldNameIndex, Dict[str, List[str]]]) -> bool:
+    """
+    Fill AcroForm fields with pypdf (the previous engine; fill_pdf uses fill_acroform_widgets).
+    field_aliases is a compiled FieldNameIndex or a {logical key: [field names]} dict.
+    """
+    if not isinstance(field_aliases, FieldNameIndex):
+        field_aliases = FieldNameIndex(field_aliases)
+    with open_document(pdf) as ctx:
+        return _fill_acroform(ctx.reader, out_path, values, field_aliases)
+
+def _fill_acroform(reader: PdfReader, out_path: Union[Path, BinaryIO], values: Dict[str,str],
+                   index: FieldNameIndex) -> bool:
+    # Cloning keeps the /AcroForm dictionary, which add_page() leaves behind
+    writer = PdfWriter(clone_from=reader)
     fields = writer.get_fields() or {}
     update_map = {}
     
     logger.info(f"Available AcroForm fields: {list(fields.keys())}")
     
-    for logical_key, aliases in field_aliases.items():
-        val = values.get(logical_key)
+    # One index lookup per form field
+    for name, field in fields.items():
+        logical_key = index.resolve(name)
+        val = values.get(logical_key) if logical_key else None
         if not val:
             continue
-        for name in (fields.keys() if fields else []):
-            if name in aliases:
-                # Check if the field already has a value
-                current_value = fields[name].get('/V', '') if fields[name] else ''
-                if current_value:
-                    # Check if the current value appears to be valid data
-                    if is_acroform_field_already_filled(logical_key, current_value):
-                        logger.info(f"AcroForm field '{name}' already contains valid data: '{current_value}', skipping")
-                        continue
-                
-                update_map[name] = val
-                logger.info(f"AcroForm: Filling '{name}' with '{logical_key}' value")
+        # Check if the field already has a value
+        current_value = field.get('/V', '') if field else ''
+        if current_value:
+            # Check if the current value appears to be valid data
+            if is_acroform_field_already_filled(logical_key, current_value):
+                logger.info(f"AcroForm field '{name}' already contains valid data: '{current_value}', skipping")
+                continue
+        
+        update_map[name] = val
+        logger.info(f"AcroForm: Filling '{name}' with '{logical_key}' value")
     
     if not update_map:
         logger.warning("No AcroForm fields matched or all fields already filled")
         return False
     
-    writer.update_page_form_field_values(writer.pages[0], update_map)
-    for j in range(len(writer.pages)):
-        page = writer.pages[j]
+    for page in writer.pages:
         if '/Annots' in page:
-            del page['/Annots']
-    with open(out_path, 'wb') as fw:
-        writer.write(fw)
+            writer.update_page_form_field_values(page, update_map)
+    writer.write(out_path)
     return True
 
 def classify_field_type(label_text: str) -> Tuple[str, float]:
@@ -211,93 +386,47 @@ def classify_field_type(label_text: str) -> Tuple[str, float]:
     Classify a label text to determine its field type using fuzzy matching.
     Returns (field_type, confidence_score)
     """
-    label_lower = label_text.lower().strip()
-    
-    # Remove common punctuation and normalize
-    label_clean = label_lower.replace(':', '').replace('.', '').strip()
-    
-    best_match = None
-    best_score = 0
-    
-    # Priority scoring for more specific matches
-    for field_type, keywords in FIELD_MAP.items():
-        for keyword in keywords:
-            # Try exact match first
-            if label_clean == keyword:
-                return field_type, 100.0
-            
-                        # Check for substring matches (more specific)
-            if keyword in label_clean or label_clean in keyword:
-                # Special case: if both "email" and "address" appear, prioritize email
-                if "email" in label_clean and "address" in label_clean:
-                    logger.info(f"Field classification: '{label_text}' contains both 'email' and 'address', prioritizing email")
-                    return "email", 95.0
-                
-                # Give higher priority to more specific matches
-                if field_type == "email" and "email" in label_clean:
-                    return field_type, 95.0
-                elif field_type == "address" and "address" in label_clean and "email" not in label_clean:
-                    return field_type, 90.0
-                elif field_type == "phone" and any(phone_word in label_clean for phone_word in ["phone", "telephone", "mobile", "cell"]):
-                    return field_type, 90.0
-                elif field_type == "ssn" and any(ssn_word in label_clean for ssn_word in ["ssn", "social security"]):
-                    return field_type, 90.0
-                elif field_type == "ein" and any(ein_word in label_clean for ein_word in ["ein", "employer identification", "tax id"]):
-                    return field_type, 90.0
-                elif field_type == "dob" and any(dob_word in label_clean for dob_word in ["dob", "date of birth", "birth"]):
-                    return field_type, 90.0
-                elif field_type == "name" and "name" in label_clean:
-                    return field_type, 85.0
-            
-            # Try fuzzy matching as fallback
-            score = fuzz.ratio(label_clean, keyword)
-            if score > best_score:
-                best_score = score
-                best_match = field_type
-    
-    return best_match, best_score
+    return FIELD_CLASSIFIER.classify(label_text)
+
+@lru_cache(maxsize=CLASSIFIER_MEMO_SIZE)
+def label_text_confidence(text: str) -> int:
+    """Part of is_likely_field_label's score that depends only on the word's text."""
+    text_lower = text.lower().strip()
+    confidence = 0
+    # Check if text ends with common field indicators
+    if text_lower.endswith(FIELD_INDICATORS):
+        confidence += 30
+    # Check if text contains field-related keywords
+    if FIELD_KEYWORDS_RE.search(text_lower):
+        confidence += 40  # Higher weight for field keywords
+    # Check if text is relatively short (typical for labels)
+    if len(text.strip()) < 50:  # Increased limit for compound labels
+        confidence += 20
+    return confidence
 
 def is_likely_field_label(word_info: Tuple, page_width: float, page_height: float) -> bool:
     """
     Determine if a word is likely a field label based on position and context.
     """
     x0, y0, x1, y1, text, *_ = word_info
-    
-    # Check if text ends with common field indicators
-    text_lower = text.lower().strip()
-    field_indicators = [':', '.', '?']
-    has_field_indicator = any(text_lower.endswith(indicator) for indicator in field_indicators)
-    
-    # Check if text contains field-related keywords
-    field_keywords = ['name', 'email', 'address', 'phone', 'telephone', 'dob', 'birth', 'ssn', 'ein', 'fein', 'daytime']
-    has_field_keywords = any(keyword in text_lower for keyword in field_keywords)
+    confidence = label_text_confidence(text)
     
     # Check position - field labels are often in top-left areas, but can be anywhere
-    is_top_left = y0 < page_height * 0.3  # Top 30% of page
-    
-    # Check if text is relatively short (typical for labels)
-    is_short_text = len(text.strip()) < 50  # Increased limit for compound labels
+    if y0 < page_height * 0.3:  # Top 30% of page
+        confidence += 15
     
     # Check if text is isolated (not part of a paragraph)
-    word_width = x1 - x0
-    word_height = y1 - y0
-    is_isolated = word_width < page_width * 0.3  # Increased limit for longer labels
-    
-    # Calculate confidence score
-    confidence = 0
-    if has_field_indicator:
-        confidence += 30
-    if has_field_keywords:
-        confidence += 40  # Higher weight for field keywords
-    if is_top_left:
-        confidence += 15
-    if is_short_text:
-        confidence += 20
-    if is_isolated:
+    if x1 - x0 < page_width * 0.3:  # Increased limit for longer labels
         confidence += 20
     
     return confidence >= MIN_FIELD_CONFIDENCE
 
+def clip_text(page, rect: fitz.Rect) -> str:
+    """Text inside rect, from the page's spatial index when given one instead of a fitz page."""
+    if isinstance(page, PageIndex):
+        return page.text_in(rect)
+    return page.get_text("text", clip=rect)
+
 def detect_blank_space_after_label(page, label_bbox: List[float], page_width: float, field_type: str = None) -> Tuple[bool, List[float]]:
     """
     Detect if there's blank space after a label where we can place text.
@@ -332,7 +461,7 @@ def detect_blank_space_after_label(page, label_bbox: List[float], page_width: fl
         
         # Get text in the search area
         search_rect = fitz.Rect(search_x0, search_y0, search_x1, search_y1)
-        text_in_area = page.get_text("text", clip=search_rect).strip()
+        text_in_area = clip_text(page, search_rect).strip()
         
         # For phone fields, be more lenient with what we consider "blank"
         if field_type == "phone":
@@ -366,10 +495,10 @@ def detect_blank_space_after_label(page, label_bbox: List[float], page_width: fl
             placement_height = field_height + 4  # Add some padding
             
             placement_bbox = [placement_x, placement_y, placement_x + placement_width, placement_y + placement_height]
-            logger.debug(f"Blank space detected after label at {label_bbox}, placement at {placement_bbox}")
+            logger.debug("Blank space detected after label at {}, placement at {}", label_bbox, placement_bbox)
             return True, placement_bbox
     
-    logger.debug(f"No blank space detected after label at {label_bbox} in any position")
+    logger.debug("No blank space detected after label at {} in any position", label_bbox)
     return False, []
 
 def is_field_already_filled(page, field_type: str, placement_bbox: List[float]) -> bool:
@@ -382,7 +511,7 @@ def is_field_already_filled(page, field_type: str, placement_bbox: List[float])
     
     # Get text in the field area
     search_rect = fitz.Rect(placement_bbox[0], placement_bbox[1], placement_bbox[2], placement_bbox[3])
-    text_in_area = page.get_text("text", clip=search_rect).strip()
+    text_in_area = clip_text(page, search_rect).strip()
     
     if not text_in_area:
         return False
@@ -401,7 +530,7 @@ def is_field_already_filled(page, field_type: str, placement_bbox: List[float])
             
             for pattern in placeholder_patterns:
                 if re.match(pattern, text_in_area):
-                    logger.debug(f"Phone field contains placeholder text: '{text_in_area.strip()}' - not filled")
+                    logger.debug("Phone field contains placeholder text: '{}' - not filled", text_in_area.strip())
                     return False  # This is placeholder text, not a real phone number
         
         # Check for specific phone number patterns
@@ -490,7 +619,7 @@ def check_phone_after_label(page, label_bbox: List[float], page_width: float) ->
     
     # Get text in the search area
     search_rect = fitz.Rect(search_x0, search_y0, search_x1, search_y1)
-    text_in_area = page.get_text("text", clip=search_rect).strip()
+    text_in_area = clip_text(page, search_rect).strip()
     
     if not text_in_area:
         return False
@@ -507,7 +636,8 @@ def check_phone_after_label(page, label_bbox: List[float], page_width: float) ->
         
         for pattern in placeholder_patterns:
             if re.match(pattern, text_in_area):
-                logger.debug(f"Placeholder text detected after phone label: '{text_in_area.strip()}' - not a real phone number")
+                logger.debug("Placeholder text detected after phone label: '{}' - not a real phone number",
+                             text_in_area.strip())
                 return False  # This is placeholder text, not a real phone number
     
     # Check for specific phone number patterns
@@ -525,71 +655,139 @@ def check_phone_after_label(page, label_bbox: List[float], page_width: float) ->
     
     return False
 
-def search_labels_positions_enhanced(pdf_path: Path, values: Dict[str, str]) -> Dict[str, List]:
+def search_labels_positions_enhanced(pdf: Union[Path, DocumentContext], values: Dict[str, str]) -> Dict[str, List]:
     """
     Enhanced label search with field type classification, confidence scoring, and blank space detection.
+    pdf is a path or the DocumentContext of a fill in progress.
     """
-    doc = fitz.open(str(pdf_path))
-    hits = {k: [] for k in FIELD_MAP.keys()}
+    with open_document(pdf, TEXT_LAYERS) as ctx:
+        return _search_labels_positions(ctx, values)
+
+def layout_fingerprint(ctx: DocumentContext) -> str:
+    """Template fingerprint of a document: page sizes plus the position and text of its likely field labels."""
+    pages = []
+    for p in range(len(ctx)):
+        layout = ctx.layout[p]
+        labels = [w for w in ctx.words(p) if is_likely_field_label(w, layout.width, layout.height)]
+        pages.append((layout.width, layout.height, labels))
+    return template_fingerprint(pages)
+
+def find_field_anchors(pdf: Union[Path, DocumentContext], values: Dict[str, str]) -> Dict[str, List]:
+    """
+    Anchors for values. The classified labels of a known template are replayed from TEMPLATES,
+    otherwise they are searched for and stored for the next copy of the form. The blank-space,
+    phone and already-filled checks always run against this copy, since they depend on what
+    is written on it.
+    """
+    with open_document(pdf, TEXT_LAYERS) as ctx:
+        fields = [field_type for field_type, value in values.items() if value]
+        fingerprint = layout_fingerprint(ctx)
+        labels = TEMPLATES.get(fingerprint, fields)
+        if labels is not None:
+            logger.info(f"Known template {fingerprint[:12]}, skipping label classification")
+        else:
+            labels = _classify_labels(ctx, values)
+            TEMPLATES.put(fingerprint, fields, labels)
+        return _probe_labels(ctx, labels)
+
+def _search_labels_positions(ctx: DocumentContext, values: Dict[str, str]) -> Dict[str, List]:
+    return _probe_labels(ctx, _classify_labels(ctx, values))
+
+def _classify_labels(ctx: DocumentContext, values: Dict[str, str]) -> List[Dict]:
+    """
+    The document's field labels for which values has a value, in page order, as dicts with
+    page, label_bbox, text, field_type and confidence. Depends only on the form's layout.
+    """
+    doc = ctx.doc
+    timer = ctx.timer
+    labels = []
     
-    logger.info(f"Searching for field labels in {pdf_path.name}")
+    logger.info(f"Searching for field labels in {ctx.name}")
     
+    # Hot-path log calls below pass their values as arguments, so loguru only formats the
+    # message when a handler takes that level
     for p in range(len(doc)):
-        page = doc[p]
-        page_width = page.rect.width
-        page_height = page.rect.height
-        words = page.get_text('words')
+        page_width = ctx.layout[p].width
+        page_height = ctx.layout[p].height
+        words = ctx.words(p)
         
-        logger.info(f"Page {p+1}: Analyzing {len(words)} text elements")
+        logger.info("Page {}: Analyzing {} text elements", p + 1, len(words))
         
+        label_words = []
         for word_info in words:
             x0, y0, x1, y1, text, *_ = word_info
             
             # Log all potential field labels for debugging
-            if any(keyword in text.lower() for keyword in ['email', 'phone', 'address', 'name', 'dob', 'ssn', 'ein']):
-                logger.debug(f"Potential field label found: '{text}' at position ({x0:.1f}, {y0:.1f})")
+            if LABEL_HINT_RE.search(text):
+                logger.debug("Potential field label found: '{}' at position ({:.1f}, {:.1f})", text, x0, y0)
             
             # Skip if not likely a field label
-            if not is_likely_field_label(word_info, page_width, page_height):
-                continue
-            
-            # Classify the field type
-            field_type, confidence = classify_field_type(text)
+            if is_likely_field_label(word_info, page_width, page_height):
+                label_words.append(word_info)
+        
+        # Classify the page's labels in one batch (fuzzy scores come from a single cdist call)
+        with timer.stage('classify'):
+            classified = FIELD_CLASSIFIER.classify_many([word_info[4] for word_info in label_words])
+        
+        for word_info, (field_type, confidence) in zip(label_words, classified):
+            x0, y0, x1, y1, text, *_ = word_info
             
             if field_type and confidence >= MIN_CONFIDENCE:
                 # Check if we have a value for this field type
                 if field_type in values and values[field_type]:
-                    # For phone fields, first check if there's already a phone number after the label
-                    if field_type == "phone":
-                        if check_phone_after_label(page, [x0, y0, x1, y1], page_width):
-                            logger.info(f"Phone number already exists after label '{text}', skipping overlay.")
-                            continue
-                    
-                    # Check for blank space after the label
-                    is_blank, placement_bbox = detect_blank_space_after_label(page, [x0, y0, x1, y1], page_width, field_type)
-                    
-                    if is_blank:
-                        # Check if the field is already filled
-                        if is_field_already_filled(page, field_type, placement_bbox):
-                            logger.debug(f"Field '{field_type}' already filled, skipping overlay.")
-                            continue
-
-                        hits[field_type].append({
-                            'page': p, 
-                            'label_bbox': [x0, y0, x1, y1],
-                            'placement_bbox': placement_bbox,
-                            'text': text,
-                            'confidence': confidence
-                        })
-                        logger.info(f"Found field label: '{text}' → {field_type} (confidence: {confidence:.1f}%) with blank space")
-                    else:
-                        logger.debug(f"Found field label '{text}' → {field_type} but no blank space available")
+                    labels.append({
+                        'page': p,
+                        'label_bbox': [x0, y0, x1, y1],
+                        'text': text,
+                        'field_type': field_type,
+                        'confidence': confidence
+                    })
                 else:
-                    logger.debug(f"Found field label '{text}' → {field_type} but no value provided")
+                    logger.debug("Found field label '{}' → {} but no value provided", text, field_type)
             else:
-                logger.debug(f"Low confidence match: '{text}' → {field_type} (confidence: {confidence:.1f}%)")
+                logger.debug("Low confidence match: '{}' → {} (confidence: {:.1f}%)", text, field_type, confidence)
     
-    doc.close()
+    return labels
+
+def _probe_labels(ctx: DocumentContext, labels: List[Dict]) -> Dict[str, List]:
+    """Anchors per field type for the labels followed by free, unfilled space on this copy."""
+    timer = ctx.timer
+    hits = {k: [] for k in FIELD_MAP.keys()}
+    
+    for label in labels:
+        p, field_type, text = label['page'], label['field_type'], label['text']
+        label_bbox = list(label['label_bbox'])
+        page_width = ctx.layout[p].width
+        # Probes after the label are answered from the page's spatial index (built on first use)
+        page = ctx.page_index(p)
+        
+        with timer.stage('blank_probe'):
+            # For phone fields, first check if there's already a phone number after the label
+            if field_type == "phone":
+                if check_phone_after_label(page, label_bbox, page_width):
+                    logger.info("Phone number already exists after label '{}', skipping overlay.", text)
+                    continue
+            
+            # Check for blank space after the label
+            is_blank, placement_bbox = detect_blank_space_after_label(page, label_bbox, page_width, field_type)
+            
+            # Check if the field is already filled
+            if is_blank and is_field_already_filled(page, field_type, placement_bbox):
+                logger.debug("Field '{}' already filled, skipping overlay.", field_type)
+                continue
+        
+        if is_blank:
+            hits[field_type].append({
+                'page': p, 
+                'label_bbox': label_bbox,
+                'placement_bbox': placement_bbox,
+                'text': text,
+                'confidence': label['confidence']
+            })
+            logger.info("Found field label: '{}' → {} (confidence: {:.1f}%) with blank space",
+                        text, field_type, label['confidence'])
+        else:
+            logger.debug("Found field label '{}' → {} but no blank space available", text, field_type)
     
     # Log summary
     for field_type, matches in hits.items():
@@ -598,11 +796,35 @@ def search_labels_positions_enhanced(pdf_path: Path, values: Dict[str, str]) ->
     
     return hits
 
-def overlay_values_enhanced(pdf_path: Path, out_path: Path, anchors: Dict, values: Dict[str, str], mapping: Dict) -> bool:
+def overlay_values_enhanced(pdf: Union[Path, DocumentContext], out_path: Union[Path, BinaryIO], anchors: Dict,
+                            values: Dict[str, str], mapping: Dict) -> bool:
     """
     Enhanced value overlay with better positioning, validation, and formatting.
+    Values are drawn into the context's MuPDF document, so it is the last stage of a fill.
     """
-    doc = fitz.open(str(pdf_path))
+    with open_document(pdf) as ctx:
+        return _overlay_values(ctx, out_path, anchors, values, mapping)
+
+def _overlay_values(ctx: DocumentContext, out_path: Union[Path, BinaryIO], anchors: Dict, values: Dict[str, str],
+                    mapping: Dict) -> bool:
+    with ctx.timer.stage('overlay'):
+        wrote = _draw_values(ctx, anchors, values, mapping)
+    
+    if wrote:
+        with ctx.timer.stage('save'):
+            if hasattr(out_path, 'write'):
+                out_path.write(document_bytes(ctx.doc))
+            else:
+                ctx.doc.save(str(out_path))
+        logger.info(f"PDF saved with {len([k for k, v in anchors.items() if v])} filled fields")
+    else:
+        logger.warning("No fields were filled")
+    
+    return wrote
+
+def _draw_values(ctx: DocumentContext, anchors: Dict, values: Dict[str, str], mapping: Dict) -> bool:
+    """Insert each value at its best anchor; True when at least one was written."""
+    doc = ctx.doc
     wrote = False
     
     logger.info(f"Overlaying values for {len(anchors)} field types")
@@ -613,17 +835,18 @@ def overlay_values_enhanced(pdf_path: Path, out_path: Path, anchors: Dict, value
             
         val = values.get(field_type)
         if not val:
-            logger.debug(f"No value provided for field type: {field_type}")
+            logger.debug("No value provided for field type: {}", field_type)
             continue
         
         # Use the highest confidence match
         best_match = max(matches, key=lambda x: x.get('confidence', 0))
         
         page = doc[best_match['page']]
+        index = ctx.page_index(best_match['page'])
         placement_bbox = best_match['placement_bbox']
         
         # Check if the field is already filled before attempting to fill it
-        if is_field_already_filled(page, field_type, placement_bbox):
+        if is_field_already_filled(index, field_type, placement_bbox):
             logger.info(f"Field '{field_type}' already contains valid data, skipping overlay")
             continue
         
@@ -656,21 +879,15 @@ def overlay_values_enhanced(pdf_path: Path, out_path: Path, anchors: Dict, value
         formatted_val = format_field_value(field_type, val)
         
         # Find a safe position that doesn't overlap with existing content
-        safe_x, safe_y = find_safe_text_position(page, x, y, formatted_val, size, field_type=field_type)
+        safe_x, safe_y = find_safe_text_position(index, x, y, formatted_val, size, field_type=field_type)
         
         # Insert text with proper formatting at the safe position
-        page.insert_text((safe_x, safe_y), formatted_val, fontname='helv', fontsize=size)
+        page.insert_text((safe_x, safe_y), formatted_val, fontname=PLACEMENT_FONT, fontsize=size)
+        ctx.page_changed(best_match['page'])
         wrote = True
         
         logger.info(f"Successfully inserted '{formatted_val}' for field '{field_type}' at safe position ({safe_x}, {safe_y})")
     
-    if wrote:
-        doc.save(str(out_path))
-        logger.info(f"PDF saved with {len([k for k, v in anchors.items() if v])} filled fields")
-    else:
-        logger.warning("No fields were filled")
-    
-    doc.close()
     return wrote
 
 def format_field_value(field_type: str, value: str) -> str:
@@ -706,26 +923,29 @@ def format_field_value(field_type: str, value: str) -> str:
     
     return value
 
+def text_width(text: str, fontsize: float = 10) -> float:
+    """Width of text in the Helvetica the overlay writes with."""
+    return fitz.get_text_length(text, fontname=PLACEMENT_FONT, fontsize=fontsize)
+
 def verify_text_placement(page, x: float, y: float, text: str, fontsize: float = 10) -> bool:
     """
     Verify that placing text at the given position won't overlap with existing content.
     Returns True if placement is safe, False if overlap detected.
     """
-    # Estimate text width (rough calculation)
-    char_width = fontsize * 0.6  # Approximate character width
-    text_width = len(text) * char_width
+    text_width_pt = text_width(text, fontsize)
     text_height = fontsize
     
     # Define the area where text would be placed
-    text_bbox = [x, y - text_height, x + text_width, y + 2]
+    text_bbox = [x, y - text_height, x + text_width_pt, y + 2]
     
     # Check for existing text in this area
     search_rect = fitz.Rect(text_bbox[0], text_bbox[1], text_bbox[2], text_bbox[3])
-    existing_text = page.get_text("text", clip=search_rect).strip()
+    existing_text = clip_text(page, search_rect).strip()
     
     # If there's existing text, placement is not safe
     if existing_text:
-        logger.debug(f"Text placement blocked - existing text found: '{existing_text[:20]}...' at position ({x}, {y})")
+        logger.debug("Text placement blocked - existing text found: '{}...' at position ({}, {})",
+                     existing_text[:20], x, y)
         return False
     
     return True
@@ -734,35 +954,31 @@ def find_safe_text_position(page, base_x: float, base_y: float, text: str, fonts
     """
     Find a safe position to place text without overlapping existing content.
     Returns (x, y) coordinates for safe placement.
+    
+    The free horizontal intervals on the text's band (one font size above the baseline
+    to just below it) are computed from the page's text in one pass, and the text goes
+    into the leftmost gap at or after the preferred start that fits its real width.
+    max_attempts is kept for compatibility; the cost no longer depends on it.
     """
-    char_width = fontsize * 0.6
-    text_width = len(text) * char_width
+    index = page if isinstance(page, PageIndex) else PageIndex.from_page(page)
+    width = text_width(text, fontsize)
     
-    # For phone numbers, try positions closer to the base position
-    if field_type == "phone":
-        # Try positions very close to the label first
-        for attempt in range(max_attempts):
-            offset_x = 5 + (attempt * 5)  # Start at 5, increment by 5 each attempt - very close
-            test_x = base_x + offset_x
-            test_y = base_y
-            
-            if verify_text_placement(page, test_x, test_y, text, fontsize):
-                logger.debug(f"Safe phone position found at ({test_x}, {test_y}) after {attempt + 1} attempts")
-                return test_x, test_y
-    else:
-        # For other fields, use the original logic
-        for attempt in range(max_attempts):
-            offset_x = 50 + (attempt * 20)  # Start at 50, increment by 20 each attempt
-            test_x = base_x + offset_x
-            test_y = base_y
-            
-            if verify_text_placement(page, test_x, test_y, text, fontsize):
-                logger.debug(f"Safe text position found at ({test_x}, {test_y}) after {attempt + 1} attempts")
-                return test_x, test_y
+    # Phone numbers go very close to the label, other fields a little further out
+    start_x = base_x + (PHONE_START_OFFSET if field_type == "phone" else FIELD_START_OFFSET)
+    gaps = index.free_intervals(base_y - fontsize, base_y + 2, start_x, index.width)
+    
+    for gap_x0, gap_x1 in gaps:
+        if gap_x1 - gap_x0 >= width:
+            logger.debug("Safe text position found at ({}, {}) in a {:.1f}pt gap", gap_x0, base_y, gap_x1 - gap_x0)
+            return gap_x0, base_y
     
-    # If no safe position found, return a position far to the right
-    logger.warning(f"No safe position found for text '{text}', placing far to the right")
-    return base_x + 300, base_y
+    # Nothing fits before the page edge: use the widest gap so as little as possible overlaps
+    if gaps:
+        gap_x0, gap_x1 = max(gaps, key=lambda gap: gap[1] - gap[0])
+        logger.warning(f"No gap fits '{text}' ({width:.1f}pt), using the widest ({gap_x1 - gap_x0:.1f}pt)")
+        return gap_x0, base_y
+    logger.warning(f"No free space found for text '{text}', placing at the start position")
+    return start_x, base_y
 
 # Keep the original functions for backward compatibility
 def search_labels_positions(pdf_path: Path, label_patterns):
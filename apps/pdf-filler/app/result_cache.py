@@ -0,0 +1,119 @@
+"""
+Content-addressed on-disk cache for processed PDFs.
+
+Entries are keyed by a SHA-256 over the operation name, the input PDF bytes and the
+normalized operation parameters, so re-uploading the same packet with the same word
+list or claimant values returns the stored result without touching MuPDF. The cache
+is bounded by total size and evicts least recently used entries (by file mtime, which
+is bumped on every hit).
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from loguru import logger
+
+
+class ResultCache:
+    def __init__(self, root, max_bytes: int = 512 * 1024 * 1024):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._total = sum(p.stat().st_size for p in self._entries())
+
+    @staticmethod
+    def make_key(operation: str, pdf_bytes: bytes, params: Dict[str, Any]) -> str:
+        """Hash of the operation, the document bytes and the parameters (order-insensitive for dicts)."""
+        h = hashlib.sha256()
+        h.update(operation.encode('utf-8'))
+        h.update(b'\0')
+        h.update(hashlib.sha256(pdf_bytes).digest())
+        h.update(json.dumps(params, sort_keys=True, separators=(',', ':')).encode('utf-8'))
+        return h.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def _entries(self):
+        return (p for p in self.root.glob('*/*') if p.is_file() and not p.name.endswith('.tmp'))
+
+    def get(self, key: str, count: bool = True) -> Optional[bytes]:
+        """
+        Stored bytes for key, or None. With count=False the lookup is left out of the
+        hit/miss statistics (for side entries read alongside one that was counted).
+        """
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)  # mark as recently used
+        except FileNotFoundError:
+            if count:
+                with self._lock:
+                    self.misses += 1
+            return None
+        if count:
+            with self._lock:
+                self.hits += 1
+        return data
+
+    def put(self, key: str, data: bytes):
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        # Write to a temp file and rename so readers never see a partial entry
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        try:
+            old_size = path.stat().st_size
+        except FileNotFoundError:
+            old_size = 0
+        os.replace(tmp, path)
+        with self._lock:
+            self._total += len(data) - old_size
+            over_budget = self._total > self.max_bytes
+        if over_budget:
+            self._evict()
+
+    def _evict(self):
+        with self._lock:
+            entries = []
+            for p in self._entries():
+                try:
+                    st = p.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, p))
+            entries.sort()
+            total = sum(size for _, size, _ in entries)
+            for _, size, p in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    p.unlink()
+                except FileNotFoundError:
+                    pass
+                total -= size
+                self.evictions += 1
+            self._total = total
+        logger.debug(f"Result cache evicted down to {total} bytes")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'bytes': self._total,
+                'max_bytes': self.max_bytes,
+            }
@@ -0,0 +1,185 @@
+"""
+In-memory spatial index over a page's text.
+
+Blank-space detection, the already-filled checks and placement verification used to
+call ``page.get_text("text", clip=rect)`` for every probe, and each call re-walks the
+whole page. A PageIndex is built once per page from its text layout. Lines go into
+horizontal row buckets, so a rect query only looks at the lines in the rows it
+covers. Its result approximates what a clipped extraction would return: glyphs cut
+by the edges of the rect can come out differently, more often in fonts other than
+Helvetica.
+
+MuPDF decides clip membership by a glyph's ink box, which the layout does not keep.
+The index takes the ink box of the same character in Helvetica (the base font of
+nearly every form we fill), scaled by the span's font size and placed at the
+character's origin. This matters for form blanks: underscores sit below the
+baseline, so a probe at the text height does not count them as existing text.
+Characters Helvetica lacks get a generic box from FALLBACK_INK. As in MuPDF's
+output, characters that are not contiguous within a line come out as separate
+lines, and spaces at the ends of each piece are dropped.
+"""
+
+from functools import lru_cache
+from typing import Dict, List, Sequence, Tuple
+
+import fitz  # PyMuPDF
+
+from text_layer import PageLayout
+
+# Height of the row buckets in points (about one line of body text)
+ROW_HEIGHT = 16.0
+
+# Ink box (x0, descent, x1, ascent) in em units, y up, for characters without a Helvetica glyph
+FALLBACK_INK = (0.05, -0.21, 0.5, 0.72)
+
+# Spaces have no ink; they count where an x-height letter would be (ascent in em)
+SPACE_ASCENT = 0.5
+
+HELVETICA = fitz.Font('helv')
+
+Rect = Tuple[float, float, float, float]
+
+
+@lru_cache(maxsize=1024)
+def glyph_ink(c: str) -> Tuple[float, float, float, float]:
+    """Helvetica ink box of c as (x0, descent, x1, ascent) in em units."""
+    if c.isspace():
+        return 0.0, 0.0, 0.0, SPACE_ASCENT
+    if not HELVETICA.has_glyph(ord(c)):
+        return FALLBACK_INK
+    bbox = HELVETICA.glyph_bbox(ord(c))
+    return bbox.x0, bbox.y0, bbox.x1, bbox.y1
+
+
+def _ink_box(c: str, box: Rect, size: float, baseline: float) -> Rect:
+    x0, _, x1, _ = box
+    ink_x0, descent, ink_x1, ascent = glyph_ink(c)
+    if c.isspace():
+        return x0, baseline - ascent * size, x1, baseline
+    return x0 + ink_x0 * size, baseline - ascent * size, x0 + ink_x1 * size, baseline - descent * size
+
+
+class _RowBuckets:
+    """Items with a vertical extent, bucketed by ROW_HEIGHT rows for band queries."""
+
+    def __init__(self):
+        self.rows: Dict[int, List[int]] = {}
+
+    def add(self, item: int, y0: float, y1: float):
+        for row in range(int(y0 // ROW_HEIGHT), int(y1 // ROW_HEIGHT) + 1):
+            self.rows.setdefault(row, []).append(item)
+
+    def query(self, y0: float, y1: float) -> List[int]:
+        found = set()
+        for row in range(int(y0 // ROW_HEIGHT), int(y1 // ROW_HEIGHT) + 1):
+            found.update(self.rows.get(row, ()))
+        return sorted(found)
+
+
+class PageIndex:
+    def __init__(self, layout: PageLayout):
+        self.layout = layout
+        self.width = layout.width
+        self.height = layout.height
+        # Per text line: its span tuples and the union of their boxes
+        self._line_spans: List[List[tuple]] = []
+        self._line_boxes: List[List[float]] = []
+        current_key = None
+        for span in layout.spans:
+            block_no, line_no, start, end, size, font, flags, x0, y0, x1, y1, *_ = span
+            if start == end:
+                continue
+            if (block_no, line_no) != current_key:
+                self._line_spans.append([])
+                self._line_boxes.append([x0, y0, x1, y1])
+                current_key = (block_no, line_no)
+            self._line_spans[-1].append(span)
+            box = self._line_boxes[-1]
+            box[0], box[1], box[2], box[3] = min(box[0], x0), min(box[1], y0), max(box[2], x1), max(box[3], y1)
+        self._line_rows = _RowBuckets()
+        for idx, (x0, y0, x1, y1) in enumerate(self._line_boxes):
+            # Ink can reach a little past the span box (descenders, underscores)
+            self._line_rows.add(idx, y0 - ROW_HEIGHT / 4, y1 + ROW_HEIGHT / 4)
+        # Character ink boxes are only computed for lines a query actually touches
+        self._line_chars: Dict[int, List[Tuple[str, float, float, float, float]]] = {}
+
+        self.words = layout.words()
+        self._word_rows = _RowBuckets()
+        for idx, word in enumerate(self.words):
+            self._word_rows.add(idx, word[1], word[3])
+
+    @classmethod
+    def from_page(cls, page) -> "PageIndex":
+        return cls(PageLayout.from_page(page))
+
+    def _chars(self, idx: int) -> List[Tuple[str, float, float, float, float]]:
+        """(char, ink x0, ink y0, ink x1, ink y1) for every character of text line idx."""
+        chars = self._line_chars.get(idx)
+        if chars is None:
+            layout = self.layout
+            chars = []
+            for _, _, start, end, size, *_, oy in self._line_spans[idx]:
+                for i in range(start, end):
+                    c = layout.chars[i]
+                    chars.append((c, *_ink_box(c, layout.char_bbox(i), size, oy)))
+            self._line_chars[idx] = chars
+        return chars
+
+    def text_in(self, rect: Sequence[float]) -> str:
+        """
+        Approximation of page.get_text("text", clip=rect): one line per contiguous piece of
+        text. Glyphs cut by the edges of rect may be kept or dropped differently.
+        """
+        rx0, ry0, rx1, ry1 = rect
+        pieces: List[str] = []
+        for idx in self._line_rows.query(ry0, ry1):
+            lx0, _, lx1, _ = self._line_boxes[idx]
+            if lx0 - 1 >= rx1 or lx1 + 1 <= rx0:
+                continue
+            piece: List[str] = []
+            for c, x0, y0, x1, y1 in self._chars(idx):
+                if x0 < rx1 and x1 > rx0 and y0 < ry1 and y1 > ry0:
+                    piece.append(c)
+                elif piece:
+                    pieces.append("".join(piece).strip(" "))
+                    piece = []
+            if piece:
+                pieces.append("".join(piece).strip(" "))
+        return "".join(p + "\n" for p in pieces if p)
+
+    def occupied_intervals(self, y0: float, y1: float) -> List[Tuple[float, float]]:
+        """Merged x-ranges covered by ink of non-space characters that reach into the band y0..y1."""
+        spans: List[Tuple[float, float]] = []
+        for idx in self._line_rows.query(y0, y1):
+            for c, cx0, cy0, cx1, cy1 in self._chars(idx):
+                if cy0 < y1 and cy1 > y0 and not c.isspace():
+                    spans.append((cx0, cx1))
+        spans.sort()
+        merged: List[Tuple[float, float]] = []
+        for cx0, cx1 in spans:
+            if merged and cx0 <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], cx1))
+            else:
+                merged.append((cx0, cx1))
+        return merged
+
+    def free_intervals(self, y0: float, y1: float, x0: float, x1: float) -> List[Tuple[float, float]]:
+        """Gaps between the text in the band y0..y1, limited to x0..x1, left to right."""
+        gaps: List[Tuple[float, float]] = []
+        cursor = x0
+        for ox0, ox1 in self.occupied_intervals(y0, y1):
+            if ox0 > cursor:
+                gaps.append((cursor, min(ox0, x1)))
+            cursor = max(cursor, ox1)
+            if cursor >= x1:
+                break
+        if cursor < x1:
+            gaps.append((cursor, x1))
+        return [(a, b) for a, b in gaps if b > a]
+
+    def words_in(self, rect: Sequence[float]) -> List[tuple]:
+        """get_text("words") entries whose boxes intersect rect, in reading order."""
+        rx0, ry0, rx1, ry1 = rect
+        return [self.words[idx] for idx in self._word_rows.query(ry0, ry1)
+                if self.words[idx][0] < rx1 and self.words[idx][2] > rx0
+                and self.words[idx][1] < ry1 and self.words[idx][3] > ry0]
@@ -0,0 +1,99 @@
+"""
+Template fingerprints and cached field labels.
+
+We fill thousands of copies of the same few dozen claim forms, and label search used
+to classify every word and probe the space after every label again for each copy. A
+template fingerprint hashes the page sizes plus the text and quantized position of
+every word that looks like a field label. Copies of one form share a fingerprint
+(values written into the blanks are not labels), while different forms or revisions
+do not. TemplateCache maps a fingerprint to the labels label search classified on
+it, so later copies skip classification. Only the layout is cached: whether the space
+after a label is blank or already filled depends on the copy, so those checks still
+run on every copy.
+
+An entry also depends on which fields have values (only those are probed) and on
+patterns.yaml and mapping.yaml. The config files' contents are part of every key, and
+they are re-hashed whenever their mtime or size changes, so editing either one
+invalidates the cached templates.
+"""
+
+import hashlib
+import json
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from result_cache import ResultCache
+
+# Bump when the fingerprint or the stored labels change so old entries are ignored
+FORMAT_VERSION = 2
+
+# Label positions are rounded to this many points, absorbing small rendering differences
+QUANTUM = 2.0
+
+DEFAULT_DIR = Path(tempfile.gettempdir()) / 'uprs_templates'
+
+
+def template_fingerprint(pages: Iterable[Tuple[float, float, Sequence[tuple]]]) -> str:
+    """
+    Hash of a document's layout from (page width, page height, label words) per page,
+    where label words are get_text("words") tuples.
+    """
+    h = hashlib.sha256()
+    for width, height, labels in pages:
+        h.update(f"page {round(width)} {round(height)}\n".encode('utf-8'))
+        for x0, y0, x1, y1, text, *_ in labels:
+            h.update(f"{round(x0 / QUANTUM)} {round(y0 / QUANTUM)} {round(x1 / QUANTUM)} "
+                     f"{round(y1 / QUANTUM)} {text}\n".encode('utf-8'))
+    return h.hexdigest()
+
+
+class TemplateCache:
+    """
+    Classified labels per template fingerprint, stored as JSON in a size-bounded ResultCache.
+    config_files are the files whose contents every entry depends on.
+    """
+
+    def __init__(self, root=DEFAULT_DIR, max_bytes: int = 64 * 1024 * 1024, config_files: Sequence = ()):
+        self.store = ResultCache(root, max_bytes)
+        self.config_files = [Path(p) for p in config_files]
+        self._lock = threading.Lock()
+        self._config_stamp = None
+        self._config_digest = ''
+
+    def config_digest(self) -> str:
+        """Hash of the config files, recomputed when one of them changes on disk."""
+        stamp = []
+        for path in self.config_files:
+            try:
+                st = path.stat()
+                stamp.append((st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                stamp.append(None)
+        with self._lock:
+            if stamp != self._config_stamp:
+                h = hashlib.sha256()
+                for path in self.config_files:
+                    h.update(path.read_bytes() if path.exists() else b'')
+                    h.update(b'\0')
+                self._config_digest = h.hexdigest()
+                self._config_stamp = stamp
+            return self._config_digest
+
+    def _key(self, fingerprint: str, fields: Iterable[str]) -> str:
+        params = {'version': FORMAT_VERSION, 'config': self.config_digest(), 'fields': sorted(fields)}
+        return self.store.make_key('template_labels', fingerprint.encode('utf-8'), params)
+
+    def get(self, fingerprint: str, fields: Iterable[str]) -> Optional[List[Dict]]:
+        """Cached labels of a template for this set of fields, or None."""
+        data = self.store.get(self._key(fingerprint, fields))
+        if data is None:
+            return None
+        return json.loads(data)
+
+    def put(self, fingerprint: str, fields: Iterable[str], labels: List[Dict]):
+        self.store.put(self._key(fingerprint, fields), json.dumps(labels).encode('utf-8'))
+
+    def stats(self) -> Dict:
+        return self.store.stats()
@@ -0,0 +1,208 @@
+"""
+Persistent per-document text layers.
+
+A document's text is extracted once with MuPDF (``rawdict``) into a compact layout:
+per page, the characters with their boxes and the spans (block/line, font, size,
+bbox) that group them. Words, ``get_text("dict")``-style blocks and search text are
+all derived from that layout, and the layout is stored as a zlib-compressed binary
+sidecar keyed by the SHA-256 of the PDF bytes. Re-running the same files with other
+keywords or values then skips MuPDF text extraction entirely.
+"""
+
+import marshal
+import tempfile
+import zlib
+from array import array
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import fitz  # PyMuPDF
+
+from result_cache import ResultCache
+
+# Bump when the serialized layout changes so old sidecars are ignored
+FORMAT_VERSION = 1
+
+# Same flags as get_text("words"): no images, ligatures kept (search expands them)
+EXTRACT_FLAGS = fitz.TEXTFLAGS_WORDS
+
+DEFAULT_DIR = Path(tempfile.gettempdir()) / 'uprs_text_layers'
+
+
+class PageLayout:
+    """
+    Text of one page. Characters are stored flat in `chars` with four float32
+    coordinates each in `boxes`; each span is the tuple
+    (block_no, line_no, start, end, size, font, flags, x0, y0, x1, y1, origin_x, origin_y)
+    covering chars[start:end].
+    """
+
+    def __init__(self, width: float, height: float, chars: str, boxes: array, spans: List[tuple]):
+        self.width = width
+        self.height = height
+        self.chars = chars
+        self.boxes = boxes
+        self.spans = spans
+        self.rect = fitz.Rect(0, 0, width, height)
+        self._words = None
+
+    @classmethod
+    def from_page(cls, page) -> "PageLayout":
+        chars: List[str] = []
+        boxes = array('f')
+        spans: List[tuple] = []
+        for block_no, block in enumerate(page.get_text("rawdict", flags=EXTRACT_FLAGS)["blocks"]):
+            for line_no, line in enumerate(block.get("lines", [])):
+                for span in line["spans"]:
+                    start = len(chars)
+                    for ch in span["chars"]:
+                        chars.append(ch["c"])
+                        boxes.extend(ch["bbox"])
+                    spans.append((block_no, line_no, start, len(chars), span["size"], span["font"],
+                                  span["flags"], *span["bbox"], *span["origin"]))
+        return cls(page.rect.width, page.rect.height, "".join(chars), boxes, spans)
+
+    def char_bbox(self, i: int) -> Tuple[float, float, float, float]:
+        b = self.boxes
+        return b[4 * i], b[4 * i + 1], b[4 * i + 2], b[4 * i + 3]
+
+    def lines(self):
+        """Yield (line_id, [(char, bbox), ...]) for every text line in reading order."""
+        current_key = None
+        line_chars = []
+        line_id = -1
+        for block_no, line_no, start, end, *_ in self.spans:
+            if (block_no, line_no) != current_key:
+                if current_key is not None:
+                    yield line_id, line_chars
+                current_key = (block_no, line_no)
+                line_chars = []
+                line_id += 1
+            line_chars.extend((self.chars[i], self.char_bbox(i)) for i in range(start, end))
+        if current_key is not None:
+            yield line_id, line_chars
+
+    def words(self) -> List[tuple]:
+        """Equivalent of page.get_text("words")."""
+        if self._words is not None:
+            return self._words
+        words = []
+        current_key = None
+        word_no = 0
+        text, box = [], None
+
+        def emit():
+            nonlocal text, box, word_no
+            if text:
+                words.append((*box, "".join(text), current_key[0], current_key[1], word_no))
+                word_no += 1
+            text, box = [], None
+
+        for block_no, line_no, start, end, *_ in self.spans:
+            if (block_no, line_no) != current_key:
+                if current_key is not None:
+                    emit()
+                current_key = (block_no, line_no)
+                word_no = 0
+            for i in range(start, end):
+                c = self.chars[i]
+                if c.isspace():
+                    emit()
+                    continue
+                x0, y0, x1, y1 = self.char_bbox(i)
+                text.append(c)
+                box = [x0, y0, x1, y1] if box is None else [min(box[0], x0), min(box[1], y0),
+                                                            max(box[2], x1), max(box[3], y1)]
+        if current_key is not None:
+            emit()
+        self._words = words
+        return words
+
+    def blocks(self) -> List[Dict]:
+        """Text blocks shaped like page.get_text("dict")["blocks"] (text, bbox, size, font, flags, origin)."""
+        blocks: List[Dict] = []
+        current_key = None
+        for block_no, line_no, start, end, size, font, flags, x0, y0, x1, y1, ox, oy in self.spans:
+            if not blocks or blocks[-1]["number"] != block_no:
+                blocks.append({"number": block_no, "type": 0, "lines": []})
+            if (block_no, line_no) != current_key:
+                blocks[-1]["lines"].append({"spans": []})
+                current_key = (block_no, line_no)
+            blocks[-1]["lines"][-1]["spans"].append({
+                "text": self.chars[start:end], "bbox": (x0, y0, x1, y1), "size": size,
+                "font": font, "flags": flags, "origin": (ox, oy),
+            })
+        return blocks
+
+    def text(self) -> str:
+        """Plain page text, one line per text line."""
+        return "".join("".join(c for c, _ in chars) + "\n" for _, chars in self.lines())
+
+
+class DocumentLayout:
+    def __init__(self, pages: List[PageLayout]):
+        self.pages = pages
+
+    def __len__(self):
+        return len(self.pages)
+
+    def __getitem__(self, i) -> PageLayout:
+        return self.pages[i]
+
+    @classmethod
+    def extract(cls, doc) -> "DocumentLayout":
+        return cls([PageLayout.from_page(page) for page in doc])
+
+    def to_bytes(self) -> bytes:
+        payload = (FORMAT_VERSION, [(p.width, p.height, p.chars, p.boxes.tobytes(), p.spans) for p in self.pages])
+        return zlib.compress(marshal.dumps(payload), 6)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> Optional["DocumentLayout"]:
+        try:
+            version, pages = marshal.loads(zlib.decompress(data))
+        except (ValueError, EOFError, TypeError, zlib.error):
+            return None
+        if version != FORMAT_VERSION:
+            return None
+        layouts = []
+        for width, height, chars, raw_boxes, spans in pages:
+            boxes = array('f')
+            boxes.frombytes(raw_boxes)
+            layouts.append(PageLayout(width, height, chars, boxes, spans))
+        return cls(layouts)
+
+
+class TextLayerCache:
+    """
+    Sidecar store of DocumentLayouts keyed by document hash. Backed by a size-bounded
+    ResultCache, so old layouts are evicted least recently used first.
+    """
+
+    def __init__(self, root=DEFAULT_DIR, max_bytes: int = 256 * 1024 * 1024):
+        self.store = ResultCache(root, max_bytes)
+
+    def load(self, doc, pdf_bytes: Optional[bytes] = None) -> DocumentLayout:
+        """
+        Return the layout of an open document, extracting and storing it on a miss.
+        pdf_bytes defaults to the document's file contents.
+        """
+        if pdf_bytes is None:
+            pdf_bytes = Path(doc.name).read_bytes() if doc.name else doc.tobytes()
+        key = self.store.make_key('text_layer', pdf_bytes, {'version': FORMAT_VERSION})
+        data = self.store.get(key)
+        if data is not None:
+            layout = DocumentLayout.from_bytes(data)
+            if layout is not None and len(layout) == len(doc):
+                return layout
+        layout = DocumentLayout.extract(doc)
+        self.store.put(key, layout.to_bytes())
+        return layout
+
+    def stats(self) -> Dict:
+        return self.store.stats()
+
+
+# The process-wide store in DEFAULT_DIR. Every app shares this one instance: separate
+# instances on one directory would each track their own size and evict each other's entries.
+TEXT_LAYERS = TextLayerCache()
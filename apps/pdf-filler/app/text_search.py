@@ -0,0 +1,369 @@
+"""
+Single-pass phrase search over PDF pages.
+
+Each page's characters come from one text extraction (see text_layer.PageLayout) as
+a flat string with a parallel character -> bbox map, and every highlight phrase is located in one walk
+of an Aho-Corasick automaton instead of one ``page.search_for()`` call per phrase.
+
+Before any of that, a page prefilter checks which phrases occur in the page's folded
+search text at all. Pages with no candidates are skipped without building the
+character map, and pages with only a few candidates are searched for just those.
+
+PatternMatcher is the pattern mode: regular expressions and whole-word phrases are
+compiled into one alternation that runs once over the same search text, and match
+offsets are mapped back to boxes through the character map.
+"""
+
+import re
+from collections import deque
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import fitz  # PyMuPDF
+
+from text_layer import PageLayout
+
+# Ligatures are kept in the extracted layout; search text spells them out like MuPDF does
+LIGATURES = {
+    "\ufb00": "ff", "\ufb01": "fi", "\ufb02": "fl", "\ufb03": "ffi",
+    "\ufb04": "ffl", "\ufb05": "ft", "\ufb06": "st",
+}
+
+
+LIGATURE_TABLE = str.maketrans(LIGATURES)
+
+# Highlight matching modes: literal phrases (PhraseMatcher) or regex patterns (PatternMatcher)
+MATCH_MODES = ('literal', 'pattern')
+
+# Pattern tokens: escapes and character classes are consumed whole so their contents are never
+# mistaken for the constructs PatternMatcher cannot combine (see _uncombinable)
+_PATTERN_TOKEN_RE = re.compile(r'\\.|\[\^?\]?(?:\\.|[^\]])*\]|\(\?P[<=]|\(\?[aiLmsux]+\)|.', re.DOTALL)
+
+# Up to this many candidate phrases on a page are located with str.find() instead of the automaton
+DIRECT_SEARCH_MAX = 8
+
+
+def fold_char(c: str) -> str:
+    """Lower-case a single character without changing the string length."""
+    low = c.lower()
+    return low if len(low) == 1 else c
+
+
+def normalize_phrase(phrase: str) -> str:
+    """Collapse whitespace runs to single spaces (line breaks match a space)."""
+    return " ".join(phrase.split())
+
+
+def fold_text(text: str) -> str:
+    """fold_char() applied to every character, using str.lower() when that is equivalent."""
+    folded = text.lower()
+    # lower() can lengthen characters or pick a context-dependent final sigma
+    if len(folded) != len(text) or "\u03a3" in text:
+        folded = "".join(fold_char(c) for c in text)
+    return folded
+
+
+def page_search_text(layout: PageLayout) -> str:
+    """
+    The folded text PageText would build for this layout, made with string operations
+    only (no per-character boxes). Used to prefilter pages and phrases.
+    """
+    parts: List[str] = []
+    current_key = None
+    for block_no, line_no, start, end, *_ in layout.spans:
+        if (block_no, line_no) != current_key:
+            parts.append(" ")
+            current_key = (block_no, line_no)
+        parts.append(layout.chars[start:end])
+    return fold_text(" ".join("".join(parts).split()).translate(LIGATURE_TABLE))
+
+
+class PhraseAutomaton:
+    """
+    Aho-Corasick automaton over a fixed list of (already normalized) phrases.
+    """
+
+    def __init__(self, phrases: Sequence[str]):
+        self.phrases = list(phrases)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+
+        for idx, phrase in enumerate(self.phrases):
+            if not phrase:
+                continue
+            state = 0
+            for c in phrase:
+                nxt = self._goto[state].get(c)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][c] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = nxt
+            self._out[state].append(idx)
+
+        # Breadth-first pass to wire failure links and merge outputs
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for c, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and c not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(c, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, int]]:
+        """Yield (start, end, phrase_index) for every occurrence, overlaps included."""
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for pos, c in enumerate(text):
+            while state and c not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(c, 0)
+            for idx in out[state]:
+                yield pos + 1 - len(self.phrases[idx]), pos + 1, idx
+
+
+class PageText:
+    """
+    A page's text as one string plus a character -> (line, bbox) map.
+
+    Lines are joined with a single space and whitespace runs are collapsed, which
+    mirrors how MuPDF lets a space in the needle match a line break.
+    """
+
+    def __init__(self, layout: PageLayout):
+        chars: List[str] = []
+        boxes: List[Optional[Tuple[int, Tuple[float, float, float, float]]]] = []
+
+        for line_id, line_chars in layout.lines():
+            for c, bbox in line_chars:
+                if c.isspace():
+                    if chars and chars[-1] != " ":
+                        chars.append(" ")
+                        boxes.append(None)
+                    continue
+                for part in LIGATURES.get(c, c):
+                    chars.append(part)
+                    boxes.append((line_id, bbox))
+            if chars and chars[-1] != " ":
+                chars.append(" ")
+                boxes.append(None)
+
+        self.text = "".join(chars)
+        self.folded = "".join(fold_char(c) for c in self.text)
+        self._boxes = boxes
+
+    @classmethod
+    def from_page(cls, page) -> "PageText":
+        return cls(PageLayout.from_page(page))
+
+    def rects(self, start: int, end: int) -> List[fitz.Rect]:
+        """Return one rectangle per text line covered by text[start:end]."""
+        rects: List[fitz.Rect] = []
+        current_line = None
+        for entry in self._boxes[start:end]:
+            if entry is None:
+                continue
+            line_id, bbox = entry
+            if line_id != current_line:
+                rects.append(fitz.Rect(bbox))
+                current_line = line_id
+            else:
+                rects[-1] |= bbox
+        return rects
+
+
+class PhraseMatcher:
+    """
+    Find many highlight phrases on a page with one text extraction and one scan.
+
+    Matching is case-insensitive; when a phrase also occurs with its exact casing
+    on a page, only the exact-case hits are returned for that phrase.
+
+    pages_scanned, pages_skipped and phrases_skipped count the prefilter's work
+    across every page searched with this matcher.
+    """
+
+    def __init__(self, phrases: Sequence[str]):
+        # Keep first occurrence order, drop duplicates and empty entries
+        self.phrases: List[str] = []
+        seen = set()
+        for phrase in phrases:
+            norm = normalize_phrase(phrase)
+            if norm and norm not in seen:
+                seen.add(norm)
+                self.phrases.append(norm)
+        self._folded = ["".join(fold_char(c) for c in p) for p in self.phrases]
+        self._automaton = PhraseAutomaton(self._folded)
+        self.pages_scanned = 0
+        self.pages_skipped = 0
+        self.phrases_skipped = 0
+
+    def candidates(self, layout: PageLayout) -> List[int]:
+        """Indices of the phrases that occur (case-insensitively) on the page."""
+        text = page_search_text(layout)
+        found = [idx for idx, folded in enumerate(self._folded) if folded in text]
+        self.pages_scanned += 1
+        self.phrases_skipped += len(self.phrases) - len(found)
+        if not found:
+            self.pages_skipped += 1
+        return found
+
+    def find(self, page_text: PageText, candidates: Optional[Sequence[int]] = None) -> Dict[str, List[Tuple[int, int]]]:
+        """
+        Return {phrase: [(start, end), ...]} of non-overlapping hits per phrase,
+        optionally limited to the phrase indices in candidates.
+        """
+        insensitive: Dict[int, List[Tuple[int, int]]] = {}
+        if candidates is not None and len(candidates) <= DIRECT_SEARCH_MAX:
+            # Same leftmost, non-overlapping hits as the automaton walk below
+            for idx in candidates:
+                needle = self._folded[idx]
+                pos = page_text.folded.find(needle)
+                while pos != -1:
+                    insensitive.setdefault(idx, []).append((pos, pos + len(needle)))
+                    pos = page_text.folded.find(needle, pos + len(needle))
+        else:
+            wanted = None if candidates is None else set(candidates)
+            last_end: Dict[int, int] = {}
+            for start, end, idx in self._automaton.iter_matches(page_text.folded):
+                if start < last_end.get(idx, 0) or (wanted is not None and idx not in wanted):
+                    continue
+                insensitive.setdefault(idx, []).append((start, end))
+                last_end[idx] = end
+
+        hits: Dict[str, List[Tuple[int, int]]] = {}
+        for idx, spans in insensitive.items():
+            phrase = self.phrases[idx]
+            exact = [(s, e) for s, e in spans if page_text.text[s:e] == phrase]
+            hits[phrase] = exact or spans
+        return hits
+
+    def search_page(self, page) -> List[Tuple[str, List[fitz.Rect]]]:
+        """Return (phrase, rects) for every hit on the page, in phrase order."""
+        return self.search_layout(PageLayout.from_page(page))
+
+    def search_layout(self, layout: PageLayout) -> List[Tuple[str, List[fitz.Rect]]]:
+        """Like search_page(), for an already extracted (or cached) page layout."""
+        candidates = self.candidates(layout)
+        if not candidates:
+            return []
+        page_text = PageText(layout)
+        hits = self.find(page_text, candidates)
+        results = []
+        for phrase in self.phrases:
+            for start, end in hits.get(phrase, []):
+                results.append((phrase, page_text.rects(start, end)))
+        return results
+
+
+class PatternMatcher:
+    """
+    Find regular expressions and whole-word phrases on a page with one regex scan.
+
+    Every pattern and phrase becomes a named alternative of a single compiled regex
+    that is run case-insensitively over the page's search text (lines joined by one
+    space, so ``signature of\\s+claimant`` and ``signature of claimant`` both cross
+    line breaks). Phrases are matched literally but only on word boundaries.
+
+    Hits do not overlap: at any position the first alternative that matches wins,
+    with patterns tried in the given order before phrases, longest phrase first.
+
+    Because the patterns share one regex, they cannot use global inline flags such as
+    ``(?s)`` (use the scoped ``(?s:...)``), backreferences or named groups.
+
+    Raises ValueError naming the pattern when one does not compile or uses one of these.
+    """
+
+    def __init__(self, phrases: Sequence[str] = (), patterns: Sequence[str] = ()):
+        self.phrases: List[str] = []
+        alternatives: List[Tuple[int, str]] = []
+        seen = set()
+        for pattern in patterns:
+            norm = normalize_phrase(pattern)
+            if not norm or norm in seen:
+                continue
+            try:
+                re.compile(norm)
+            except re.error as e:
+                raise ValueError(f"Invalid pattern '{pattern}': {e}") from None
+            reason = _uncombinable(norm)
+            if reason:
+                raise ValueError(f"Invalid pattern '{pattern}': {reason}")
+            seen.add(norm)
+            alternatives.append((len(self.phrases), norm))
+            self.phrases.append(norm)
+
+        literal = []
+        for phrase in phrases:
+            norm = normalize_phrase(phrase)
+            if norm and norm not in seen:
+                seen.add(norm)
+                literal.append((len(self.phrases), norm))
+                self.phrases.append(norm)
+        for idx, phrase in sorted(literal, key=lambda item: -len(item[1])):
+            alternatives.append((idx, r"(?<!\w)" + re.escape(phrase) + r"(?!\w)"))
+
+        try:
+            self._regex = re.compile("|".join(f"(?P<_m{idx}>{source})" for idx, source in alternatives),
+                                     re.IGNORECASE) if alternatives else None
+        except re.error as e:
+            raise ValueError(f"Invalid patterns: {e}") from None
+        self.pages_scanned = 0
+        self.pages_skipped = 0
+
+    def find(self, text: str) -> Dict[str, List[Tuple[int, int]]]:
+        """Return {phrase or pattern: [(start, end), ...]} for every non-empty hit in text."""
+        hits: Dict[str, List[Tuple[int, int]]] = {}
+        if self._regex is None:
+            return hits
+        for m in self._regex.finditer(text):
+            # The enclosing named group closes last, so lastgroup names the alternative that matched
+            if m.end() > m.start():
+                hits.setdefault(self.phrases[int(m.lastgroup[2:])], []).append(m.span())
+        return hits
+
+    def search_page(self, page) -> List[Tuple[str, List[fitz.Rect]]]:
+        """Return (phrase or pattern, rects) for every hit on the page, in phrase order."""
+        return self.search_layout(PageLayout.from_page(page))
+
+    def search_layout(self, layout: PageLayout) -> List[Tuple[str, List[fitz.Rect]]]:
+        """Like search_page(), for an already extracted (or cached) page layout."""
+        # The search text is PageText.folded without its trailing space, so offsets carry over
+        hits = self.find(page_search_text(layout))
+        self.pages_scanned += 1
+        if not hits:
+            self.pages_skipped += 1
+            return []
+        page_text = PageText(layout)
+        results = []
+        for phrase in self.phrases:
+            for start, end in hits.get(phrase, []):
+                results.append((phrase, page_text.rects(start, end)))
+        return results
+
+
+def _uncombinable(pattern: str) -> Optional[str]:
+    """Why pattern cannot be one alternative of PatternMatcher's combined regex, or None."""
+    for token in _PATTERN_TOKEN_RE.findall(pattern):
+        if token == '(?P=' or (len(token) == 2 and token[0] == '\\' and token[1] in '123456789'):
+            return "backreferences are not supported"
+        if token == '(?P<':
+            return "named groups are not supported, use (...) or (?:...)"
+        if token.startswith('(?') and token.endswith(')'):
+            return f"global flags like {token} are not supported, use the scoped form {token[:-1]}:...)"
+    return None
+
+
+def build_matcher(words: Sequence[str], patterns: Sequence[str] = (), mode: str = 'literal'):
+    """PhraseMatcher over words and patterns in literal mode, PatternMatcher in pattern mode."""
+    if mode == 'pattern':
+        return PatternMatcher(words, patterns)
+    if mode != 'literal':
+        raise ValueError(f"Unknown match mode '{mode}', expected one of {MATCH_MODES}")
+    return PhraseMatcher(list(words) + list(patterns))
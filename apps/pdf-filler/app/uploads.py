@@ -0,0 +1,83 @@
+"""
+Bounded-memory handling of uploaded ZIP archives.
+
+Uploads are copied in chunks into a SpooledTemporaryFile (kept in memory up to
+UPLOAD_SPOOL_BYTES, then moved to disk) and zipfile reads members straight from that
+file. Members are read through ZipLimits, which rejects archives whose members are
+larger than MAX_MEMBER_BYTES or whose uncompressed total exceeds MAX_TOTAL_BYTES,
+both from the declared sizes up front and from the bytes actually read.
+"""
+
+import io
+import shutil
+import tempfile
+import zipfile
+from typing import Union
+
+# Uploads up to this size stay in memory, larger ones are spooled to disk
+UPLOAD_SPOOL_BYTES = 16 * 1024 * 1024
+
+# Largest uncompressed member, and largest uncompressed total per archive
+MAX_MEMBER_BYTES = 256 * 1024 * 1024
+MAX_TOTAL_BYTES = 2 * 1024 * 1024 * 1024
+
+COPY_CHUNK_BYTES = 1024 * 1024
+
+
+class UploadTooLarge(ValueError):
+    """Raised when an archive member or the whole archive exceeds the size limits."""
+
+
+def spool_upload(file_storage, max_size: int = UPLOAD_SPOOL_BYTES) -> tempfile.SpooledTemporaryFile:
+    """Copy an uploaded file (werkzeug FileStorage) into a spooled temp file, rewound for reading."""
+    spool = tempfile.SpooledTemporaryFile(max_size=max_size)
+    shutil.copyfileobj(file_storage.stream, spool, COPY_CHUNK_BYTES)
+    spool.seek(0)
+    return spool
+
+
+def open_zip(source: Union[bytes, io.IOBase, str]) -> zipfile.ZipFile:
+    """Open a ZIP from bytes, a path or a seekable binary file without copying it."""
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    return zipfile.ZipFile(source, 'r')
+
+
+class ZipLimits:
+    """
+    Per-archive size budget. Use one instance per archive: it counts the
+    uncompressed bytes read so far against max_total.
+    """
+
+    def __init__(self, max_member: int = MAX_MEMBER_BYTES, max_total: int = MAX_TOTAL_BYTES):
+        self.max_member = max_member
+        self.max_total = max_total
+        self.total = 0
+
+    def check_declared(self, zf: zipfile.ZipFile):
+        """Reject the archive early based on the sizes in its central directory."""
+        declared = 0
+        for info in zf.infolist():
+            if info.file_size > self.max_member:
+                raise UploadTooLarge(f"{info.filename} is larger than {self.max_member} bytes uncompressed")
+            declared += info.file_size
+        if declared > self.max_total:
+            raise UploadTooLarge(f"Archive is larger than {self.max_total} bytes uncompressed")
+
+    def read(self, zf: zipfile.ZipFile, info: zipfile.ZipInfo) -> bytes:
+        """Read one member in chunks, enforcing the member and total limits as bytes arrive."""
+        chunks = []
+        size = 0
+        with zf.open(info) as member:
+            while True:
+                chunk = member.read(COPY_CHUNK_BYTES)
+                if not chunk:
+                    break
+                size += len(chunk)
+                self.total += len(chunk)
+                if size > self.max_member:
+                    raise UploadTooLarge(f"{info.filename} is larger than {self.max_member} bytes uncompressed")
+                if self.total > self.max_total:
+                    raise UploadTooLarge(f"Archive is larger than {self.max_total} bytes uncompressed")
+                chunks.append(chunk)
+        return b''.join(chunks)
@@ -0,0 +1,47 @@
+"""
+Single-pass AcroForm filling with PyMuPDF widgets.
+
+The pypdf path copies every page into a PdfWriter, sets the field values and writes
+a full new file, and the document has to be parsed by a second library besides the
+MuPDF one every other stage uses. fill_widgets walks ``page.widgets()`` once per page
+of the already open document, resolves each text widget's field name through a
+FieldNameIndex and sets the value in place, on every page. Fields that appear on
+several pages (widgets sharing a name) are all filled.
+"""
+
+from typing import Callable, Dict, List, Optional
+
+import fitz  # PyMuPDF
+from loguru import logger
+
+from field_names import FieldNameIndex
+
+# Widget types that take a text value
+TEXT_WIDGET_TYPES = (fitz.PDF_WIDGET_TYPE_TEXT, fitz.PDF_WIDGET_TYPE_COMBOBOX)
+
+
+def fill_widgets(doc, values: Dict[str, str], index: FieldNameIndex,
+                 is_filled: Optional[Callable[[str, str], bool]] = None) -> List[str]:
+    """
+    Set every text widget whose field name resolves to a logical key with a value.
+    Widgets that already hold a value for which is_filled(key, value) is true are
+    left alone. Returns the names of the filled fields in document order.
+    """
+    filled: List[str] = []
+    for page in doc:
+        for widget in page.widgets(types=TEXT_WIDGET_TYPES):
+            name = widget.field_name or ''
+            key = index.resolve(name)
+            value = values.get(key) if key else None
+            if not value:
+                continue
+            current = widget.field_value or ''
+            if current and is_filled is not None and is_filled(key, current):
+                logger.info(f"AcroForm field '{name}' already contains valid data: '{current}', skipping")
+                continue
+            widget.field_value = value
+            widget.update()
+            if name not in filled:
+                filled.append(name)
+            logger.info(f"AcroForm: Filling '{name}' on page {page.number + 1} with '{key}' value")
+    return filled
@@ -0,0 +1,8 @@
+import sys
+from pathlib import Path
+
+# Bind "app" to the app/ directory before app/ itself goes on the path, where app.py would shadow it
+import app  # noqa: F401
+
+# Modules in app/ import each other by plain name, as they do when app/app.py runs
+sys.path.append(str(Path(__file__).parent / "app"))
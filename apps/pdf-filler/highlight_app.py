@@ -1,9 +1,18 @@
 import io
+import os
+import sys
 import zipfile
 from flask import Flask, render_template, request, send_file, flash, redirect, url_for
 import re
 import tempfile
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app'))
+from highlight_pool import highlight_zip_members
+from pdf_output import open_pdf, save_pdf
+from text_search import build_matcher
+from annotations import add_highlight
+from uploads import UploadTooLarge, spool_upload, open_zip
+
 app = Flask(__name__)
 app.secret_key = "highlight-secret"
 
@@ -19,43 +28,37 @@ COMMON_HIGHLIGHTS = [
     "Power of Attorney", "POA", "Attorney Signature"
 ]
 
-def highlight_pdf(pdf_bytes, highlight_words):
+# Worker processes used to highlight the PDFs of a ZIP
+# (None = one per CPU core, 1 = highlight on the request thread)
+HIGHLIGHT_WORKERS = None
+
+# How highlighted PDFs are saved: "incremental", "fast" or "compact" (see pdf_output.py)
+HIGHLIGHT_SAVE_MODE = "compact"
+
+def highlight_pdf(pdf_bytes, highlight_words, save_mode=HIGHLIGHT_SAVE_MODE):
     """Highlight specified words in a PDF by finding their positions and drawing yellow rectangles"""
     try:
         # Try to import PyMuPDF (fitz) for better text highlighting
         try:
-            import fitz  # PyMuPDF
+            import fitz  # noqa: F401
             use_fitz = True
         except ImportError:
             use_fitz = False
             print("PyMuPDF not available, using fallback method")
         
         if use_fitz:
-            # Use PyMuPDF for better text highlighting
-            doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-            
-            for page_num in range(len(doc)):
-                page = doc[page_num]
+            # One matcher for all words, shared with unified_app (case-insensitive, exact-case
+            # hits win where a word occurs both ways)
+            matcher = build_matcher(highlight_words)
+            with open_pdf(pdf_bytes, save_mode) as doc:
                 
-                # Search for each word on the page
-                for word in highlight_words:
-                    # Search for the word (case insensitive)
-                    text_instances = page.search_for(word, flags=fitz.TEXTFLAGS_IGNORECASE)
-                    
-                    # Highlight each instance found
-                    for inst in text_instances:
-                        # Create a highlight annotation
-                        highlight = page.add_highlight_annot(inst)
-                        highlight.set_colors(stroke=[1, 1, 0])  # Yellow
-                        highlight.set_opacity(0.3)  # Semi-transparent
-                        highlight.update()
-            
-            # Save the highlighted PDF
-            output_stream = io.BytesIO()
-            doc.save(output_stream, garbage=4, deflate=True)
-            doc.close()
-            output_stream.seek(0)
-            return output_stream.getvalue()
+                for page_num in range(len(doc)):
+                    page = doc[page_num]
+                    page_rects = [rect for _, rects in matcher.search_page(page) for rect in rects]
+                    add_highlight(page, page_rects, stroke=(1, 1, 0), opacity=0.3)  # Semi-transparent
+                
+                # Save the highlighted PDF with the selected strategy
+                return save_pdf(doc, save_mode)
         
         else:
             # Fallback method using PyPDF2
@@ -102,26 +105,19 @@ def highlight_pdf(pdf_bytes, highlight_words):
         # Return original PDF if highlighting fails
         return pdf_bytes
 
-def process_highlight_zip(zip_bytes, highlight_words):
-    """Process a ZIP file and highlight specified words in all PDFs"""
+def process_highlight_zip(zip_source, highlight_words, workers=None):
+    """Process a ZIP file (bytes, path or seekable file) and highlight specified words in all PDFs
+    
+    PDFs are highlighted in a pool of worker processes (workers <= 1 highlights
+    them one by one on the calling thread); output keeps the original member order.
+    """
+    if workers is None:
+        workers = HIGHLIGHT_WORKERS
     output_zip = io.BytesIO()
     
-    with zipfile.ZipFile(io.BytesIO(zip_bytes), 'r') as input_zip:
+    with open_zip(zip_source) as input_zip:
         with zipfile.ZipFile(output_zip, 'w') as output_zip_file:
-            for file_info in input_zip.filelist:
-                if file_info.filename.lower().endswith('.pdf'):
-                    # Read the PDF
-                    pdf_bytes = input_zip.read(file_info.filename)
-                    
-                    # Highlight the PDF
-                    highlighted_pdf = highlight_pdf(pdf_bytes, highlight_words)
-                    
-                    # Add to output ZIP
-                    output_zip_file.writestr(f"highlighted_{file_info.filename}", highlighted_pdf)
-                else:
-                    # Copy non-PDF files as-is
-                    file_bytes = input_zip.read(file_info.filename)
-                    output_zip_file.writestr(file_info.filename, file_bytes)
+            highlight_zip_members(input_zip, output_zip_file, highlight_pdf, highlight_words, workers)
     
     return output_zip.getvalue()
 
@@ -151,10 +147,12 @@ def highlight():
         flash("Please upload a .zip file containing PDFs.")
         return redirect(url_for("index"))
     
-    zip_bytes = f.read()
+    # The upload is streamed into a spooled temp file and read by zipfile from there
+    upload = spool_upload(f)
     
     try:
-        highlighted_zip = process_highlight_zip(zip_bytes, all_highlight_words)
+        with upload:
+            highlighted_zip = process_highlight_zip(upload, all_highlight_words)
         
         return send_file(
             io.BytesIO(highlighted_zip),
@@ -162,6 +160,9 @@ def highlight():
             as_attachment=True,
             download_name="highlighted_documents.zip"
         )
+    except UploadTooLarge as e:
+        flash(str(e))
+        return redirect(url_for("index"))
     except Exception as e:
         flash(f"Error processing documents: {str(e)}")
         return redirect(url_for("index"))
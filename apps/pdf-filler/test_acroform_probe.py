@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Tests for the AcroForm presence probe
+"""
+
+import fitz  # PyMuPDF
+
+from acroform_probe import AcroFormInfo, AcroFormProbeCache, probe_acroform
+
+
+def make_form(values):
+    doc = fitz.open()
+    page = doc.new_page()
+    for i, (name, value) in enumerate(values.items()):
+        widget = fitz.Widget()
+        widget.field_name = name
+        widget.field_type = fitz.PDF_WIDGET_TYPE_TEXT
+        widget.rect = fitz.Rect(150, 100 + 30 * i, 400, 114 + 30 * i)
+        widget.field_value = value
+        page.add_widget(widget)
+    return fitz.open(stream=doc.tobytes(), filetype="pdf")
+
+
+def test_flat_pdf_has_no_form():
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), "Name:", fontsize=10)
+    info = probe_acroform(doc)
+    assert not info
+    assert info == AcroFormInfo(0, 0)
+
+
+def test_counts_fields_and_values():
+    info = probe_acroform(make_form({"claimant_name": "", "email": "jane@example.com", "phone": ""}))
+    assert info and info.has_values
+    assert (info.field_count, info.filled_count) == (3, 1)
+
+
+def test_nested_fields_are_counted_at_the_leaves():
+    doc = make_form({"name": "", "email": ""})
+    # Put both fields under one parent field, the way Acrobat names "claimant.name"
+    cat = doc.pdf_catalog()
+    kids = doc.xref_get_key(cat, "AcroForm/Fields")[1]
+    parent = doc.get_new_xref()
+    doc.update_object(parent, f"<</T(claimant)/Kids{kids}>>")
+    doc.xref_set_key(cat, "AcroForm/Fields", f"[{parent} 0 R]")
+    assert probe_acroform(doc) == AcroFormInfo(2, 0)
+
+
+def test_cache_answers_by_digest():
+    cache = AcroFormProbeCache(max_entries=1)
+    doc = make_form({"name": "Jane"})
+    assert cache.probe(doc, "a") == AcroFormInfo(1, 1)
+    assert cache.probe(fitz.open(), "a") == AcroFormInfo(1, 1)
+    assert (cache.hits, cache.misses) == (1, 1)
+    cache.probe(fitz.open(), "b")
+    assert cache.probe(fitz.open(), "a") == AcroFormInfo(0, 0)
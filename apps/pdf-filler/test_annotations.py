@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Tests for coalesced highlight annotations
+"""
+
+import fitz  # PyMuPDF
+
+from annotations import add_highlight, coalesce_rects
+
+
+def test_overlapping_and_adjacent_rects_merge_per_line():
+    rects = [
+        fitz.Rect(72, 60, 110, 74),   # "Notary"
+        fitz.Rect(72, 60, 150, 74),   # "Notary Public"
+        fitz.Rect(150.5, 60, 200, 74),  # "Signature", next to it
+        fitz.Rect(300, 60, 340, 74),  # same line, far away
+        fitz.Rect(72, 80, 110, 94),   # next line
+    ]
+    assert coalesce_rects(rects) == [
+        fitz.Rect(72, 60, 200, 74),
+        fitz.Rect(300, 60, 340, 74),
+        fitz.Rect(72, 80, 110, 94),
+    ]
+
+
+def test_add_highlight_creates_one_multi_quad_annotation():
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), "Notary Public Signature", fontsize=11)
+    page.insert_text((72, 100), "Witness", fontsize=11)
+    rects = []
+    for phrase in ("Notary", "Notary Public", "Notary Public Signature", "Witness"):
+        rects.extend(page.search_for(phrase))
+    add_highlight(page, rects)
+    annots = list(page.annots())
+    assert len(annots) == 1
+    assert len(annots[0].vertices) == 8  # two quads: one per line
+    assert add_highlight(page, []) is None
+    doc.close()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared per-fill document context
+"""
+
+import fitz  # PyMuPDF
+
+from document_context import DocumentContext, open_document
+
+
+def make_pdf(with_field=False):
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), "Name of Claimant: ______", fontsize=11)
+    if with_field:
+        widget = fitz.Widget()
+        widget.field_name = "claimant_name"
+        widget.field_type = fitz.PDF_WIDGET_TYPE_TEXT
+        widget.rect = fitz.Rect(200, 60, 400, 76)
+        page.add_widget(widget)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def test_context_parses_once_and_reuses():
+    ctx = DocumentContext(make_pdf(with_field=True), "claim.pdf")
+    assert list(ctx.acroform_fields) == ["claimant_name"]
+    assert ctx.reader is ctx.reader
+    assert ctx.layout is ctx.layout
+    assert [w[4] for w in ctx.words(0)] == [w[4] for w in ctx.doc[0].get_text("words")]
+    ctx.close()
+
+
+def test_flat_document_has_no_fields():
+    with DocumentContext(make_pdf(), "flat.pdf") as ctx:
+        assert ctx.acroform_fields == {}
+
+
+def test_open_document_passes_context_through(tmp_path):
+    path = tmp_path / "claim.pdf"
+    path.write_bytes(make_pdf())
+    with open_document(path) as ctx:
+        assert ctx.name == "claim.pdf"
+    assert ctx.doc.is_closed
+
+    owned = DocumentContext.from_path(path)
+    with open_document(owned) as ctx:
+        assert ctx is owned
+    assert not owned.doc.is_closed
+    owned.close()
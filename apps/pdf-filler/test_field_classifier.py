@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Tests for the compiled field-label classifier against the keyword-by-keyword scan it replaces
+"""
+
+import random
+
+from rapidfuzz import fuzz
+
+from field_classifier import CDIST_WORKERS, FieldClassifier, cdist_workers
+from highlight_pool import get_pool, reset_pool
+from processor import FIELD_MAP, classify_field_type
+
+
+def reference_classify(label_text, field_map=FIELD_MAP):
+    """The original classify_field_type loop."""
+    label_clean = label_text.lower().strip().replace(':', '').replace('.', '').strip()
+    best_match, best_score = None, 0
+    for field_type, keywords in field_map.items():
+        for keyword in keywords:
+            if label_clean == keyword:
+                return field_type, 100.0
+            if keyword in label_clean or label_clean in keyword:
+                if "email" in label_clean and "address" in label_clean:
+                    return "email", 95.0
+                if field_type == "email" and "email" in label_clean:
+                    return field_type, 95.0
+                elif field_type == "address" and "address" in label_clean and "email" not in label_clean:
+                    return field_type, 90.0
+                elif field_type == "phone" and any(w in label_clean for w in ["phone", "telephone", "mobile", "cell"]):
+                    return field_type, 90.0
+                elif field_type == "ssn" and any(w in label_clean for w in ["ssn", "social security"]):
+                    return field_type, 90.0
+                elif field_type == "ein" and any(w in label_clean
+                                                 for w in ["ein", "employer identification", "tax id"]):
+                    return field_type, 90.0
+                elif field_type == "dob" and any(w in label_clean for w in ["dob", "date of birth", "birth"]):
+                    return field_type, 90.0
+                elif field_type == "name" and "name" in label_clean:
+                    return field_type, 85.0
+            score = fuzz.ratio(label_clean, keyword)
+            if score > best_score:
+                best_score, best_match = score, field_type
+    return best_match, best_score
+
+
+def sample_labels():
+    labels = ["", ":", "Name:", "E-mail Address:", "Email", "Current Address:", "Daytime Phone:", "SSN/FEIN:",
+              "Date of Birth:", "Social Security No.", "Tax ID", "(first)", "Claimant", "Signature", "Mobile",
+              "cell", "ein", "birthdate", "Notary", "addr", "phone.", "Names:", "Emailaddress", "x"]
+    keywords = [k for ks in FIELD_MAP.values() for k in ks]
+    labels += keywords + [k.upper() + ":" for k in keywords]
+    rng = random.Random(7)
+    for _ in range(400):
+        k = rng.choice(keywords)
+        i = rng.randrange(len(k))
+        labels.append(k[i:i + rng.randint(1, 8)])
+        labels.append(rng.choice(keywords) + " " + rng.choice(keywords))
+        labels.append("".join(rng.choice("abcdeilmnoprst .:") for _ in range(rng.randint(1, 12))))
+    return labels
+
+
+def test_classifier_matches_reference():
+    classifier = FieldClassifier(FIELD_MAP)
+    for label in sample_labels():
+        assert classifier.classify(label) == reference_classify(label), label
+
+
+def test_batch_scoring_matches_reference():
+    labels = sample_labels()
+    assert FieldClassifier(FIELD_MAP).classify_many(labels) == [reference_classify(label) for label in labels]
+
+
+def test_classify_field_type_is_memoized():
+    classifier = FieldClassifier(FIELD_MAP)
+    classifier.classify("Daytime Phone:")
+    classifier.classify("daytime phone")
+    assert (classifier.hits, classifier.misses) == (1, 1)
+    classifier.classify_many(["DAYTIME PHONE", "Notary"])
+    assert (classifier.hits, classifier.misses) == (2, 2)
+    assert classify_field_type("Email Address:") == ("email", 95.0)
+
+
+def test_pool_workers_score_on_one_thread():
+    assert cdist_workers() == CDIST_WORKERS
+    try:
+        # Each pool process already fills one PDF per core
+        assert get_pool(2).submit(cdist_workers).result() == 1
+    finally:
+        reset_pool()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Tests for the compiled AcroForm field-name index
+"""
+
+import os
+
+from field_names import FieldNameIndex, MappingFile, normalize_field_name
+
+ALIASES = {
+    "name": ["claimant_name", "full_name"],
+    "email": ["email", "email_address"],
+    "dob": ["date_of_birth"],
+}
+
+
+def test_normalize_field_name():
+    assert normalize_field_name("form1[0].Page1[0].ClaimantName[0]") == "claimant_name"
+    assert normalize_field_name("Email Address:") == "email_address"
+    assert normalize_field_name("Date-of-Birth") == "date_of_birth"
+
+
+def test_resolve_exact_numbered_and_near_miss_names():
+    index = FieldNameIndex(ALIASES)
+    assert index.resolve("Full_Name") == "name"
+    assert index.resolve("Claimant_Name_1") == "name"
+    assert index.resolve("emial_address") == "email"
+    assert index.resolve("DateOfBirth") == "dob"
+    assert index.resolve("Signature") is None
+    assert index.resolve("ClaimantNmae_2") == "name"
+
+
+def test_qualified_names_do_not_resolve_to_the_plain_field():
+    index = FieldNameIndex({**ALIASES, "name": ["claimant_name", "full_name", "signer_name"]})
+    assert index.resolve("co_claimant_name") is None
+    assert index.resolve("CoClaimantName") is None
+    assert index.resolve("company_name_2") is None
+    assert index.resolve("cosigner_name") is None
+    assert index.resolve("") is None
+
+
+def test_mapping_file_reloads_on_change(tmp_path):
+    path = tmp_path / "mapping.yaml"
+    path.write_text("fields:\n  - key: name\n    acroform_names: [claimant_name]\n")
+    mapping = MappingFile(path)
+    assert mapping.index.resolve("claimant_name") == "name"
+    assert mapping.index.resolve("tax_id") is None
+
+    path.write_text("fields:\n  - key: ein\n    acroform_names: [tax_id]\n")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert mapping.index.resolve("tax_id") == "ein"
+    assert mapping.mapping["fields"][0]["key"] == "ein"
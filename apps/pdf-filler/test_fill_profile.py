@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Tests for the filler's stage timings and opt-in profiling
+"""
+
+import io
+import pstats
+import zipfile
+
+import fitz  # PyMuPDF
+
+import processor
+from fill_profile import FILL_STAGES, FillTimings, format_timings, profiled
+from template_cache import TemplateCache
+from text_layer import TextLayerCache
+
+VALUES = {"name": "Jane Claimant", "email": "jane@example.com"}
+
+
+def make_form():
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 120), "Name:", fontsize=10)
+    page.insert_text((72, 150), "Email:", fontsize=10)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def no_caches(tmp_path, monkeypatch):
+    monkeypatch.setattr(processor, "TEXT_LAYERS", TextLayerCache(tmp_path / "text", max_bytes=0))
+    monkeypatch.setattr(processor, "TEMPLATES", TemplateCache(tmp_path / "templates", max_bytes=0))
+
+
+def test_fill_records_every_text_path_stage(tmp_path, monkeypatch):
+    no_caches(tmp_path, monkeypatch)
+    filled, timings, seconds = processor._fill_member("claim.pdf", make_form(), VALUES)
+    assert filled
+    assert set(timings) == set(FILL_STAGES)
+    # classification and blank-space probes run inside label search
+    assert timings["classify"] + timings["blank_probe"] <= timings["label_search"]
+    assert sum(timings[s] for s in ("acroform", "label_search", "overlay", "save")) <= seconds
+
+
+def test_fill_timings_totals_and_summary():
+    timings = FillTimings()
+    timings.add("a.pdf", {"acroform": 0.001, "overlay": 0.002}, 0.01)
+    timings.add("b.pdf", {"acroform": 0.003}, 0.02)
+    timings.add("c.pdf", {}, 0.0, cached=True)
+    totals = timings.totals()
+    assert totals["acroform"] == 0.004
+    assert totals["save"] == 0.0
+    report = timings.to_dict()["totals"]
+    assert (report["files"], report["cached"]) == (3, 1)
+    assert report["slowest"][0]["file"] == "b.pdf"
+    assert timings.summary().startswith("3 PDFs in 0.030s (acroform 4.0ms")
+    assert format_timings({"save": 0.5, "acroform": 0.25}) == "acroform 250.0ms, save 500.0ms"
+
+
+def test_profiled_dumps_stats_only_when_enabled(tmp_path):
+    with profiled(None, "claim.pdf"):
+        sum(range(100))
+    assert not list(tmp_path.iterdir())
+
+    with profiled(tmp_path / "profiles", "dir/claim.pdf"):
+        sum(range(100))
+    stats = pstats.Stats(str(tmp_path / "profiles" / "claim.prof"))
+    assert stats.total_calls > 0
+
+
+def test_zip_timings_cover_every_pdf(tmp_path, monkeypatch):
+    no_caches(tmp_path, monkeypatch)
+    monkeypatch.setattr(processor, "PROFILE_DIR", tmp_path / "profiles")
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        zf.writestr("one.pdf", make_form())
+        zf.writestr("two.pdf", make_form())
+    timings = FillTimings()
+    processor.write_filled_zip(buf.getvalue(), VALUES, io.BytesIO(), workers=1, timings=timings)
+    assert [e["file"] for e in timings.files] == ["one.pdf", "two.pdf"]
+    assert timings.totals()["save"] > 0
+    assert sorted(p.name for p in (tmp_path / "profiles").iterdir()) == ["one.prof", "two.prof"]
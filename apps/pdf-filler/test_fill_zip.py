@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Tests for filling the PDFs of a ZIP in memory and in the worker pool
+"""
+
+import io
+import tempfile
+import zipfile
+
+import fitz  # PyMuPDF
+
+import processor
+from highlight_pool import reset_pool
+from template_cache import TemplateCache
+from text_layer import TextLayerCache
+
+VALUES = {"name": "Jane Claimant", "email": "jane@example.com"}
+
+
+def make_form(title):
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), title, fontsize=14)
+    page.insert_text((72, 120), "Name:", fontsize=10)
+    page.insert_text((72, 150), "Email:", fontsize=10)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def make_zip():
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        zf.writestr("a/claim.pdf", make_form("Claim Form"))
+        zf.writestr("notes.txt", "not a pdf")
+        zf.writestr("b/claim.pdf", make_form("Duplicate Name"))
+        zf.writestr("blank.pdf", make_blank())
+    return buf.getvalue()
+
+
+def make_blank():
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), "Nothing to fill here", fontsize=10)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def filled_text(zip_bytes):
+    with zipfile.ZipFile(io.BytesIO(zip_bytes)) as zf:
+        return {name: fitz.open(stream=zf.read(name), filetype="pdf")[0].get_text() for name in zf.namelist()}
+
+
+def test_pool_and_serial_fills_match(tmp_path, monkeypatch):
+    monkeypatch.setattr(processor, "TEXT_LAYERS", TextLayerCache(tmp_path / "text", max_bytes=0))
+    monkeypatch.setattr(processor, "TEMPLATES", TemplateCache(tmp_path / "templates", max_bytes=0))
+    reset_pool()  # workers fork with the caches above
+    try:
+        seen = []
+        serial = filled_text(processor.process_zip(make_zip(), VALUES, workers=1))
+        out = io.BytesIO()
+        processor.write_filled_zip(make_zip(), VALUES, out, workers=2, progress=lambda *a: seen.append(a))
+        pooled = filled_text(out.getvalue())
+    finally:
+        reset_pool()
+    assert list(serial) == ["filled_claim.pdf", "original_blank.pdf"]
+    assert pooled == serial
+    assert "Jane Claimant" in serial["filled_claim.pdf"]
+    assert sorted(seen) == [("a/claim.pdf",), ("b/claim.pdf", "skipped"), ("blank.pdf",)]
+
+
+def test_spooled_upload_streams_into_spooled_output(tmp_path, monkeypatch):
+    monkeypatch.setattr(processor, "TEXT_LAYERS", TextLayerCache(tmp_path / "text", max_bytes=0))
+    monkeypatch.setattr(processor, "TEMPLATES", TemplateCache(tmp_path / "templates", max_bytes=0))
+    upload = tempfile.SpooledTemporaryFile(max_size=1024)
+    upload.write(make_zip())
+    upload.seek(0)
+    # A small spool moves to disk while the archive is written, as a large result does in the app
+    spool = tempfile.SpooledTemporaryFile(max_size=1024)
+    processor.write_filled_zip(upload, VALUES, spool, workers=1)
+    assert spool._rolled
+    size = spool.tell()
+    spool.seek(0)
+    streamed = spool.read()
+    assert len(streamed) == size
+    assert filled_text(streamed) == filled_text(processor.process_zip(make_zip(), VALUES, workers=1))
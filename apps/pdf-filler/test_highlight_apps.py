@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Tests for the highlight routes of the standalone apps (app/app.py and highlight_app.py)
+"""
+
+import fitz  # PyMuPDF
+import pytest
+
+import highlight_app
+from app import app as filler_app
+from pdf_output import SAVE_MODES
+
+
+def make_pdf():
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), "Signature of Notary", fontsize=11)
+    page.insert_text((72, 100), "NOTARY SIGNATURE", fontsize=11)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+@pytest.mark.parametrize("highlight_pdf", [filler_app.highlight_pdf, highlight_app.highlight_pdf])
+def test_highlighted_pdf_gains_annotations(highlight_pdf):
+    original = make_pdf()
+    out = highlight_pdf(original, ["Signature of Notary", "Notary Signature"])
+    assert out != original
+    page = fitz.open(stream=out, filetype="pdf")[0]
+    annots = [(annot.type[1], len(annot.vertices)) for annot in page.annots()]
+    # One highlight whose quads cover both lines: the exact-case phrase and the case-insensitive one
+    assert annots == [("Highlight", 8)]
+
+
+@pytest.mark.parametrize("highlight_pdf", [filler_app.highlight_pdf, highlight_app.highlight_pdf])
+@pytest.mark.parametrize("save_mode", SAVE_MODES)
+def test_every_save_mode_writes_the_highlight(highlight_pdf, save_mode):
+    original = make_pdf()
+    out = highlight_pdf(original, ["Notary"], save_mode)
+    doc = fitz.open(stream=out, filetype="pdf")
+    assert [annot.type[1] for annot in doc[0].annots()] == ["Highlight"]
+    assert doc[0].get_text() == fitz.open(stream=original, filetype="pdf")[0].get_text()
+    if save_mode == "incremental":
+        assert out.startswith(original)
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Tests for highlighting ZIP members in the shared worker pool
+"""
+
+import io
+import time
+import zipfile
+
+import fitz  # PyMuPDF
+
+import processor
+from match_report import MatchReport
+from highlight_pool import get_pool, highlight_zip_members, reset_pool
+from result_cache import ResultCache
+from template_cache import TemplateCache
+from text_layer import TextLayerCache
+
+
+def slow_upper(data, words):
+    # Earlier members take longer, so workers finish them out of order
+    time.sleep(float(data.split(b":")[0]))
+    return data.upper()
+
+
+def upper_with_stats(data, words):
+    return data.upper(), {"pages": 1, "matches": {w: 1 for w in words}}
+
+
+def make_zip():
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        zf.writestr("a.pdf", b"0.3:first")
+        zf.writestr("notes.txt", b"kept as is")
+        zf.writestr("b.pdf", b"0.1:second")
+        zf.writestr("c.pdf", b"0:third")
+    return buf.getvalue()
+
+
+def highlight(workers):
+    out = io.BytesIO()
+    with zipfile.ZipFile(io.BytesIO(make_zip())) as zin, zipfile.ZipFile(out, "w") as zout:
+        highlight_zip_members(zin, zout, slow_upper, [], workers)
+    with zipfile.ZipFile(out) as zf:
+        return [(name, zf.read(name)) for name in zf.namelist()]
+
+
+def test_pool_keeps_member_order():
+    try:
+        pooled = highlight(workers=3)
+    finally:
+        reset_pool()
+    assert pooled == highlight(workers=1)
+    assert [name for name, _ in pooled] == ["highlighted_a.pdf", "notes.txt", "highlighted_b.pdf",
+                                            "highlighted_c.pdf"]
+    assert pooled[0][1] == b"0.3:FIRST"
+
+
+def test_pools_are_kept_per_size():
+    try:
+        two = get_pool(2)
+        job = two.submit(slow_upper, b"0.2:busy", [])
+        # Another size gets its own pool instead of shutting down the busy one
+        assert get_pool(3) is not two
+        assert get_pool(2) is two
+        assert job.result() == b"0.2:BUSY"
+
+        reset_pool(two)
+        assert get_pool(2) is not two
+    finally:
+        reset_pool()
+
+
+def test_fill_workers_is_read_at_call_time(tmp_path, monkeypatch):
+    def no_pool(workers):
+        raise AssertionError("FILL_WORKERS = 1 must fill on the calling thread")
+
+    monkeypatch.setattr(processor, "TEXT_LAYERS", TextLayerCache(tmp_path / "text", max_bytes=0))
+    monkeypatch.setattr(processor, "TEMPLATES", TemplateCache(tmp_path / "templates", max_bytes=0))
+    monkeypatch.setattr(processor, "FILL_WORKERS", 1)
+    monkeypatch.setattr(processor, "get_pool", no_pool)
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 120), "Name:", fontsize=10)
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        zf.writestr("claim.pdf", doc.tobytes())
+    with zipfile.ZipFile(io.BytesIO(processor.process_zip(buf.getvalue(), {"name": "Jane"}))) as zf:
+        assert zf.namelist() == ["filled_claim.pdf"]
+
+
+def test_cached_report_counts_one_lookup_per_pdf(tmp_path):
+    cache = ResultCache(tmp_path)
+    reports = []
+    for _ in range(2):
+        report = MatchReport(["POA"])
+        with zipfile.ZipFile(io.BytesIO(make_zip())) as zin, zipfile.ZipFile(io.BytesIO(), "w") as zout:
+            highlight_zip_members(zin, zout, upper_with_stats, ["POA"], workers=1, cache=cache, report=report)
+        reports.append(report.to_dict()["files"])
+    # The stats stored next to each PDF are read without counting a second lookup
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (3, 3)
+    assert [f["matches"] for f in reports[1]] == [{"POA": 1}] * 3
+    assert all(f["cached"] for f in reports[1])
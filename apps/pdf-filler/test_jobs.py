@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Tests for the background job manager
+"""
+
+import io
+import time
+import zipfile
+
+from jobs import DONE, ERROR, JobManager, JobQueueFull, zip_pdf_names
+
+
+def wait(manager, job_id, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status = manager.status(job_id)
+        if status['status'] in (DONE, ERROR):
+            return status
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_job_reports_progress_and_result(tmp_path):
+    manager = JobManager(tmp_path, workers=1)
+
+    def work(out, progress):
+        for name in ("a.pdf", "b.pdf"):
+            out.write(name.encode())
+            progress(name)
+
+    job = manager.submit("highlight", work, ["a.pdf", "b.pdf"], "out.zip")
+    status = wait(manager, job.id)
+    assert status['status'] == DONE
+    assert (status['total'], status['completed']) == (2, 2)
+    assert job.result_path.read_bytes() == b"a.pdfb.pdf"
+
+
+def test_failed_job_keeps_error(tmp_path):
+    manager = JobManager(tmp_path, workers=1)
+
+    def work(out, progress):
+        raise ValueError("broken PDF")
+
+    job = manager.submit("fill", work, ["a.pdf"], "out.zip")
+    status = wait(manager, job.id)
+    assert status['status'] == ERROR and status['error'] == "broken PDF"
+    assert job.result_path is None
+
+
+def test_queue_limit_and_expiry(tmp_path):
+    manager = JobManager(tmp_path, workers=1, max_jobs=1, retention=0)
+    job = manager.submit("fill", lambda out, progress: time.sleep(0.2), [], "out.zip")
+    try:
+        manager.submit("fill", lambda out, progress: None, [], "out.zip")
+        raise AssertionError("second job should have been rejected")
+    except JobQueueFull:
+        pass
+    while job.finished is None:
+        time.sleep(0.01)
+    time.sleep(0.01)
+    assert manager.get(job.id) is None
+    assert not list(tmp_path.glob("*.zip"))
+
+
+def test_zip_pdf_names():
+    mem = io.BytesIO()
+    with zipfile.ZipFile(mem, 'w') as zf:
+        zf.writestr("a.PDF", b"")
+        zf.writestr("notes.txt", b"")
+        zf.writestr("dir/b.pdf", b"")
+    assert zip_pdf_names(mem.getvalue()) == ["a.PDF", "dir/b.pdf"]
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Tests for per-run highlight match reports
+"""
+
+import csv
+import io
+import json
+import zipfile
+
+from match_report import MatchReport, StageTimer
+
+
+def test_report_totals_and_csv():
+    report = MatchReport(["Notary", "Witness", "Notary"], {"save_mode": "fast"})
+    report.add("a.pdf", {"pages": 3, "pages_skipped": 2, "matches": {"Notary": 2, "Witness": 0},
+                         "timings": {"extract": 0.5, "search": 0.25}})
+    report.add("b.pdf", {"pages": 1, "matches": {"Notary": 0, "Witness": 0}, "cached": True})
+    totals = report.to_dict()["totals"]
+    assert totals["matches"] == {"Notary": 2, "Witness": 0}
+    assert (totals["files"], totals["files_with_matches"], totals["cached"]) == (2, 1, 1)
+    assert (totals["pages"], totals["pages_skipped"]) == (4, 2)
+    assert totals["slowest"][0] == {"file": "a.pdf", "seconds": 0.75}
+
+    rows = list(csv.DictReader(io.StringIO(report.to_csv())))
+    assert [r["file"] for r in rows] == ["a.pdf", "b.pdf"]
+    assert rows[0]["Notary"] == "2" and rows[0]["extract_seconds"] == "0.5"
+
+
+def test_report_written_to_zip():
+    report = MatchReport(["POA"])
+    timer = StageTimer()
+    with timer.stage("search"):
+        pass
+    report.add("a.pdf", {"pages": 1, "matches": {"POA": 1}, "timings": timer.timings})
+    mem = io.BytesIO()
+    with zipfile.ZipFile(mem, "w") as zf:
+        report.write_to_zip(zf)
+    with zipfile.ZipFile(mem) as zf:
+        assert zf.namelist() == ["highlight_report.json", "highlight_report.csv"]
+        assert json.loads(zf.read("highlight_report.json"))["files"][0]["matches"] == {"POA": 1}
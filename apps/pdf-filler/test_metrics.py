@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Tests for the in-process metrics registry
+"""
+
+import threading
+
+from metrics import Registry
+
+
+def test_counter_and_callback_render():
+    registry = Registry()
+    pdfs = registry.counter("pdfs_total", "PDFs processed", ("operation",))
+    pdfs.inc(operation="highlight")
+    pdfs.inc(2, operation="fill")
+    registry.callback("jobs", "Jobs per state", lambda: {"queued": 1, "running": 0}, labelname="state")
+    registry.callback("broken", "Fails at scrape time", lambda: 1 / 0)
+    text = registry.render()
+    assert 'pdfs_total{operation="highlight"} 1' in text
+    assert 'pdfs_total{operation="fill"} 2' in text
+    assert 'jobs{state="queued"} 1' in text
+    assert "# TYPE pdfs_total counter" in text
+    assert "# broken unavailable" in text
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    latency = registry.histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1))
+    for value in (0.05, 0.5, 0.5, 5):
+        latency.observe(value, route="/x")
+    text = registry.render()
+    assert 'latency_seconds_bucket{route="/x",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{route="/x",le="1"} 3' in text
+    assert 'latency_seconds_bucket{route="/x",le="+Inf"} 4' in text
+    assert 'latency_seconds_count{route="/x"} 4' in text
+
+
+def test_counter_is_thread_safe():
+    registry = Registry()
+    counter = registry.counter("hits_total", "Hits")
+
+    def work():
+        for _ in range(10000):
+            counter.inc()
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert "hits_total 40000" in registry.render()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Tests for the highlight save strategies
+"""
+
+from pathlib import Path
+
+import fitz  # PyMuPDF
+import pytest
+
+from pdf_output import SAVE_MODES, document_bytes, open_pdf, save_pdf
+
+
+def make_pdf():
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), "Signature of Notary Public", fontsize=11)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def test_every_mode_keeps_the_highlight():
+    original = make_pdf()
+    for mode in SAVE_MODES:
+        with open_pdf(original, mode) as doc:
+            page = doc[0]
+            page.add_highlight_annot(page.search_for("Notary")[0]).update()
+            out = save_pdf(doc, mode)
+            assert doc.is_closed
+        assert len(list(fitz.open(stream=out, filetype="pdf")[0].annots())) == 1, mode
+
+
+def test_incremental_appends_to_original_bytes():
+    original = make_pdf()
+    with open_pdf(original, "incremental") as doc:
+        path = doc.name
+        page = doc[0]
+        page.add_highlight_annot(page.search_for("Notary")[0]).update()
+        out = save_pdf(doc, "incremental")
+    assert out.startswith(original) and len(out) > len(original)
+    assert not Path(path).exists()
+
+
+def test_failed_run_closes_document_and_removes_temp_file():
+    with pytest.raises(RuntimeError):
+        with open_pdf(make_pdf(), "incremental") as doc:
+            path = doc.name
+            raise RuntimeError("annotation failed")
+    assert doc.is_closed
+    assert not Path(path).exists()
+
+
+def test_document_bytes_matches_tobytes():
+    doc = fitz.open(stream=make_pdf(), filetype="pdf")
+    doc[0].insert_text((72, 100), "Jane Claimant", fontsize=10)
+    # Identical apart from the second /ID entry, which MuPDF makes up on every save
+    strip_id = lambda data: data[:data.rindex(b"/ID")]
+    assert strip_id(document_bytes(doc)) == strip_id(doc.tobytes())
+    assert "Jane Claimant" in fitz.open(stream=document_bytes(doc), filetype="pdf")[0].get_text()
+
+
+def test_document_bytes_decrypts_like_tobytes():
+    src = fitz.open(stream=make_pdf(), filetype="pdf")
+    encrypted = src.tobytes(encryption=fitz.PDF_ENCRYPT_AES_256, owner_pw="owner", permissions=fitz.PDF_PERM_PRINT)
+    doc = fitz.open(stream=encrypted, filetype="pdf")
+    assert doc.metadata["encryption"]
+    out = fitz.open(stream=document_bytes(doc), filetype="pdf")
+    assert out.metadata["encryption"] is None
+    assert len(document_bytes(doc)) == len(doc.tobytes())
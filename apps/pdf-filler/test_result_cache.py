@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Tests for the content-addressed result cache
+"""
+
+import os
+import time
+
+from result_cache import ResultCache
+
+
+def test_key_ignores_dict_order_but_not_content():
+    a = ResultCache.make_key('fill', b'%PDF', {'values': {'name': 'A', 'email': 'a@b.co'}})
+    b = ResultCache.make_key('fill', b'%PDF', {'values': {'email': 'a@b.co', 'name': 'A'}})
+    c = ResultCache.make_key('fill', b'%PDF', {'values': {'name': 'B', 'email': 'a@b.co'}})
+    assert a == b and a != c
+    assert a != ResultCache.make_key('highlight', b'%PDF', {'values': {'name': 'A', 'email': 'a@b.co'}})
+
+
+def test_hits_misses_and_lru_eviction(tmp_path):
+    cache = ResultCache(tmp_path, max_bytes=250)
+    assert cache.get('aa01') is None
+    cache.put('aa01', b'x' * 100)
+    cache.put('bb02', b'y' * 100)
+    # Make the first entry clearly older, then touch it so the second becomes least recent
+    past = time.time() - 60
+    os.utime(tmp_path / 'aa' / 'aa01', (past, past))
+    os.utime(tmp_path / 'bb' / 'bb02', (past + 1, past + 1))
+    assert cache.get('aa01') == b'x' * 100
+
+    cache.put('cc03', b'z' * 100)
+    assert cache.get('bb02') is None
+    assert cache.get('aa01') is not None and cache.get('cc03') is not None
+
+    stats = cache.stats()
+    assert stats['evictions'] == 1 and stats['bytes'] == 200
+    assert stats['hits'] == 3 and stats['misses'] == 2
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Tests for the in-memory page text index used by blank-space and overlap probes
+"""
+
+from collections import Counter
+
+import fitz  # PyMuPDF
+
+from spatial_index import PageIndex
+
+
+def make_page():
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 100), "Daytime Phone:", fontsize=10)
+    page.insert_text((150, 100), "_" * 30, fontsize=10)
+    page.insert_text((72, 130), "Email: jane@example.com", fontsize=10)
+    page.insert_text((72, 144), "Current Address: 123 Main Street", fontsize=10)
+    return doc, page
+
+
+def test_text_in_matches_clipped_extraction():
+    doc, page = make_page()
+    index = PageIndex.from_page(page)
+    probes = [
+        fitz.Rect(150, 90, 320, 104),   # the blank after the phone label
+        fitz.Rect(100, 120, 400, 134),  # the email line only
+        fitz.Rect(60, 120, 400, 150),   # both lines
+        fitz.Rect(110, 126, 160, 150),  # pieces of two lines
+        fitz.Rect(400, 90, 500, 150),   # empty area
+    ]
+    for rect in probes:
+        assert index.text_in(rect) == page.get_text("text", clip=rect), rect
+    doc.close()
+
+
+def make_dense_page():
+    doc = fitz.open()
+    page = doc.new_page()
+    labels = ["Name of Claimant:", "Daytime Phone:", "Email Address:", "Social Security Number:",
+              "Date of Birth:", "Current Address:", "Signature of Notary", "Employer Identification No."]
+    y = 60
+    for i in range(40):
+        size = (8, 9, 10, 11, 12)[i % 5]
+        page.insert_text((40 + (i % 3) * 10, y), labels[i % len(labels)], fontsize=size)
+        page.insert_text((260, y), "_" * 25 if i % 2 else "jane@example.com 123 Main St.", fontsize=size)
+        y += size + 6
+    return doc, page
+
+
+def test_text_in_approximates_clipped_extraction_on_a_dense_page():
+    doc, page = make_dense_page()
+    index = PageIndex.from_page(page)
+    probes = [fitz.Rect(x, y, x + w, y + h) for x in range(20, 560, 40) for y in range(40, 760, 20)
+              for w, h in ((60, 10), (150, 14), (220, 30))]
+    differing = 0
+    for rect in probes:
+        ours, mupdf = index.text_in(rect), page.get_text("text", clip=rect)
+        if " ".join(ours.split()) == " ".join(mupdf.split()):
+            continue
+        differing += 1
+        # Only glyphs cut by the probe's edges differ (at most one per side of a line), never blankness
+        assert bool(ours.strip()) == bool(mupdf.strip()), rect
+        ours_chars, mupdf_chars = (Counter("".join(text.split())) for text in (ours, mupdf))
+        changed = sum(((ours_chars - mupdf_chars) + (mupdf_chars - ours_chars)).values())
+        assert changed <= 2 * max(len(ours.splitlines()), len(mupdf.splitlines())), rect
+    assert differing <= 0.1 * len(probes)
+    doc.close()
+
+
+def test_underscores_below_probe_band_are_blank():
+    doc, page = make_page()
+    index = PageIndex.from_page(page)
+    # Placement check band: from one font size above the baseline to just above the underscores
+    rect = fitz.Rect(160, 90, 300, 100.5)
+    assert index.text_in(rect).strip() == page.get_text("text", clip=rect).strip() == ""
+    doc.close()
+
+
+def test_words_in_returns_intersecting_words():
+    doc, page = make_page()
+    index = PageIndex.from_page(page)
+    words = [w[4] for w in index.words_in(fitz.Rect(60, 125, 300, 132))]
+    assert words == ["Email:", "jane@example.com"]
+    doc.close()
+
+
+def test_free_intervals_skip_text_on_the_band():
+    doc, page = make_page()
+    index = PageIndex.from_page(page)
+    end = 72 + fitz.get_text_length("Email: jane@example.com", fontsize=10)
+    gaps = index.free_intervals(120, 132, 60, 400)
+    assert gaps[0][0] == 60 and 72 <= gaps[0][1] <= 73
+    assert gaps[-1][1] == 400 and end - 2 < gaps[-1][0] <= end
+    # Between the glyphs there are only narrow gaps
+    assert all(x1 - x0 < 5 for x0, x1 in gaps[1:-1])
+    doc.close()
+
+
+def test_safe_position_skips_existing_text():
+    from processor import find_safe_text_position
+
+    doc, page = make_page()
+    width = fitz.get_text_length("jane@example.com", fontsize=10)
+    # "Email:" plus 50pt lands inside the address text, so the value goes right after it
+    x, y = find_safe_text_position(page, 72, 130, "jane@example.com", 10)
+    assert y == 130
+    assert x >= 72 + fitz.get_text_length("Email: jane@example.com", fontsize=10) - 2
+    assert page.get_text("text", clip=fitz.Rect(x, 120, x + width, 132)).strip() == ""
+    # Text that fits before the page edge nowhere goes into the widest gap
+    x, _ = find_safe_text_position(page, 72, 130, "x" * 200, 10)
+    assert page.get_text("text", clip=fitz.Rect(x, 120, page.rect.width, 132)).strip() == ""
+    doc.close()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Tests for template fingerprints and the cached field anchors
+"""
+
+import fitz  # PyMuPDF
+
+import processor
+from document_context import DocumentContext
+from template_cache import TemplateCache, template_fingerprint
+from text_layer import TextLayerCache
+
+
+def make_form(claimant="", label_y=100):
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, label_y), "Name:", fontsize=10)
+    page.insert_text((72, label_y + 30), "Email:", fontsize=10)
+    if claimant:
+        page.insert_text((130, label_y), claimant, fontsize=10)
+    return doc
+
+
+def fingerprint(doc):
+    labels = [w for w in doc[0].get_text("words") if w[4].endswith(":")]
+    return template_fingerprint([(doc[0].rect.width, doc[0].rect.height, labels)])
+
+
+def test_fingerprint_ignores_filled_values_but_not_layout():
+    blank, filled, moved = make_form(), make_form("Jane Claimant"), make_form(label_y=160)
+    assert fingerprint(blank) == fingerprint(filled)
+    assert fingerprint(blank) != fingerprint(moved)
+
+
+def test_labels_round_trip_per_field_set(tmp_path):
+    cache = TemplateCache(tmp_path / "templates")
+    labels = [{"page": 0, "label_bbox": [72, 92, 100, 102], "text": "Name:", "field_type": "name",
+               "confidence": 100.0}]
+    cache.put("abc", ["name", "email"], labels)
+    assert cache.get("abc", ["email", "name"]) == labels
+    assert cache.get("abc", ["name"]) is None
+    assert cache.get("def", ["name", "email"]) is None
+
+
+def test_config_change_invalidates_entries(tmp_path):
+    config = tmp_path / "mapping.yaml"
+    config.write_text("fields: []\n")
+    cache = TemplateCache(tmp_path / "templates", config_files=[config])
+    cache.put("abc", ["name"], [])
+    assert cache.get("abc", ["name"]) == []
+    config.write_text("fields:\n  - key: name\n")
+    assert cache.get("abc", ["name"]) is None
+
+
+def make_phone_form(phone=""):
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 100), "Name:", fontsize=10)
+    page.insert_text((72, 130), "Phone:", fontsize=10)
+    if phone:
+        page.insert_text((110, 130), phone, fontsize=10)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def test_replayed_template_rechecks_each_copy(tmp_path, monkeypatch):
+    monkeypatch.setattr(processor, "TEXT_LAYERS", TextLayerCache(tmp_path / "text", max_bytes=0))
+    monkeypatch.setattr(processor, "TEMPLATES", TemplateCache(tmp_path / "templates"))
+    values = {"name": "Jane Claimant", "phone": "5550001111"}
+
+    with DocumentContext(make_phone_form("(555) 123-4567"), "filled.pdf") as ctx:
+        prefilled = processor.find_field_anchors(ctx, values)
+    assert prefilled["name"] and not prefilled["phone"]
+
+    with DocumentContext(make_phone_form(), "blank.pdf") as ctx:
+        blank = processor.find_field_anchors(ctx, values)
+    assert processor.TEMPLATES.stats()["hits"] == 1
+    assert blank["name"] and blank["phone"]
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Tests for the cached per-document text layers
+"""
+
+import fitz  # PyMuPDF
+
+import processor
+import text_layer
+from text_layer import DocumentLayout, TextLayerCache
+
+
+def make_doc():
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), "Name of Claimant: ______", fontsize=11)
+    page.insert_text((72, 100), "Social Security Number", fontsize=9)
+    doc.new_page().insert_text((72, 72), "Signature of Notary", fontsize=11)
+    return doc
+
+
+def test_layout_words_match_get_text():
+    doc = make_doc()
+    layout = DocumentLayout.extract(doc)
+    for page, page_layout in zip(doc, layout.pages):
+        expected = page.get_text("words")
+        got = page_layout.words()
+        assert [w[4:] for w in got] == [w[4:] for w in expected]
+        for g, e in zip(got, expected):
+            assert all(abs(a - b) < 0.01 for a, b in zip(g[:4], e[:4]))
+    doc.close()
+
+
+def test_layout_round_trips_and_cache_hits(tmp_path):
+    doc = make_doc()
+    pdf_bytes = doc.tobytes()
+    restored = DocumentLayout.from_bytes(DocumentLayout.extract(doc).to_bytes())
+    assert [p.text() for p in restored.pages] == [p.text() for p in DocumentLayout.extract(doc).pages]
+
+    cache = TextLayerCache(tmp_path)
+    first = cache.load(doc, pdf_bytes)
+    second = cache.load(doc, pdf_bytes)
+    assert cache.stats()["hits"] == 1
+    assert second[1].words() == first[1].words()
+    doc.close()
+
+
+def test_default_store_is_shared():
+    # A second instance on DEFAULT_DIR would track its own size and evict the other's entries
+    assert processor.TEXT_LAYERS is text_layer.TEXT_LAYERS
+    assert text_layer.TEXT_LAYERS.store.root == text_layer.DEFAULT_DIR
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Tests for the single-pass phrase matcher used by highlighting
+"""
+
+import fitz  # PyMuPDF
+import pytest
+
+from text_layer import PageLayout
+from text_search import (PageText, PatternMatcher, PhraseAutomaton, PhraseMatcher, build_matcher,
+                         page_search_text)
+
+
+def make_page():
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), "Signature of Notary Public here notary", fontsize=11)
+    page.insert_text((72, 100), "Signature of", fontsize=11)
+    page.insert_text((72, 114), "Claimant", fontsize=11)
+    page.insert_text((72, 140), "NOTARIZED by POA", fontsize=11)
+    return doc, page
+
+
+def test_automaton_finds_overlapping_phrases():
+    automaton = PhraseAutomaton(["notary", "notary public", "public"])
+    found = {(s, e, automaton.phrases[i]) for s, e, i in automaton.iter_matches("a notary public")}
+    assert found == {(2, 8, "notary"), (2, 15, "notary public"), (9, 15, "public")}
+
+
+def test_matcher_prefers_exact_case():
+    doc, page = make_page()
+    hits = PhraseMatcher(["Notary", "notarized"]).find(PageText.from_page(page))
+    page_text = PageText.from_page(page)
+    # "Notary" occurs with exact casing once, so the lower-case "notary" is dropped
+    assert [page_text.text[s:e] for s, e in hits["Notary"]] == ["Notary"]
+    # No exact-case "notarized" exists, so the case-insensitive hit is kept
+    assert [page_text.text[s:e] for s, e in hits["notarized"]] == ["NOTARIZED"]
+    doc.close()
+
+
+def test_matcher_rects_match_search_for():
+    doc, page = make_page()
+    results = dict(PhraseMatcher(["Signature of Claimant", "POA"]).search_page(page))
+    for phrase in ("Signature of Claimant", "POA"):
+        expected = page.search_for(phrase)
+        assert len(results[phrase]) == len(expected)
+        for got, want in zip(results[phrase], expected):
+            assert abs(got.x0 - want.x0) < 0.5 and abs(got.x1 - want.x1) < 0.5
+            assert abs(got.y0 - want.y0) < 0.5 and abs(got.y1 - want.y1) < 0.5
+    doc.close()
+
+
+def test_matcher_ignores_missing_words():
+    doc, page = make_page()
+    assert PhraseMatcher(["Witness", "Legal Guardian"]).search_page(page) == []
+    doc.close()
+
+
+def test_prefilter_skips_pages_without_candidates():
+    doc, page = make_page()
+    blank = doc.new_page()
+    blank.insert_text((72, 72), "General instructions for this form", fontsize=11)
+    matcher = PhraseMatcher(["Signature of Claimant", "Witness", "notary"])
+    results = [matcher.search_page(p) for p in doc]
+    assert [phrase for phrase, _ in results[0]] == ["Signature of Claimant", "notary"]
+    assert results[1] == []
+    assert (matcher.pages_scanned, matcher.pages_skipped, matcher.phrases_skipped) == (2, 1, 4)
+    doc.close()
+
+
+def test_direct_search_matches_automaton():
+    doc, page = make_page()
+    matcher = PhraseMatcher(["notary", "Signature of", "of claimant", "no"])
+    layout = PageLayout.from_page(page)
+    page_text = PageText(layout)
+    candidates = matcher.candidates(layout)
+    assert candidates == [0, 1, 2, 3]
+    assert matcher.find(page_text, candidates) == matcher.find(page_text)
+    doc.close()
+
+
+def test_pattern_matcher_combines_patterns_and_phrases():
+    doc, page = make_page()
+    page.insert_text((72, 170), "Signature of Co-Claimant", fontsize=11)
+    matcher = PatternMatcher(phrases=["Notary", "POA"], patterns=[r"signature of (co-)?claimant"])
+    results = matcher.search_page(page)
+    hits = {}
+    for phrase, rects in results:
+        hits.setdefault(phrase, []).append(rects)
+    # The pattern crosses the line break after "Signature of" (one rect per line)
+    assert [len(rects) for rects in hits["signature of (co-)?claimant"]] == [2, 1]
+    # Whole words only: "NOTARIZED" is not a hit for "Notary"
+    assert len(hits["Notary"]) == 2
+    assert len(hits["POA"]) == 1
+    doc.close()
+
+
+def test_pattern_offsets_map_to_search_for_boxes():
+    doc, page = make_page()
+    layout = PageLayout.from_page(page)
+    page_text = PageText(layout)
+    assert page_text.folded.startswith(page_search_text(layout))
+    results = PatternMatcher(patterns=[r"not\w+ public"]).search_page(page)
+    expected = page.search_for("Notary Public")
+    assert len(results) == 1
+    got = results[0][1][0]
+    assert abs(got.x0 - expected[0].x0) < 0.5 and abs(got.x1 - expected[0].x1) < 0.5
+    doc.close()
+
+
+def test_pattern_matcher_rejects_invalid_regex():
+    with pytest.raises(ValueError, match="Invalid pattern"):
+        PatternMatcher(patterns=["signature (of"])
+    assert isinstance(build_matcher(["Notary"]), PhraseMatcher)
+    with pytest.raises(ValueError):
+        build_matcher(["Notary"], mode="fuzzy")
+
+
+@pytest.mark.parametrize("patterns, reason", [
+    ([r"(?i)notary"], "global flags"),
+    ([r"(a)\1"], "backreferences"),
+    ([r"(?P<who>claimant)", r"(?P<who>notary)"], "named groups"),
+])
+def test_pattern_matcher_rejects_uncombinable_patterns(patterns, reason):
+    # Each compiles on its own but not as an alternative of the combined regex
+    with pytest.raises(ValueError, match=reason):
+        PatternMatcher(patterns=patterns)
+
+
+def test_pattern_matcher_keeps_scoped_flags_and_escapes():
+    matcher = PatternMatcher(patterns=[r"(?s:notary.public)", r"\\1", r"[(?i)]x"])
+    assert matcher.find("Notary Public") == {"(?s:notary.public)": [(0, 13)]}
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Tests for spooled upload ingestion and ZIP size limits
+"""
+
+import io
+import zipfile
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+from uploads import UploadTooLarge, ZipLimits, open_zip, spool_upload
+
+
+def make_zip(members):
+    mem = io.BytesIO()
+    with zipfile.ZipFile(mem, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    return mem.getvalue()
+
+
+def test_spooled_upload_is_read_in_place():
+    data = make_zip({"a.pdf": b"%PDF-1.4 a", "b.pdf": b"%PDF-1.4 b"})
+    upload = spool_upload(FileStorage(io.BytesIO(data), "x.zip"), max_size=16)
+    assert upload._rolled  # larger than max_size, so it lives on disk
+    with upload, open_zip(upload) as zf:
+        limits = ZipLimits()
+        assert [limits.read(zf, info) for info in zf.infolist()] == [b"%PDF-1.4 a", b"%PDF-1.4 b"]
+        assert limits.total == 20
+
+
+def test_member_and_total_limits():
+    data = make_zip({"a.pdf": b"x" * 1000, "b.pdf": b"y" * 1000})
+    with open_zip(data) as zf:
+        with pytest.raises(UploadTooLarge):
+            ZipLimits(max_member=999).check_declared(zf)
+        with pytest.raises(UploadTooLarge):
+            ZipLimits(max_total=1999).check_declared(zf)
+        limits = ZipLimits(max_total=1500)
+        limits.read(zf, zf.infolist()[0])
+        with pytest.raises(UploadTooLarge):
+            limits.read(zf, zf.infolist()[1])
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Tests for the single-pass PyMuPDF widget filler
+"""
+
+import io
+
+import fitz  # PyMuPDF
+
+import processor
+from field_names import FieldNameIndex
+from widget_filler import fill_widgets
+
+INDEX = FieldNameIndex({"name": ["claimant_name"], "email": ["email"], "phone": ["phone"]})
+
+
+def add_field(page, name, y, value=""):
+    widget = fitz.Widget()
+    widget.field_name = name
+    widget.field_type = fitz.PDF_WIDGET_TYPE_TEXT
+    widget.rect = fitz.Rect(150, y, 400, y + 14)
+    widget.field_value = value
+    page.add_widget(widget)
+
+
+def make_form():
+    doc = fitz.open()
+    first = doc.new_page()
+    add_field(first, "Claimant_Name_1", 100)
+    add_field(first, "Phone", 130, "555-201-3344")
+    add_field(doc.new_page(), "email", 100)
+    add_field(doc.new_page(), "Comments", 100)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def field_values(data):
+    return {w.field_name: w.field_value for page in fitz.open(stream=data, filetype="pdf") for w in page.widgets()}
+
+
+def test_fills_every_page_and_keeps_valid_values():
+    doc = fitz.open(stream=make_form(), filetype="pdf")
+    values = {"name": "Jane Claimant", "email": "jane@example.com", "phone": "555-000-0000"}
+    filled = fill_widgets(doc, values, INDEX, processor.is_acroform_field_already_filled)
+    assert filled == ["Claimant_Name_1", "email"]
+    assert field_values(doc.tobytes()) == {
+        "Claimant_Name_1": "Jane Claimant", "Phone": "555-201-3344", "email": "jane@example.com", "Comments": "",
+    }
+
+
+def test_widget_and_pypdf_engines_agree():
+    values = {"name": "Jane Claimant", "email": "jane@example.com"}
+    results = []
+    for fill in (processor.fill_acroform_widgets, processor.fill_acroform):
+        out = io.BytesIO()
+        with processor.DocumentContext(make_form(), "form.pdf") as ctx:
+            assert fill(ctx, out, values, INDEX)
+        results.append(field_values(out.getvalue()))
+    assert results[0] == results[1]
+    assert results[0]["email"] == "jane@example.com"
@@ -196,7 +196,7 @@ def fill_pdf_fields(pdf_path, field_values):
         
         # Try to fill form fields first (AcroForm)
         try:
-            if hasattr(doc, 'is_form') and doc.is_form:
+            if doc.is_form_pdf:
                 logger.info("PDF has form fields - attempting to fill them")
                 success = fill_form_fields(doc, field_values)
                 if success:
@@ -227,9 +227,14 @@ def fill_pdf_fields(pdf_path, field_values):
 def fill_form_fields(doc, field_values):
     """Fill AcroForm fields in the PDF."""
     try:
-        # Get form fields
-        form = doc.get_form()
-        fields = form.get_fields()
+        # Collect the widgets of every page in one pass, by field name
+        # (the pages are kept so their widgets stay bound until they are updated)
+        pages = list(doc)
+        fields = {}
+        for page in pages:
+            for widget in page.widgets():
+                if widget.field_name:
+                    fields.setdefault(widget.field_name, []).append(widget)
         
         logger.info(f"Found {len(fields)} form fields")
         
@@ -259,7 +264,10 @@ def fill_form_fields(doc, field_values):
                 for field_name in potential_names:
                     if field_name in fields:
                         try:
-                            form.set_text(field_name, value)
+                            # A field can have a widget on several pages
+                            for widget in fields[field_name]:
+                                widget.field_value = value
+                                widget.update()
                             logger.info(f"✅ Filled form field '{field_name}' with '{value}'")
                             filled_count += 1
                             break
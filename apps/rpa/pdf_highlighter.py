@@ -7,6 +7,7 @@ and creates highlighted versions that are re-zipped for download.
 """
 
 import os
+import sys
 import logging
 from pathlib import Path
 from datetime import datetime
@@ -29,6 +30,24 @@ try:
 except ImportError:
     PYMUPDF_AVAILABLE = False
 
+# Helpers shared with the pdf-filler app
+sys.path.append(str(Path(__file__).resolve().parent.parent / 'pdf-filler' / 'app'))
+
+# Persistent text layers (skips re-extraction on re-runs)
+try:
+    from text_layer import TEXT_LAYERS
+    TEXT_LAYERS_AVAILABLE = True
+except ImportError:
+    TEXT_LAYERS = None
+    TEXT_LAYERS_AVAILABLE = False
+
+# Coalesced multi-quad highlights (one annotation per page instead of one per span)
+try:
+    from annotations import add_highlight
+    COALESCE_AVAILABLE = True
+except ImportError:
+    COALESCE_AVAILABLE = False
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -124,13 +143,14 @@ def find_pdf_files(directory: Path) -> List[Path]:
     logger.info(f"Found {len(pdf_files)} PDF files")
     return pdf_files
 
-def fill_name_fields(doc, name_text: str):
+def fill_name_fields(doc, name_text: str, layout=None):
     """
     Fill in name fields in a PDF document.
     
     Args:
         doc: PyMuPDF document object
         name_text (str): Name to fill in the fields
+        layout: Optional cached text layout of doc (see text_layer.py)
     """
     try:
         # Track filled fields to avoid duplicates
@@ -141,7 +161,10 @@ def fill_name_fields(doc, name_text: str):
             page = doc[page_num]
             
             # Get text blocks to find name fields
-            text_blocks = page.get_text("dict")["blocks"]
+            if layout is not None:
+                text_blocks = layout[page_num].blocks()
+            else:
+                text_blocks = page.get_text("dict")["blocks"]
             
             for block in text_blocks:
                 if "lines" in block:
@@ -445,6 +468,23 @@ def get_highlighting_profile(profile_name: str = None) -> dict:
             "description": "Default highlighting profile"
         }
 
+def page_keyword_candidates(text_blocks, keywords: List[str]) -> List[str]:
+    """
+    Keywords that can possibly match a span on this page, in their original order.
+    
+    A keyword matches a span when it occurs in the span text or all of its words do,
+    so every word of it must occur somewhere in the page text. Pages where this
+    leaves nothing can be skipped without looking at individual spans.
+    """
+    page_text = "\n".join(
+        span["text"].lower()
+        for block in text_blocks if "lines" in block
+        for line in block["lines"]
+        for span in line["spans"]
+    )
+    return [keyword for keyword in keywords if all(part in page_text for part in keyword.split())]
+
+
 def highlight_pdf_pymupdf(pdf_path: Path, output_path: Path, highlight_text: str = None, name_text: str = None, profile: str = None, signature_options: str = None) -> bool:
     """
     Add highlights to a PDF using PyMuPDF.
@@ -637,13 +677,29 @@ def highlight_pdf_pymupdf(pdf_path: Path, output_path: Path, highlight_text: str
         else:
             logger.info("No signature options provided")
         
+        # Load the page text layouts once (from the sidecar cache when available)
+        layout = None
+        if TEXT_LAYERS_AVAILABLE:
+            try:
+                layout = TEXT_LAYERS.load(doc)
+            except Exception as e:
+                logger.warning(f"Text layer cache unavailable, extracting pages directly: {e}")
+        
+        # Prefilter counters: pages with no possible match and keyword checks dropped per page
+        pages_skipped = 0
+        keywords_skipped = 0
+        page_count = len(doc)
+        
         # Process each page
         for page_num in range(len(doc)):
             page = doc[page_num]
             logger.info(f"Processing page {page_num + 1}/{len(doc)}")
             
             # Get text blocks (potential highlighting targets)
-            text_blocks = page.get_text("dict")["blocks"]
+            if layout is not None:
+                text_blocks = layout[page_num].blocks()
+            else:
+                text_blocks = page.get_text("dict")["blocks"]
             
             # Debug: Show some sample text from this page
             sample_texts = []
@@ -658,6 +714,17 @@ def highlight_pdf_pymupdf(pdf_path: Path, output_path: Path, highlight_text: str
             if sample_texts:
                 logger.info(f"Sample texts from page {page_num + 1}: {sample_texts}")
             
+            # Only look at spans for keywords that can occur on this page
+            page_keywords = page_keyword_candidates(text_blocks, keywords)
+            keywords_skipped += len(keywords) - len(page_keywords)
+            if not page_keywords:
+                pages_skipped += 1
+                logger.debug(f"No keywords possible on page {page_num + 1}, skipping")
+                continue
+            
+            # Rects of matching spans, annotated together once the page is done
+            page_rects = []
+            
             for block in text_blocks:
                 if "lines" in block:
                     for line in block["lines"]:
@@ -680,10 +747,10 @@ def highlight_pdf_pymupdf(pdf_path: Path, output_path: Path, highlight_text: str
                                 continue  # Skip this text
                             
                             # Debug logging for troubleshooting
-                            if any(keyword in text for keyword in keywords):
-                                logger.debug(f"Potential match found - Text: '{text}', Keywords: {keywords}")
+                            if any(keyword in text for keyword in page_keywords):
+                                logger.debug(f"Potential match found - Text: '{text}', Keywords: {page_keywords}")
                             
-                            for keyword in keywords:
+                            for keyword in page_keywords:
                                 # Check for exact word match
                                 text_words = text.split()
                                 if keyword in text_words:
@@ -718,24 +785,29 @@ def highlight_pdf_pymupdf(pdf_path: Path, output_path: Path, highlight_text: str
                             
                             if should_highlight:
                                 # Create highlight rectangle
-                                rect = fitz.Rect(span["bbox"])
-                                
-                                # Add yellow highlight
-                                highlight = page.add_highlight_annot(rect)
-                                highlight.set_colors(stroke=[1, 1, 0])  # Yellow
-                                highlight.set_opacity(0.7)  # 70% opacity for better visibility
-                                highlight.update()
+                                page_rects.append(fitz.Rect(span["bbox"]))
                                 logger.info(f"✅ Highlighted: '{text}' (matched: '{matched_keyword}')")
                             else:
                                 # Debug: Show when we find text that contains keywords but doesn't match exactly
-                                for keyword in keywords:
+                                for keyword in page_keywords:
                                     if keyword in text:
                                         logger.debug(f"Found keyword '{keyword}' in text '{text}' but didn't highlight (exact match failed)")
+            
+            if page_rects and COALESCE_AVAILABLE:
+                # Adjacent spans on a line merge into one multi-quad highlight
+                add_highlight(page, page_rects, stroke=(1, 1, 0), opacity=0.7)  # Yellow, 70% opacity
+            else:
+                for rect in page_rects:
+                    # Add yellow highlight
+                    highlight = page.add_highlight_annot(rect)
+                    highlight.set_colors(stroke=[1, 1, 0])  # Yellow
+                    highlight.set_opacity(0.7)  # 70% opacity for better visibility
+                    highlight.update()
         
         # Fill in name fields if name_text is provided
         if name_text:
             logger.info(f"Filling in name fields with: '{name_text}'")
-            fill_name_fields(doc, name_text)
+            fill_name_fields(doc, name_text, layout)
         
         # Save the highlighted PDF
         doc.save(str(output_path))
@@ -751,6 +823,8 @@ def highlight_pdf_pymupdf(pdf_path: Path, output_path: Path, highlight_text: str
         if signature_options:
             logger.info(f"Used signature options: '{signature_options}'")
         logger.info(f"Total keywords searched for: {len(keywords)}")
+        logger.info(f"Prefilter skipped {pages_skipped} of {page_count} pages "
+                    f"and {keywords_skipped} page/keyword checks")
         logger.info(f"Keywords list: {keywords}")
         return True
         
@@ -0,0 +1,5 @@
+"""
+Performance benchmarks for highlighting and form filling.
+
+Run ``python -m benchmarks`` from the repository root; see bench.py for options.
+"""
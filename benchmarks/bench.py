@@ -0,0 +1,254 @@
+"""
+Benchmark runner.
+
+Each case times one entry point over the synthetic corpus with the on-disk caches
+pointed at a throwaway directory and disabled, so every repeat does the cold-path work.
+Results (median of the repeats) are compared with a stored baseline and any case
+that got slower than the threshold is reported as a regression.
+
+    python -m benchmarks                      # run and compare with benchmarks/baseline.json
+    python -m benchmarks --save-baseline      # run and store the results as the new baseline
+    python -m benchmarks --corpus large --only highlight_pdf --repeat 3
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+for path in (REPO_ROOT, REPO_ROOT / 'apps' / 'pdf-filler' / 'app', REPO_ROOT / 'apps' / 'rpa'):
+    if str(path) not in sys.path:
+        sys.path.append(str(path))
+
+from benchmarks.corpus import PRESETS, corpus_zip, generate_corpus  # noqa: E402
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / 'baseline.json'
+
+# A case is slower than its baseline when it exceeds it by this fraction and by at least MIN_DELTA_MS
+DEFAULT_THRESHOLD = 0.15
+MIN_DELTA_MS = 2.0
+
+FILL_VALUES = {
+    'name': 'Jane Q. Claimant',
+    'phone': '555-201-3344',
+    'address': '123 Main Street, Springfield, IL 62701',
+    'email': 'jane.claimant@example.com',
+    'dob': '01/02/1970',
+    'ssn': '123-45-6789',
+}
+
+
+@contextlib.contextmanager
+def quiet():
+    """Silence prints and log output of the code under test."""
+    from loguru import logger
+    logger.remove()
+    previous = logging.root.manager.disable
+    logging.disable(logging.CRITICAL)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield
+    finally:
+        logging.disable(previous)
+        logger.add(sys.stderr)
+
+
+def disable_caches(cache_dir: Path):
+    """Point every module-level cache at cache_dir with no capacity, so nothing is reused."""
+    from acroform_probe import AcroFormProbeCache
+    from result_cache import ResultCache
+    from template_cache import TemplateCache
+    from text_layer import TextLayerCache
+    import processor
+    import unified_app
+    import pdf_highlighter
+
+    text_layers = TextLayerCache(cache_dir / 'text', max_bytes=0)
+    processor.TEXT_LAYERS = text_layers
+    processor.ACROFORM_PROBES = AcroFormProbeCache(max_entries=0)
+    processor.TEMPLATES = TemplateCache(cache_dir / 'processor_templates', max_bytes=0,
+                                        config_files=processor.TEMPLATES.config_files)
+    unified_app.text_layers = text_layers
+    unified_app.result_cache = ResultCache(cache_dir / 'unified_results', max_bytes=0)
+    if pdf_highlighter.TEXT_LAYERS is not None:
+        pdf_highlighter.TEXT_LAYERS = text_layers
+
+
+def build_cases(corpus: List[Tuple[str, bytes]], work_dir: Path,
+                acroform_corpus: List[Tuple[str, bytes]] = ()) -> Dict[str, Callable[[], None]]:
+    """
+    name -> callable running one full pass of that case over the corpus.
+    The AcroForm fill cases run over acroform_corpus, the same documents with real form fields.
+    """
+    import processor
+    from document_context import DocumentContext
+    import unified_app
+    import pdf_highlighter
+
+    pdf_paths = []
+    for name, data in corpus:
+        path = work_dir / name
+        path.write_bytes(data)
+        pdf_paths.append(path)
+    zip_bytes = corpus_zip(corpus)
+    out_dir = work_dir / 'out'
+    out_dir.mkdir(exist_ok=True)
+    words = unified_app.COMMON_HIGHLIGHTS
+
+    def highlight_pdf():
+        for _, data in corpus:
+            unified_app.highlight_pdf(data, words)
+
+    def process_highlight_zip():
+        unified_app.process_highlight_zip(zip_bytes, words)
+
+    def fill_pdf():
+        for path in pdf_paths:
+            processor.fill_pdf(path, out_dir / path.name, dict(FILL_VALUES))
+
+    def search_labels_positions_enhanced():
+        for path in pdf_paths:
+            processor.search_labels_positions_enhanced(path, FILL_VALUES)
+
+    def fill_acroform_with(fill):
+        def case():
+            for name, data in acroform_corpus:
+                with DocumentContext(data, name) as ctx:
+                    fill(ctx, io.BytesIO(), FILL_VALUES, processor.MAPPING_FILE.index)
+        return case
+
+    def highlight_pdf_pymupdf():
+        for path in pdf_paths:
+            pdf_highlighter.highlight_pdf_pymupdf(path, out_dir / f"hl_{path.name}", highlight_text="notary,claimant")
+
+    return {
+        'highlight_pdf': highlight_pdf,
+        'process_highlight_zip': process_highlight_zip,
+        'fill_pdf': fill_pdf,
+        'search_labels_positions_enhanced': search_labels_positions_enhanced,
+        'highlight_pdf_pymupdf': highlight_pdf_pymupdf,
+        'fill_acroform_widgets': fill_acroform_with(processor.fill_acroform_widgets),
+        'fill_acroform_pypdf': fill_acroform_with(processor.fill_acroform),
+    }
+
+
+def time_case(fn: Callable[[], None], repeat: int) -> List[float]:
+    """Run fn once to warm up (imports, worker pool), then `repeat` times; milliseconds per run."""
+    fn()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def run(corpus_name: str = 'default', repeat: int = 5, only: List[str] = None) -> Dict:
+    spec = PRESETS[corpus_name]
+    corpus = generate_corpus(**spec)
+    acroform_corpus = generate_corpus(**dict(spec, acroform_ratio=1.0))
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp, quiet():
+        tmp_path = Path(tmp)
+        disable_caches(tmp_path / 'cache')
+        cases = build_cases(corpus, tmp_path, acroform_corpus)
+        for name, fn in cases.items():
+            if only and name not in only:
+                continue
+            timings = time_case(fn, repeat)
+            results[name] = {
+                'median_ms': round(statistics.median(timings), 3),
+                'min_ms': round(min(timings), 3),
+                'max_ms': round(max(timings), 3),
+            }
+    return {
+        'corpus': corpus_name,
+        'corpus_spec': spec,
+        'documents': len(corpus),
+        'repeat': repeat,
+        'python': platform.python_version(),
+        'machine': f"{platform.system()} {platform.machine()} ({os.cpu_count()} CPUs)",
+        'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'results': results,
+    }
+
+
+def compare(current: Dict, baseline: Dict, threshold: float = DEFAULT_THRESHOLD) -> Tuple[List[List[str]], bool]:
+    """Rows of (case, median, baseline, change, status) and whether any case regressed."""
+    rows = []
+    regressed = False
+    base_results = baseline.get('results', {}) if baseline else {}
+    for name, result in current['results'].items():
+        now = result['median_ms']
+        before = base_results.get(name, {}).get('median_ms')
+        if before is None:
+            rows.append([name, f"{now:.1f}", '-', '-', 'new'])
+            continue
+        change = (now - before) / before if before else 0.0
+        if change > threshold and now - before >= MIN_DELTA_MS:
+            status = 'REGRESSION'
+            regressed = True
+        elif change < -threshold and before - now >= MIN_DELTA_MS:
+            status = 'faster'
+        else:
+            status = 'ok'
+        rows.append([name, f"{now:.1f}", f"{before:.1f}", f"{change:+.1%}", status])
+    return rows, regressed
+
+
+def format_table(rows: List[List[str]]) -> str:
+    header = ['case', 'median ms', 'baseline ms', 'change', 'status']
+    widths = [max(len(str(r[i])) for r in rows + [header]) for i in range(len(header))]
+    lines = ['  '.join(h.ljust(w) for h, w in zip(header, widths))]
+    lines.append('  '.join('-' * w for w in widths))
+    for row in rows:
+        lines.append('  '.join(str(c).ljust(w) for c, w in zip(row, widths)))
+    return '\n'.join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__.split('\n\n')[0])
+    parser.add_argument('--corpus', choices=sorted(PRESETS), default='default', help='corpus size preset')
+    parser.add_argument('--repeat', type=int, default=5, help='timed runs per case (after one warm-up run)')
+    parser.add_argument('--only', nargs='*', help='case names to run (default: all)')
+    parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE, help='baseline JSON file')
+    parser.add_argument('--save-baseline', action='store_true', help='store this run as the new baseline')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='allowed slowdown before a case counts as a regression (0.15 = 15%%)')
+    parser.add_argument('--json', type=Path, help='also write this run\'s results to a JSON file')
+    args = parser.parse_args(argv)
+
+    current = run(args.corpus, args.repeat, args.only)
+
+    baseline = None
+    if args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text())
+        if baseline.get('corpus') != current['corpus']:
+            print(f"Baseline was recorded with corpus '{baseline.get('corpus')}', not comparing")
+            baseline = None
+
+    rows, regressed = compare(current, baseline, args.threshold)
+    print(f"Corpus '{current['corpus']}': {current['documents']} PDFs, {current['repeat']} runs per case, "
+          f"{current['machine']}")
+    print(format_table(rows))
+
+    if args.json:
+        args.json.write_text(json.dumps(current, indent=2))
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(current, indent=2))
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+    if regressed:
+        print(f"Regressions beyond {args.threshold:.0%} found")
+        return 1
+    return 0
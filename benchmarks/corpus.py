@@ -0,0 +1,178 @@
+"""
+Synthetic claim-form corpus.
+
+Generates unclaimed-property style claim packets with PyMuPDF: a form page with
+claimant labels and blanks, instruction pages of filler text, and a signature /
+notary block. Layout, page count, text density and whether the blanks are real
+AcroForm widgets or flat underscores are all configurable, and generation is
+deterministic for a given seed so baselines stay comparable.
+"""
+
+import io
+import random
+import zipfile
+from typing import Dict, List, Tuple
+
+import fitz  # PyMuPDF
+
+PAGE_WIDTH, PAGE_HEIGHT = 612, 792
+MARGIN = 72
+FONT_SIZE = 10
+LINE_HEIGHT = 14
+
+# (field key, label) pairs, worded like the forms the filler is tuned for
+CLAIMANT_LABELS = [
+    ("name", "Name(s) if different than above:"),
+    ("phone", "Daytime Phone:"),
+    ("address", "Current Address:"),
+    ("email", "Email:"),
+    ("dob", "Date of Birth:"),
+    ("ssn", "SSN/FEIN:"),
+]
+
+SIGNATURE_LINES = [
+    "Signature of Claimant",
+    "Printed Name",
+    "Signature of Notary",
+    "Notary Public",
+    "Witness Signature",
+]
+
+FILLER_WORDS = (
+    "the claimant property holder unclaimed funds state treasurer department records shall "
+    "submit documentation proof ownership account identification required pursuant statute "
+    "section report remittance dormant owner heir estate deceased beneficiary review office "
+    "payment issued within days receipt complete claim form attach copies valid government"
+).split()
+
+LAYOUTS = ('stacked', 'two_column', 'table')
+
+# Named corpus sizes for the benchmark command line
+PRESETS: Dict[str, Dict] = {
+    'small': {'documents': 4, 'pages': 2, 'density': 20, 'acroform_ratio': 0.5},
+    'default': {'documents': 12, 'pages': 4, 'density': 40, 'acroform_ratio': 0.25},
+    'large': {'documents': 40, 'pages': 12, 'density': 45, 'acroform_ratio': 0.25},
+}
+
+
+def _filler_line(rng: random.Random, words: int = 12) -> str:
+    return " ".join(rng.choice(FILLER_WORDS) for _ in range(words)).capitalize() + "."
+
+
+def _add_blank(page, key: str, rect: fitz.Rect, acroform: bool):
+    """A fillable blank: an AcroForm text widget, or underscores on a flat form."""
+    if acroform:
+        widget = fitz.Widget()
+        widget.field_name = key
+        widget.field_type = fitz.PDF_WIDGET_TYPE_TEXT
+        widget.rect = rect
+        widget.text_fontsize = FONT_SIZE
+        page.add_widget(widget)
+    else:
+        page.insert_text((rect.x0, rect.y1 - 3), "_" * int(rect.width / 5.5), fontsize=FONT_SIZE)
+
+
+def _form_page(doc, layout: str, acroform: bool, rng: random.Random):
+    page = doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+    page.insert_text((MARGIN, MARGIN), "CLAIM FORM - UNCLAIMED PROPERTY", fontsize=14)
+    page.insert_text((MARGIN, MARGIN + 20), "Claimant Information", fontsize=12)
+    y = MARGIN + 50
+
+    if layout == 'stacked':
+        for key, label in CLAIMANT_LABELS:
+            page.insert_text((MARGIN, y), label, fontsize=FONT_SIZE)
+            x = MARGIN + fitz.get_text_length(label, fontsize=FONT_SIZE) + 8
+            _add_blank(page, key, fitz.Rect(x, y - 11, PAGE_WIDTH - MARGIN, y + 3), acroform)
+            y += 2 * LINE_HEIGHT
+    elif layout == 'two_column':
+        column_width = (PAGE_WIDTH - 2 * MARGIN) / 2
+        for i, (key, label) in enumerate(CLAIMANT_LABELS):
+            x0 = MARGIN + (i % 2) * column_width
+            row_y = y + (i // 2) * 2 * LINE_HEIGHT
+            page.insert_text((x0, row_y), label, fontsize=FONT_SIZE)
+            x = x0 + fitz.get_text_length(label, fontsize=FONT_SIZE) + 6
+            _add_blank(page, key, fitz.Rect(x, row_y - 11, x0 + column_width - 10, row_y + 3), acroform)
+        y += (len(CLAIMANT_LABELS) + 1) // 2 * 2 * LINE_HEIGHT
+    else:  # table: label cells on the left, value cells on the right
+        label_width = 180
+        for key, label in CLAIMANT_LABELS:
+            row = fitz.Rect(MARGIN, y - 14, PAGE_WIDTH - MARGIN, y + 8)
+            page.draw_rect(row, color=(0, 0, 0), width=0.5)
+            page.draw_line((MARGIN + label_width, row.y0), (MARGIN + label_width, row.y1), color=(0, 0, 0), width=0.5)
+            page.insert_text((MARGIN + 4, y), label, fontsize=FONT_SIZE)
+            if acroform:
+                _add_blank(page, key, fitz.Rect(MARGIN + label_width + 4, row.y0 + 2, row.x1 - 4, row.y1 - 2), True)
+            y += 22
+
+    y += LINE_HEIGHT
+    while y < PAGE_HEIGHT - MARGIN:
+        page.insert_text((MARGIN, y), _filler_line(rng), fontsize=FONT_SIZE - 1)
+        y += LINE_HEIGHT
+
+
+def _instruction_page(doc, density: int, rng: random.Random):
+    page = doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+    page.insert_text((MARGIN, MARGIN), "INSTRUCTIONS", fontsize=12)
+    y = MARGIN + 24
+    for _ in range(density):
+        if y > PAGE_HEIGHT - MARGIN:
+            break
+        page.insert_text((MARGIN, y), _filler_line(rng, rng.randint(8, 14)), fontsize=FONT_SIZE - 1)
+        y += LINE_HEIGHT
+
+
+def _signature_page(doc, acroform: bool, rng: random.Random):
+    page = doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+    page.insert_text((MARGIN, MARGIN), "CERTIFICATION", fontsize=12)
+    y = MARGIN + 24
+    for _ in range(6):
+        page.insert_text((MARGIN, y), _filler_line(rng), fontsize=FONT_SIZE - 1)
+        y += LINE_HEIGHT
+    y += LINE_HEIGHT
+    for line in SIGNATURE_LINES:
+        page.insert_text((MARGIN, y), "_" * 40, fontsize=FONT_SIZE)
+        page.insert_text((MARGIN, y + LINE_HEIGHT), line, fontsize=FONT_SIZE - 1)
+        y += 3 * LINE_HEIGHT
+    if acroform:
+        _add_blank(page, "printed_name", fitz.Rect(MARGIN + 300, y - 11, PAGE_WIDTH - MARGIN, y + 3), True)
+
+
+def generate_form_pdf(pages: int = 4, layout: str = 'stacked', acroform: bool = False,
+                      density: int = 40, seed: int = 0) -> bytes:
+    """
+    One claim packet: form page, (pages - 2) instruction pages with `density` lines of
+    text each, and a signature page. pages is at least 2.
+    """
+    if layout not in LAYOUTS:
+        raise ValueError(f"Unknown layout '{layout}', expected one of {LAYOUTS}")
+    rng = random.Random(seed)
+    doc = fitz.open()
+    _form_page(doc, layout, acroform, rng)
+    for _ in range(max(pages, 2) - 2):
+        _instruction_page(doc, density, rng)
+    _signature_page(doc, acroform, rng)
+    data = doc.tobytes(garbage=3, deflate=True)
+    doc.close()
+    return data
+
+
+def generate_corpus(documents: int = 12, pages: int = 4, density: int = 40, acroform_ratio: float = 0.25,
+                    seed: int = 0) -> List[Tuple[str, bytes]]:
+    """(file name, PDF bytes) for a mix of layouts, with about acroform_ratio of them fillable."""
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(documents):
+        layout = LAYOUTS[i % len(LAYOUTS)]
+        acroform = rng.random() < acroform_ratio
+        kind = 'acroform' if acroform else 'flat'
+        corpus.append((f"claim_{i:03d}_{layout}_{kind}.pdf",
+                       generate_form_pdf(pages, layout, acroform, density, seed=seed * 1000 + i)))
+    return corpus
+
+
+def corpus_zip(corpus: List[Tuple[str, bytes]]) -> bytes:
+    mem = io.BytesIO()
+    with zipfile.ZipFile(mem, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for name, data in corpus:
+            zf.writestr(name, data)
+    return mem.getvalue()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Tests for the benchmark corpus and the baseline comparison
+"""
+
+import json
+
+import fitz  # PyMuPDF
+
+from benchmarks.bench import compare, main
+from benchmarks.corpus import generate_corpus
+
+
+def test_corpus_is_deterministic_and_mixes_form_kinds():
+    def contents(corpus):
+        # File IDs differ between saves, so compare names and page text
+        return [(name, [page.get_text() for page in fitz.open(stream=data, filetype="pdf")])
+                for name, data in corpus]
+
+    corpus = generate_corpus(documents=4, pages=3, acroform_ratio=0.5)
+    assert contents(corpus) == contents(generate_corpus(documents=4, pages=3, acroform_ratio=0.5))
+    assert {name.rsplit("_", 1)[1] for name, _ in corpus} == {"flat.pdf", "acroform.pdf"}
+    for name, data in corpus:
+        doc = fitz.open(stream=data, filetype="pdf")
+        assert len(doc) == 3
+        assert bool(list(doc[0].widgets())) == name.endswith("_acroform.pdf")
+
+
+def test_compare_flags_only_real_slowdowns():
+    baseline = {"results": {"big": {"median_ms": 100.0}, "tiny": {"median_ms": 1.0},
+                            "quick": {"median_ms": 100.0}}}
+    current = {"results": {"big": {"median_ms": 130.0}, "tiny": {"median_ms": 2.0},
+                           "quick": {"median_ms": 50.0}, "added": {"median_ms": 5.0}}}
+    rows, regressed = compare(current, baseline)
+    assert regressed
+    # tiny doubled, but by less than MIN_DELTA_MS
+    assert {row[0]: row[-1] for row in rows} == {"big": "REGRESSION", "tiny": "ok", "quick": "faster",
+                                                 "added": "new"}
+    assert not compare(current, baseline, threshold=0.5)[1]
+
+
+def test_saved_baseline_round_trips(tmp_path, capsys):
+    baseline = tmp_path / "baseline.json"
+    args = ["--corpus", "small", "--repeat", "1", "--only", "fill_pdf", "--baseline", str(baseline)]
+    assert main(args + ["--save-baseline"]) == 0
+    saved = json.loads(baseline.read_text())
+    assert saved["corpus"] == "small" and list(saved["results"]) == ["fill_pdf"]
+    # A generous threshold keeps timing noise on a shared machine from failing the comparison
+    assert main(args + ["--threshold", "100"]) == 0
+    assert "fill_pdf" in capsys.readouterr().out
@@ -12,20 +12,41 @@ import time
 import logging
 import tempfile
 import json
+from functools import partial
 from pathlib import Path
-from flask import Flask, render_template, request, send_file, flash, redirect, url_for, jsonify
+from flask import Flask, render_template, request, send_file, flash, redirect, url_for, jsonify, Response, g
 from datetime import datetime
 
+import sys
+import os
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(BASE_DIR, 'apps', 'pdf-filler', 'app'))
+
+# Server infrastructure (caching, jobs, uploads, metrics): needed at startup, no PDF engine
+from highlight_pool import highlight_zip_members
+from result_cache import ResultCache
+from jobs import JobManager, JobQueueFull, zip_pdf_names, DONE
+from uploads import UploadTooLarge, spool_upload, open_zip
+from match_report import MatchReport, StageTimer
+from metrics import Registry, process_rss_bytes
+
 # Import modules from existing apps
 try:
-    import sys
-    import os
-    sys.path.append(os.path.join('apps', 'pdf-filler', 'app'))
-    from processor import process_zip, fill_pdf
-    sys.path.append(os.path.join('apps', 'rpa'))
-    from automation import SeleniumAutomation
+    from processor import process_zip, write_filled_zip, fill_pdf, TEMPLATES as fill_templates
+    from text_search import MATCH_MODES, build_matcher, normalize_phrase
+    from pdf_output import open_pdf, save_pdf, SAVE_MODES
+    from text_layer import TEXT_LAYERS
+    from annotations import add_highlight
+    PDF_AVAILABLE = True
 except ImportError as e:
     # Fallback imports if modules aren't available
+    PDF_AVAILABLE = False
+    print(f"Warning: Some modules not available, some features may be limited: {e}")
+
+try:
+    sys.path.append(os.path.join(BASE_DIR, 'apps', 'rpa'))
+    from automation import SeleniumAutomation
+except ImportError as e:
     print(f"Warning: Some modules not available, some features may be limited: {e}")
 
 # Configure logging
@@ -51,6 +72,31 @@ COMMON_HIGHLIGHTS = [
     "Power of Attorney", "POA", "Attorney Signature"
 ]
 
+# Result archives larger than this are spooled to a temp file instead of memory
+SPOOL_MAX_BYTES = 32 * 1024 * 1024
+
+# On-disk cache of highlighted/filled PDFs, keyed by PDF content + parameters
+RESULT_CACHE_DIR = os.path.join(BASE_DIR, 'cache')
+RESULT_CACHE_MAX_BYTES = 512 * 1024 * 1024
+result_cache = ResultCache(RESULT_CACHE_DIR, RESULT_CACHE_MAX_BYTES)
+
+# Extracted page text layouts, keyed by PDF content, reused across runs with other words
+text_layers = TEXT_LAYERS if PDF_AVAILABLE else None
+
+# Worker processes used to highlight the PDFs of a ZIP
+# (None = one per CPU core, 1 = highlight on the request thread)
+HIGHLIGHT_WORKERS = None
+
+# How highlighted PDFs are saved: "incremental", "fast" or "compact" (see pdf_output.py)
+HIGHLIGHT_SAVE_MODE = "compact"
+
+# Background jobs for async=1 requests: worker threads, queued+running limit, result retention
+JOBS_DIR = os.path.join(BASE_DIR, 'job_results')
+JOB_WORKERS = 2
+JOB_MAX_ACTIVE = 16
+JOB_RETENTION_SECONDS = 60 * 60
+jobs = JobManager(JOBS_DIR, JOB_WORKERS, JOB_MAX_ACTIVE, JOB_RETENTION_SECONDS)
+
 # Global variable to track automation status
 automation_status = {
     'running': False,
@@ -62,8 +108,75 @@ automation_status = {
     'search_text': None
 }
 
-def highlight_pdf(pdf_bytes, highlight_words):
-    """Highlight specified words in a PDF by finding their positions and drawing yellow rectangles"""
+# Runtime metrics served at /metrics (Prometheus text format)
+metrics = Registry()
+REQUEST_SECONDS = metrics.histogram('uprs_request_seconds', 'Request latency per route', ('route', 'method', 'status'))
+REQUEST_BYTES_IN = metrics.counter('uprs_request_bytes_total', 'Request body bytes received per route', ('route',))
+RESPONSE_BYTES_OUT = metrics.counter('uprs_response_bytes_total', 'Response body bytes sent per route', ('route',))
+PDFS_PROCESSED = metrics.counter('uprs_pdfs_processed_total', 'PDFs highlighted or filled', ('operation',))
+PAGES_PROCESSED = metrics.counter('uprs_pages_processed_total', 'Pages of highlighted PDFs', ('operation',))
+metrics.callback('uprs_jobs', 'Background jobs per state (queued + running = queue depth)', jobs.counts,
+                 labelname='state')
+metrics.callback('uprs_result_cache_hits_total', 'Result cache hits', lambda: result_cache.stats()['hits'], 'counter')
+metrics.callback('uprs_result_cache_misses_total', 'Result cache misses', lambda: result_cache.stats()['misses'],
+                 'counter')
+metrics.callback('uprs_result_cache_bytes', 'Result cache size on disk', lambda: result_cache.stats()['bytes'])
+if PDF_AVAILABLE:
+    metrics.callback('uprs_text_layer_cache_hits_total', 'Text layer cache hits in the server process',
+                     lambda: text_layers.stats()['hits'], 'counter')
+    metrics.callback('uprs_text_layer_cache_misses_total', 'Text layer cache misses in the server process',
+                     lambda: text_layers.stats()['misses'], 'counter')
+    metrics.callback('uprs_template_cache_hits_total', 'Form templates whose field labels were replayed',
+                     lambda: fill_templates.stats()['hits'], 'counter')
+    metrics.callback('uprs_template_cache_misses_total', 'Fills that ran label search for an unknown template',
+                     lambda: fill_templates.stats()['misses'], 'counter')
+metrics.callback('uprs_process_resident_memory_bytes', 'Resident set size of the server process', process_rss_bytes)
+metrics.callback('uprs_automation_running', 'Whether the RPA automation is running',
+                 lambda: int(bool(automation_status.get('running'))))
+metrics.callback('uprs_automation_completed', 'Whether the last RPA automation completed',
+                 lambda: int(bool(automation_status.get('completed'))))
+metrics.callback('uprs_automation_failed', 'Whether the last RPA automation ended with an error',
+                 lambda: int(bool(automation_status.get('error'))))
+
+def count_pdfs(operation, progress=None):
+    """Progress callback that counts finished PDFs for /metrics and forwards to progress"""
+    def callback(name, state='done'):
+        if state == 'done':
+            PDFS_PROCESSED.inc(operation=operation)
+        if progress:
+            progress(name, state)
+    return callback
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    start = g.get('request_start')
+    if start is not None:
+        REQUEST_SECONDS.observe(time.perf_counter() - start, route=route, method=request.method,
+                                status=response.status_code)
+    if request.content_length:
+        REQUEST_BYTES_IN.inc(request.content_length, route=route)
+    if response.content_length:
+        RESPONSE_BYTES_OUT.inc(response.content_length, route=route)
+    return response
+
+def highlight_pdf(pdf_bytes, highlight_words, save_mode=HIGHLIGHT_SAVE_MODE, stats=None, match_mode='literal',
+                  patterns=()):
+    """Highlight specified words in a PDF by finding their positions and drawing yellow rectangles
+    
+    If a stats dict is given it is filled with page counts, hits per word and the
+    seconds spent in extraction, search, annotation and save (see match_report.py).
+    In 'pattern' match mode the words are matched as whole words and `patterns` are
+    regular expressions, all found in one regex scan per page (see text_search.PatternMatcher).
+    """
+    if stats is None:
+        stats = {}
+    timer = StageTimer()
+    stats['timings'] = timer.timings
     try:
         # Try to import PyMuPDF (fitz) for better text highlighting
         try:
@@ -74,37 +187,44 @@ def highlight_pdf(pdf_bytes, highlight_words):
             print("PyMuPDF not available, using fallback method")
         
         if use_fitz:
-            # Use PyMuPDF for better text highlighting
-            doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+            # One automaton (or one combined regex in pattern mode) for all words: each page
+            # is extracted and scanned once, exact-case hits win over case-insensitive ones per word
+            matcher = build_matcher(highlight_words, patterns, match_mode)
+            matches = stats['matches'] = {phrase: 0 for phrase in matcher.phrases}
             
-            for page_num in range(len(doc)):
-                page = doc[page_num]
+            # Use PyMuPDF for better text highlighting; the document (and the temp file behind
+            # an incremental save) is released even when a later step raises
+            with open_pdf(pdf_bytes, save_mode) as doc:
+                with timer.stage('extract'):
+                    # Page text comes from the text-layer sidecar when this PDF was seen before
+                    layout = text_layers.load(doc, pdf_bytes)
+                stats['pages'] = len(doc)
                 
-                # Search for each word on the page with exact matching
-                for word in highlight_words:
-                    # First try exact case-sensitive search
-                    text_instances = page.search_for(word, flags=0)  # No flags = case sensitive
+                for page_num in range(len(doc)):
+                    # Pages the prefilter rules out are never loaded or annotated
+                    with timer.stage('search'):
+                        results = matcher.search_layout(layout[page_num])
+                    if not results:
+                        continue
                     
-                    # If no exact matches found, try case-insensitive
-                    if not text_instances:
-                        text_instances = page.search_for(word, flags=fitz.TEXTFLAGS_IGNORECASE)
-                    
-                    # Highlight each instance found
-                    for inst in text_instances:
-                        # Create a highlight annotation
-                        highlight = page.add_highlight_annot(inst)
-                        highlight.set_colors(stroke=[1, 1, 0])  # Yellow
-                        highlight.set_opacity(0.4)  # More visible
-                        highlight.update()
+                    with timer.stage('annotate'):
+                        page = doc[page_num]
                         
-                        print(f"Highlighted '{word}' on page {page_num + 1}")
-            
-            # Save the highlighted PDF
-            output_stream = io.BytesIO()
-            doc.save(output_stream, garbage=4, deflate=True)
-            doc.close()
-            output_stream.seek(0)
-            return output_stream.getvalue()
+                        page_rects = []
+                        for word, rects in results:
+                            page_rects.extend(rects)
+                            matches[word] += 1
+                            print(f"Highlighted '{word}' on page {page_num + 1}")
+                        
+                        # Overlapping hits ("Notary" / "Notary Public") merge into one multi-quad highlight
+                        add_highlight(page, page_rects, stroke=(1, 1, 0), opacity=0.4)  # Yellow, more visible
+                
+                stats['pages_skipped'] = matcher.pages_skipped
+                print(f"Prefilter skipped {matcher.pages_skipped} of {matcher.pages_scanned} pages")
+                
+                # Save the highlighted PDF with the selected strategy
+                with timer.stage('save'):
+                    return save_pdf(doc, save_mode)
         
         else:
             # Fallback method using PyPDF2
@@ -166,31 +286,105 @@ def highlight_pdf(pdf_bytes, highlight_words):
             
     except Exception as e:
         print(f"Error highlighting PDF: {e}")
+        stats['error'] = str(e)
         # Return original PDF if highlighting fails
         return pdf_bytes
 
-def process_highlight_zip(zip_bytes, highlight_words):
-    """Process a ZIP file and highlight specified words in all PDFs"""
+def highlight_pdf_with_stats(pdf_bytes, highlight_words, save_mode=HIGHLIGHT_SAVE_MODE, match_mode='literal',
+                             patterns=()):
+    """highlight_pdf() returning (pdf_bytes, stats), for runs that build a match report"""
+    stats = {}
+    result = highlight_pdf(pdf_bytes, highlight_words, save_mode, stats, match_mode, patterns)
+    return result, stats
+
+def process_highlight_zip(zip_bytes, highlight_words, workers=None, save_mode=HIGHLIGHT_SAVE_MODE,
+                          match_mode='literal', patterns=()):
+    """Process a ZIP file and highlight specified words in all PDFs
+    
+    PDFs are highlighted in a pool of worker processes (workers <= 1 highlights
+    them one by one on the calling thread); output keeps the original member order.
+    """
     output_zip = io.BytesIO()
+    write_highlight_zip(zip_bytes, highlight_words, output_zip, workers, save_mode,
+                        match_mode=match_mode, patterns=patterns)
+    return output_zip.getvalue()
+
+def write_highlight_zip(zip_source, highlight_words, out, workers=None, save_mode=HIGHLIGHT_SAVE_MODE,
+                        progress=None, match_mode='literal', patterns=()):
+    """Highlight all PDFs in a ZIP and write the result archive to the binary file object `out`
     
-    with zipfile.ZipFile(io.BytesIO(zip_bytes), 'r') as input_zip:
-        with zipfile.ZipFile(output_zip, 'w') as output_zip_file:
-            for file_info in input_zip.filelist:
-                if file_info.filename.lower().endswith('.pdf'):
-                    # Read the PDF
-                    pdf_bytes = input_zip.read(file_info.filename)
-                    
-                    # Highlight the PDF
-                    highlighted_pdf = highlight_pdf(pdf_bytes, highlight_words)
-                    
-                    # Add to output ZIP
-                    output_zip_file.writestr(f"highlighted_{file_info.filename}", highlighted_pdf)
-                else:
-                    # Copy non-PDF files as-is
-                    file_bytes = input_zip.read(file_info.filename)
-                    output_zip_file.writestr(file_info.filename, file_bytes)
+    zip_source may be bytes, a path or a seekable file such as a spooled upload.
+    progress, if given, is called with each PDF's member name as soon as it is written.
+    The run's MatchReport is added to the archive as highlight_report.json/.csv and returned.
+    workers defaults to HIGHLIGHT_WORKERS as it is set when the call starts.
+    """
+    if workers is None:
+        workers = HIGHLIGHT_WORKERS
+    highlight_fn = partial(highlight_pdf_with_stats, save_mode=save_mode, match_mode=match_mode,
+                           patterns=list(patterns))
+    cache_params = {'words': sorted(set(highlight_words)), 'save_mode': save_mode,
+                    'match_mode': match_mode, 'patterns': sorted(set(patterns))}
+    report = MatchReport([normalize_phrase(w) for w in list(patterns) + list(highlight_words) if normalize_phrase(w)],
+                         {'save_mode': save_mode, 'match_mode': match_mode})
+    with open_zip(zip_source) as input_zip:
+        with zipfile.ZipFile(out, 'w') as output_zip_file:
+            highlight_zip_members(input_zip, output_zip_file, highlight_fn, highlight_words, workers,
+                                  cache=result_cache, cache_params=cache_params,
+                                  progress=count_pdfs('highlight', progress), report=report)
+            report.write_to_zip(output_zip_file)
+    PAGES_PROCESSED.inc(sum(entry['pages'] for entry in report.files), operation='highlight')
+    return report
+
+def send_spooled_zip(spool, download_name):
+    """Send a finished ZIP from a spooled temp file without copying it back into memory"""
+    size = spool.tell()
+    spool.seek(0)
+    response = send_file(
+        spool,
+        mimetype='application/zip',
+        as_attachment=True,
+        download_name=download_name
+    )
+    response.content_length = size
+    return response
+
+def wants_async():
+    """True when the client asked for a job id instead of waiting for the ZIP"""
+    return request.values.get('async', '').lower() in ('1', 'true', 'yes')
+
+def form_error(message, status=400):
+    """Report a request problem as JSON to async clients, as a flash message to the form otherwise"""
+    if wants_async():
+        return jsonify({'success': False, 'message': message}), status
+    flash(message)
+    return redirect(url_for('index'))
+
+def submit_job(kind, fn, upload, download_name):
+    """Queue fn(upload, out, progress) as a background job and return the 202 response with its URLs
     
-    return output_zip.getvalue()
+    fn may return a MatchReport, which is then served by /jobs/<id>/report.
+    The job owns the spooled upload from here on and closes it when it finishes.
+    """
+    def run(out, progress):
+        try:
+            return fn(upload, out, progress)
+        finally:
+            upload.close()
+    
+    try:
+        job = jobs.submit(kind, run, zip_pdf_names(upload), download_name)
+    except zipfile.BadZipFile:
+        upload.close()
+        return form_error("The uploaded file is not a valid ZIP archive.")
+    except JobQueueFull:
+        upload.close()
+        return form_error("Too many jobs are running, please try again later.", 503)
+    return jsonify({
+        'success': True,
+        'job_id': job.id,
+        'status_url': url_for('job_status', job_id=job.id),
+        'result_url': url_for('job_result', job_id=job.id)
+    }), 202
 
 def run_automation_in_background(highlight_text=None, name_text=None, signature_options=None, data_file_path=None):
     """
@@ -261,14 +455,12 @@ def fill_pdf_route():
         
         # Validate required fields
         if not name:
-            flash("Name is required for PDF filling.")
-            return redirect(url_for('index'))
+            return form_error("Name is required for PDF filling.")
         
         # Get uploaded file
         f = request.files.get('zipfile')
         if not f or not f.filename.lower().endswith('.zip'):
-            flash("Please upload a ZIP file containing PDFs.")
-            return redirect(url_for('index'))
+            return form_error("Please upload a ZIP file containing PDFs.")
         
         # Prepare values dictionary
         values = {
@@ -283,25 +475,32 @@ def fill_pdf_route():
         # Add signature options
         values.update(signature_options)
         
-        # Process the ZIP file
-        zip_bytes = f.read()
+        # The upload is streamed into a spooled temp file and read by zipfile from there
+        upload = spool_upload(f)
+        download_name = f'filled_documents_{datetime.now().strftime("%Y%m%d_%H%M%S")}.zip'
+        
+        if wants_async():
+            # Fill in the background; the client polls the job and downloads the result
+            return submit_job('fill', lambda src, out, progress: write_filled_zip(
+                src, values, out, cache=result_cache, progress=count_pdfs('fill', progress)), upload, download_name)
+        
+        # Process the ZIP file, writing the result into a spooled temp file
+        spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
         try:
-            processed_zip = process_zip(zip_bytes, values)
+            with upload:
+                write_filled_zip(upload, values, spool, cache=result_cache, progress=count_pdfs('fill'))
+        except UploadTooLarge as e:
+            spool.close()
+            return form_error(str(e), 413)
         except Exception as e:
-            flash(f"Error processing PDFs: {str(e)}")
-            return redirect(url_for('index'))
+            spool.close()
+            return form_error(f"Error processing PDFs: {str(e)}", 500)
         
-        # Return the processed ZIP file
-        return send_file(
-            io.BytesIO(processed_zip),
-            mimetype='application/zip',
-            as_attachment=True,
-            download_name=f'filled_documents_{datetime.now().strftime("%Y%m%d_%H%M%S")}.zip'
-        )
+        # Stream the processed ZIP file back; the spool is closed with the response
+        return send_spooled_zip(spool, download_name)
         
     except Exception as e:
-        flash(f"An error occurred: {str(e)}")
-        return redirect(url_for('index'))
+        return form_error(f"An error occurred: {str(e)}", 500)
 
 # PDF Highlighter Routes
 @app.route('/highlight_pdf', methods=['POST'])
@@ -312,42 +511,106 @@ def highlight_pdf_route():
         selected_words = request.form.getlist("highlight_words")
         custom_words = request.form.get("custom_words", "").strip()
         
+        # Pattern mode treats each custom line as a regular expression and matches whole words only
+        match_mode = request.form.get("match_mode", "literal")
+        if match_mode not in MATCH_MODES:
+            return form_error(f"Unknown match mode '{match_mode}'.")
+        
         # Combine selected and custom words
         all_highlight_words = selected_words.copy()
-        if custom_words:
+        patterns = []
+        if custom_words and match_mode == 'pattern':
+            # One pattern per line: commas and semicolons are regex syntax here
+            patterns = [line.strip() for line in custom_words.splitlines() if line.strip()]
+        elif custom_words:
             # Split custom words by comma or newline
             custom_list = re.split(r'[,;\n]', custom_words)
             all_highlight_words.extend([word.strip() for word in custom_list if word.strip()])
         
-        if not all_highlight_words:
-            flash("Please select at least one word to highlight.")
-            return redirect(url_for('index'))
+        if not all_highlight_words and not patterns:
+            return form_error("Please select at least one word to highlight.")
+        
+        # Reject bad regexes before any work is queued
+        try:
+            build_matcher(all_highlight_words, patterns, match_mode)
+        except ValueError as e:
+            return form_error(str(e))
+        
+        # Save strategy: batch clients can trade output size for throughput
+        save_mode = request.form.get("save_mode", HIGHLIGHT_SAVE_MODE)
+        if save_mode not in SAVE_MODES:
+            return form_error(f"Unknown save mode '{save_mode}'.")
         
         # Get uploaded file
         f = request.files.get("zipfile")
         if not f or not f.filename.lower().endswith(".zip"):
-            flash("Please upload a ZIP file containing PDFs.")
-            return redirect(url_for('index'))
+            return form_error("Please upload a ZIP file containing PDFs.")
         
-        # Process the ZIP file
-        zip_bytes = f.read()
+        # The upload is streamed into a spooled temp file and read by zipfile from there
+        upload = spool_upload(f)
+        download_name = f'highlighted_documents_{datetime.now().strftime("%Y%m%d_%H%M%S")}.zip'
+        
+        if wants_async():
+            # Highlight in the background; the client polls the job and downloads the result
+            return submit_job('highlight', lambda src, out, progress: write_highlight_zip(
+                src, all_highlight_words, out, save_mode=save_mode, progress=progress,
+                match_mode=match_mode, patterns=patterns), upload, download_name)
+        
+        # Process the ZIP file, writing the result into a spooled temp file
+        spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
         try:
-            highlighted_zip = process_highlight_zip(zip_bytes, all_highlight_words)
+            with upload:
+                write_highlight_zip(upload, all_highlight_words, spool, save_mode=save_mode,
+                                    match_mode=match_mode, patterns=patterns)
+        except UploadTooLarge as e:
+            spool.close()
+            return form_error(str(e), 413)
         except Exception as e:
-            flash(f"Error highlighting PDFs: {str(e)}")
-            return redirect(url_for('index'))
+            spool.close()
+            return form_error(f"Error highlighting PDFs: {str(e)}", 500)
         
-        # Return the highlighted ZIP file
-        return send_file(
-            io.BytesIO(highlighted_zip),
-            mimetype='application/zip',
-            as_attachment=True,
-            download_name=f'highlighted_documents_{datetime.now().strftime("%Y%m%d_%H%M%S")}.zip'
-        )
+        # Stream the highlighted ZIP file back; the spool is closed with the response
+        return send_spooled_zip(spool, download_name)
         
     except Exception as e:
-        flash(f"An error occurred: {str(e)}")
-        return redirect(url_for('index'))
+        return form_error(f"An error occurred: {str(e)}", 500)
+
+# Background job routes
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """API endpoint to get a job's state and per-file progress."""
+    status = jobs.status(job_id)
+    if status is None:
+        return jsonify({'success': False, 'message': 'Unknown or expired job'}), 404
+    return jsonify(status)
+
+@app.route('/jobs/<job_id>/report')
+def job_report(job_id):
+    """API endpoint to get a finished highlight job's match report (JSON, or CSV with ?format=csv)."""
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'message': 'Unknown or expired job'}), 404
+    if job.report is None:
+        return jsonify({'success': False, 'message': f'No report for this job (job is {job.status})'}), 409
+    if request.args.get('format') == 'csv':
+        return Response(job.report.to_csv(), mimetype='text/csv',
+                        headers={'Content-Disposition': 'attachment; filename=highlight_report.csv'})
+    return jsonify(job.report.to_dict())
+
+@app.route('/jobs/<job_id>/result')
+def job_result(job_id):
+    """Download the ZIP produced by a finished job."""
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'message': 'Unknown or expired job'}), 404
+    if job.status != DONE:
+        return jsonify({'success': False, 'message': f'Job is {job.status}', 'error': job.error}), 409
+    return send_file(
+        job.result_path,
+        mimetype='application/zip',
+        as_attachment=True,
+        download_name=job.download_name
+    )
 
 # RPA Automation Routes
 @app.route('/start_automation', methods=['POST'])
@@ -431,6 +694,16 @@ def get_automation_status():
     """API endpoint to get current automation status."""
     return jsonify(automation_status)
 
+@app.route('/cache_status')
+def get_cache_status():
+    """API endpoint to get result cache hit/miss counters."""
+    return jsonify(result_cache.stats())
+
+@app.route('/metrics')
+def get_metrics():
+    """Prometheus scrape endpoint: request latency, throughput, queue depth, caches, memory, automation."""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/reset_automation')
 def reset_automation_status():
     """API endpoint to reset automation status."""